@@ -1,10 +1,46 @@
+import importlib
 import logging
-from flaml.automl import AutoML, logger_formatter
-from flaml.tune.searcher import CFO, BlendSearch, FLOW2, BlendSearchTuner, RandomSearch
-from flaml.onlineml.autovw import AutoVW
-from flaml.integrations import oai
 from flaml.version import __version__
 
+# The public API is imported on the first access (PEP 562), so that `import flaml`
+# does not pay for importing pandas, sklearn, ray and the optional dependencies.
+_LAZY_ATTRS = {
+    "AutoML": "flaml.automl",
+    "logger_formatter": "flaml.automl",
+    "CFO": "flaml.tune.searcher",
+    "BlendSearch": "flaml.tune.searcher",
+    "FLOW2": "flaml.tune.searcher",
+    "BlendSearchTuner": "flaml.tune.searcher",
+    "RandomSearch": "flaml.tune.searcher",
+    "AutoVW": "flaml.onlineml.autovw",
+    "load_model": "flaml.automl.export",
+}
+
+
+def _import_submodule(package, name):
+    """Import a submodule accessed as an attribute of its lazy package."""
+    try:
+        return importlib.import_module(f"{package}.{name}")
+    except ModuleNotFoundError as e:
+        if e.name != f"{package}.{name}":
+            raise
+        raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+    elif name == "oai":
+        value = importlib.import_module("flaml.integrations.oai")
+    else:
+        value = _import_submodule(__name__, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | {"oai"})
+
 
 # Set the root logger.
 logger = logging.getLogger(__name__)
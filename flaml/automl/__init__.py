@@ -1,3 +1,19 @@
-from flaml.automl.automl import AutoML, AutoMLState, SearchState, logger_formatter, size
+import importlib
+from flaml import _import_submodule
 
+# imported from flaml.automl.automl on the first access (PEP 562), so that importing
+# the lightweight submodules such as flaml.automl.data does not import the AutoML stack
 __all__ = ["AutoML", "AutoMLState", "SearchState", "logger_formatter", "size"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        value = getattr(importlib.import_module("flaml.automl.automl"), name)
+    else:
+        value = _import_submodule(__name__, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -25,6 +25,11 @@ from sklearn.base import BaseEstimator
 import pandas as pd
 import logging
 import json
+from flaml.automl.model import (
+    LearningCurvePruner,
+    TrialWorkerError,
+    run_in_subprocess,
+)
 from flaml.automl.ml import (
     compute_estimator,
     train_estimator,
@@ -52,6 +57,8 @@ from flaml.automl.data import (
     REGRESSION,
     _is_nlp_task,
     NLG_TASKS,
+    preprocess_test_data,
+    postprocess_prediction,
 )
 from flaml import tune
 from flaml.automl.training_log import training_log_reader, training_log_writer
@@ -71,13 +78,19 @@ except ImportError:
     mlflow = None
 
 try:
-    from ray import __version__ as ray_version
+    import psutil
+except ImportError:
+    psutil = None
 
-    assert ray_version >= "1.10.0"
 
-    ray_available = True
-except (ImportError, AssertionError):
-    ray_available = False
+def _ray_available():
+    """Whether ray>=1.10.0 is installed. Checked when ray is about to be used, so
+    that importing flaml.automl does not import ray."""
+    try:
+        from ray import __version__ as ray_version
+    except ImportError:
+        return False
+    return ray_version >= "1.10.0"
 
 
 class SearchState:
@@ -381,22 +394,19 @@ class AutoMLState:
             / state.data_size[0]
         )
 
-        (
-            trained_estimator,
-            val_loss,
-            metric_for_logging,
-            _,
-            pred_time,
-        ) = compute_estimator(
+        trial_budget = (
+            state.train_time_limit
+            if budget is None
+            else min(budget, state.train_time_limit or np.inf)
+        )
+        args = (
             sampled_X_train,
             sampled_y_train,
             state.X_val,
             state.y_val,
             state.weight_val,
             state.groups_val,
-            state.train_time_limit
-            if budget is None
-            else min(budget, state.train_time_limit or np.inf),
+            trial_budget,
             state.kf,
             config,
             state.task,
@@ -410,8 +420,47 @@ class AutoMLState:
             state.log_training_metric,
             this_estimator_kwargs,
             state.free_mem_ratio,
+            state.pruner,
         )
-        if state.retrain_final and not state.model_history:
+        if state.isolate_trials:
+            isolate_trials = (
+                state.isolate_trials if isinstance(state.isolate_trials, dict) else {}
+            )
+            memory_limit = isolate_trials.get("memory_limit")
+            if memory_limit is None and psutil is not None:
+                # a trial may use up to mem_thres, within the available memory
+                memory_limit = min(
+                    state.mem_thres,
+                    psutil.virtual_memory().available * (1 - state.free_mem_ratio),
+                )
+            try:
+                (
+                    trained_estimator,
+                    val_loss,
+                    metric_for_logging,
+                    _,
+                    pred_time,
+                ), pruner = run_in_subprocess(
+                    AutoMLState._compute_estimator_with_pruner,
+                    args,
+                    time_limit=trial_budget and trial_budget * 1.5 + 1,
+                    memory_limit=memory_limit,
+                    start_method=isolate_trials.get("start_method"),
+                )
+                state.pruner = pruner
+            except (MemoryError, TimeoutError, TrialWorkerError) as e:
+                logger.warning(f"{e.__class__} {e}")
+                trained_estimator = metric_for_logging = None
+                val_loss, pred_time = np.inf, 0
+        else:
+            (
+                trained_estimator,
+                val_loss,
+                metric_for_logging,
+                _,
+                pred_time,
+            ) = compute_estimator(*args)
+        if state.retrain_final and not state.model_history and trained_estimator:
             trained_estimator.cleanup()
 
         result = {
@@ -427,6 +476,11 @@ class AutoMLState:
             tune.report(**result)
         return result
 
+    @staticmethod
+    def _compute_estimator_with_pruner(*args):
+        # runs in the trial worker; the pruner is returned to keep the new curve
+        return compute_estimator(*args), args[-1]
+
     @classmethod
     def sanitize(cls, config: dict) -> dict:
         """Make a config ready for passing to estimator."""
@@ -698,6 +752,23 @@ class AutoML(BaseEstimator):
                 the detected `num_executors`. The final number of concurrent trials will be the minimum
                 of `n_concurrent_trials` and `num_executors`.
             free_mem_ratio: float between 0 and 1, default=0. The free memory ratio to keep during training.
+            prune_trials: boolean or dict, default=False | Whether to stop unpromising
+                trials early based on their learning curves. The validation metric
+                of lgbm, xgboost, xgb_limitdepth and transformer trials is recorded
+                every few boosting rounds or every evaluation, and a trial is stopped
+                when its curve is worse than the median of the finished trials'
+                curves at the same iteration. If dict, it contains the keyword
+                arguments of [LearningCurvePruner](../automl/model#learningcurvepruner-objects),
+                e.g., `{"interval": 10, "percentile": 50, "min_trials": 3}`.
+            isolate_trials: boolean or dict, default=False | Whether to run each trial
+                in a separate worker process. The worker is killed when it runs
+                longer than 1.5 times the trial's time budget plus one second, or
+                allocates more than `mem_thres` (or the available memory minus
+                `free_mem_ratio`, if less). The trial gets an infinite loss, as does
+                a trial whose worker crashes. So a runaway config never takes down
+                the search. If dict, it can contain "memory_limit" (bytes) and
+                "start_method" (the multiprocessing start method, "fork" by default
+                where available; use "spawn" if CUDA has been initialized).
             metric_constraints: list, default=[] | The list of metric constraints.
                 Each element in this list is a 3-tuple, which shall be expressed
                 in the following format: the first element of the 3-tuple is the name of the
@@ -792,6 +863,8 @@ class AutoML(BaseEstimator):
         if settings["use_ray"] is not False and settings["use_spark"] is not False:
             raise ValueError("use_ray and use_spark cannot be both True.")
         settings["free_mem_ratio"] = settings.get("free_mem_ratio", 0)
+        settings["prune_trials"] = settings.get("prune_trials", False)
+        settings["isolate_trials"] = settings.get("isolate_trials", False)
         settings["metric_constraints"] = settings.get("metric_constraints", [])
         settings["cv_score_agg_func"] = settings.get("cv_score_agg_func", None)
         settings["fit_kwargs_by_estimator"] = settings.get(
@@ -995,18 +1068,7 @@ class AutoML(BaseEstimator):
             return None
         X = self._preprocess(X)
         y_pred = estimator.predict(X, **pred_kwargs)
-        if (
-            isinstance(y_pred, np.ndarray)
-            and y_pred.ndim > 1
-            and isinstance(y_pred, np.ndarray)
-        ):
-            y_pred = y_pred.flatten()
-        if self._label_transformer:
-            return self._label_transformer.inverse_transform(
-                pd.Series(y_pred.astype(int))
-            )
-        else:
-            return y_pred
+        return postprocess_prediction(y_pred, self._label_transformer)
 
     def predict_proba(self, X, **pred_kwargs):
         """Predict the probability of each class from features, only works for
@@ -1031,34 +1093,70 @@ class AutoML(BaseEstimator):
         proba = self._trained_estimator.predict_proba(X, **pred_kwargs)
         return proba
 
+    def predict_batches(
+        self,
+        source,
+        output: Optional[str] = None,
+        chunk_rows: int = 100000,
+        n_workers: int = 1,
+        method: str = "predict",
+        **pred_kwargs,
+    ):
+        """Score a large dataset chunk by chunk, with bounded memory.
+
+        The chunks are read, transformed and predicted in a pool of n_workers threads,
+        with at most 2 * n_workers chunks in flight. The chunks read from a file are
+        transformed in place without a copy, and only the columns of the training
+        data are read.
+
+        ```python
+        automl.predict_batches("test.parquet", "pred.parquet", n_workers=4)
+        for proba in automl.predict_batches("test.csv", method="predict_proba"):
+            ...
+        ```
+
+        Args:
+            source: A string of the path to a Parquet (.parquet, .pq) or CSV file,
+                a dataframe, a numpy array or a sparse matrix, or an iterable of
+                the chunks of the test data.
+            output: None or a string of the path to a Parquet or CSV file to
+                write the predictions to incrementally. The predictions of
+                predict are in the "prediction" column, and the probabilities of
+                predict_proba are in the columns named by the class labels.
+            chunk_rows: An integer of the number of rows per chunk read from a
+                file or sliced from the data in memory.
+            n_workers: An integer of the number of threads to score the chunks in
+                parallel. The estimators which release the GIL in prediction
+                (e.g., lgbm, xgboost and catboost) benefit the most.
+            method: A string of "predict" or "predict_proba".
+            **pred_kwargs: Other key word arguments to pass to the predict() or
+                predict_proba() function of the searched learners.
+
+        Returns:
+            If output is None, a generator of the predictions of the chunks in
+            order. Otherwise, an integer of the number of rows written.
+        """
+        estimator = getattr(self, "_trained_estimator", None)
+        if estimator is None:
+            logger.warning(
+                "No estimator is trained. Please run fit with enough budget."
+            )
+            return None
+        from flaml.automl.export import ServingModel
+
+        model = ServingModel(
+            estimator,
+            self._transformer,
+            self._label_transformer,
+            self._state.task,
+            getattr(self, "_feature_names_in_", None),
+        )
+        return model.predict_batches(
+            source, output, chunk_rows, n_workers, method, **pred_kwargs
+        )
+
     def _preprocess(self, X):
-        if isinstance(X, List):
-            try:
-                if isinstance(X[0], List):
-                    X = [x for x in zip(*X)]
-                X = pd.DataFrame(
-                    dict(
-                        [
-                            (self._transformer._str_columns[idx], X[idx])
-                            if isinstance(X[0], List)
-                            else (self._transformer._str_columns[idx], [X[idx]])
-                            for idx in range(len(X))
-                        ]
-                    )
-                )
-            except IndexError:
-                raise IndexError(
-                    "Test data contains more columns than training data, exiting"
-                )
-        elif isinstance(X, int):
-            return X
-        elif issparse(X):
-            X = X.tocsr()
-        if self._state.task in TS_FORECAST:
-            X = pd.DataFrame(X)
-        if self._transformer:
-            X = self._transformer.transform(X)
-        return X
+        return preprocess_test_data(X, self._transformer, self._state.task)
 
     def _validate_ts_data(
         self,
@@ -1757,6 +1855,15 @@ class AutoML(BaseEstimator):
                         only used by TemporalFusionTransformerEstimator.
                     batch_size: int, default = 64 | Batch size for training model, only
                         used by TemporalFusionTransformerEstimator.
+                    num_workers: int, default = 0 | Number of worker processes of the
+                        dataloaders, only used by TemporalFusionTransformerEstimator.
+                        The workers persist across the epochs when it is positive.
+                    warm_start: bool, default = False | Whether to warm start the fitting,
+                        only used by ARIMA and SARIMAX. If True, the consecutive folds of
+                        the time series cross validation extend the model fitted on the
+                        previous fold with the new observations instead of refitting, and
+                        the fitting of a config starts from the fitted params of the nearest
+                        config previously fitted on the same series.
         """
         task = task or self._settings.get("task")
         eval_method = eval_method or self._settings.get("eval_method")
@@ -2101,6 +2208,27 @@ class AutoML(BaseEstimator):
         with open(output_file_name, "wb") as f:
             pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
 
+    def export(self, path: str):
+        """Export what the inference needs to a directory, for `flaml.load_model`.
+
+        Unlike `pickle`, it leaves out the search states and the training data. The
+        final model of lightgbm, xgboost and catboost is saved in the native format
+        of the library, and the rest is saved by joblib uncompressed so that the
+        numpy arrays can be memory-mapped when loaded.
+
+        ```python
+        automl.export("model_dir")
+        model = flaml.load_model("model_dir")
+        y_pred = model.predict(X_test)
+        ```
+
+        Args:
+            path: A string of the directory to export to.
+        """
+        from flaml.automl.export import export_model
+
+        export_model(self, path)
+
     @property
     def trainable(self) -> Callable[[dict], Optional[float]]:
         """Training function.
@@ -2213,6 +2341,8 @@ class AutoML(BaseEstimator):
         use_ray=None,
         use_spark=None,
         free_mem_ratio=0,
+        prune_trials=None,
+        isolate_trials=None,
         metric_constraints=None,
         custom_hp=None,
         cv_score_agg_func=None,
@@ -2413,6 +2543,23 @@ class AutoML(BaseEstimator):
                 and large datasets, but will incur more overhead in time and thus slow down
                 training in some cases.
             free_mem_ratio: float between 0 and 1, default=0. The free memory ratio to keep during training.
+            prune_trials: boolean or dict, default=False | Whether to stop unpromising
+                trials early based on their learning curves. The validation metric
+                of lgbm, xgboost, xgb_limitdepth and transformer trials is recorded
+                every few boosting rounds or every evaluation, and a trial is stopped
+                when its curve is worse than the median of the finished trials'
+                curves at the same iteration. If dict, it contains the keyword
+                arguments of [LearningCurvePruner](../automl/model#learningcurvepruner-objects),
+                e.g., `{"interval": 10, "percentile": 50, "min_trials": 3}`.
+            isolate_trials: boolean or dict, default=False | Whether to run each trial
+                in a separate worker process. The worker is killed when it runs
+                longer than 1.5 times the trial's time budget plus one second, or
+                allocates more than `mem_thres` (or the available memory minus
+                `free_mem_ratio`, if less). The trial gets an infinite loss, as does
+                a trial whose worker crashes. So a runaway config never takes down
+                the search. If dict, it can contain "memory_limit" (bytes) and
+                "start_method" (the multiprocessing start method, "fork" by default
+                where available; use "spawn" if CUDA has been initialized).
             metric_constraints: list, default=[] | The list of metric constraints.
                 Each element in this list is a 3-tuple, which shall be expressed
                 in the following format: the first element of the 3-tuple is the name of the
@@ -2527,6 +2674,15 @@ class AutoML(BaseEstimator):
                         only used by TemporalFusionTransformerEstimator.
                     batch_size: int, default = 64 | Batch size for training model, only
                         used by TemporalFusionTransformerEstimator.
+                    num_workers: int, default = 0 | Number of worker processes of the
+                        dataloaders, only used by TemporalFusionTransformerEstimator.
+                        The workers persist across the epochs when it is positive.
+                    warm_start: bool, default = False | Whether to warm start the fitting,
+                        only used by ARIMA and SARIMAX. If True, the consecutive folds of
+                        the time series cross validation extend the model fitted on the
+                        previous fold with the new observations instead of refitting, and
+                        the fitting of a config starts from the fitted params of the nearest
+                        config previously fitted on the same series.
         """
 
         self._state._start_time_flag = self._start_time_flag = time.time()
@@ -2623,7 +2779,7 @@ class AutoML(BaseEstimator):
             logger.addHandler(_ch)
 
         if not use_ray and not use_spark and n_concurrent_trials > 1:
-            if ray_available:
+            if _ray_available():
                 logger.warning(
                     "n_concurrent_trials > 1 is only supported when using Ray or Spark. "
                     "Ray installed, setting use_ray to True. If you want to use Spark, set use_spark to True."
@@ -2689,6 +2845,21 @@ class AutoML(BaseEstimator):
             if free_mem_ratio is None
             else free_mem_ratio
         )
+        prune_trials = (
+            self._settings.get("prune_trials") if prune_trials is None else prune_trials
+        )
+        self._state.pruner = (
+            LearningCurvePruner(**prune_trials)
+            if isinstance(prune_trials, dict)
+            else LearningCurvePruner()
+            if prune_trials
+            else None
+        )
+        self._state.isolate_trials = (
+            self._settings.get("isolate_trials")
+            if isolate_trials is None
+            else isolate_trials
+        )
         self._state.task = task
         self._state.log_training_metric = log_training_metric
 
@@ -2997,7 +3168,7 @@ class AutoML(BaseEstimator):
         self._active_estimators = estimator_list.copy()
         self._ensemble = ensemble
         self._max_iter = max_iter
-        self._mem_thres = mem_thres
+        self._mem_thres = self._state.mem_thres = mem_thres
         self._pred_time_limit = pred_time_limit
         self._state.train_time_limit = train_time_limit
         self._log_type = log_type
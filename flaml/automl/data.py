@@ -10,7 +10,7 @@ from pandas import DataFrame, Series
 from flaml.automl.training_log import training_log_reader
 
 from datetime import datetime
-from typing import Union
+from typing import List, Union
 
 # TODO: if your task is not specified in here, define your task as an all-capitalized word
 SEQCLASSIFICATION = "seq-classification"
@@ -415,16 +415,19 @@ class DataTransformer:
         self._task = task
         return X, y
 
-    def transform(self, X: Union[DataFrame, np.array]):
+    def transform(self, X: Union[DataFrame, np.array], copy: bool = True):
         """Process data using fit transformer.
 
         Args:
             X: A numpy array or a pandas dataframe of training data.
+            copy: A bool of whether to copy X before processing. False lets X be
+                modified in place, e.g., for a chunk of data read from a file.
 
         Returns:
             X: Processed numpy array or pandas dataframe of training data.
         """
-        X = X.copy()
+        if copy:
+            X = X.copy()
 
         if _is_nlp_task(self._task):
             # if the mode is NLP, check the type of input, each column must be either string or
@@ -480,6 +483,67 @@ class DataTransformer:
         return X
 
 
+def preprocess_test_data(X, transformer, task, copy=True):
+    """Convert the test data into the input of the trained estimator.
+
+    Args:
+        X: A numpy array, a sparse matrix, a pandas dataframe, a list of strings or
+            a list of lists of strings (for NLP tasks) of the test data, or an integer
+            of the predict steps (for arima and sarimax).
+        transformer: None or the DataTransformer fitted on the training data.
+        task: A string of the task type.
+        copy: A bool of whether the transformer copies X. False lets X be modified
+            in place.
+
+    Returns:
+        The transformed test data.
+    """
+    if isinstance(X, List):
+        try:
+            if isinstance(X[0], List):
+                X = [x for x in zip(*X)]
+            X = pd.DataFrame(
+                dict(
+                    [
+                        (transformer._str_columns[idx], X[idx])
+                        if isinstance(X[0], List)
+                        else (transformer._str_columns[idx], [X[idx]])
+                        for idx in range(len(X))
+                    ]
+                )
+            )
+        except IndexError:
+            raise IndexError(
+                "Test data contains more columns than training data, exiting"
+            )
+    elif isinstance(X, int):
+        return X
+    elif issparse(X):
+        X = X.tocsr()
+    if task in TS_FORECAST:
+        X = pd.DataFrame(X)
+    if transformer:
+        X = transformer.transform(X, copy=copy)
+    return X
+
+
+def postprocess_prediction(y_pred, label_transformer):
+    """Convert the prediction of the trained estimator into the original labels.
+
+    Args:
+        y_pred: The prediction of the trained estimator.
+        label_transformer: None or the label encoder fitted on the training labels.
+
+    Returns:
+        The prediction in the original labels.
+    """
+    if isinstance(y_pred, np.ndarray) and y_pred.ndim > 1:
+        y_pred = y_pred.flatten()
+    if label_transformer:
+        return label_transformer.inverse_transform(pd.Series(y_pred.astype(int)))
+    return y_pred
+
+
 def group_counts(groups):
     _, i, c = np.unique(groups, return_counts=True, return_index=True)
     return c[np.argsort(i)]
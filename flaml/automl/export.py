@@ -0,0 +1,371 @@
+# !
+#  * Copyright (c) FLAML authors. All rights reserved.
+#  * Licensed under the MIT License. See LICENSE file in the
+#  * project root for license information.
+"""A lean artifact of a trained AutoML for serving, and the chunked batch scoring.
+
+The artifact directory contains:
+    meta.json: the artifact version, the flaml version, the task, the estimator name
+        and the native model file.
+    model.joblib: the data transformer, the label transformer and the estimator with
+        its native model detached, dumped by joblib uncompressed.
+    model.txt / model.ubj / model.cbm: the native model of lightgbm / xgboost /
+        catboost, if applicable.
+"""
+import copy
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from flaml.automl.data import (
+    TS_FORECAST,
+    preprocess_test_data,
+    postprocess_prediction,
+)
+from flaml.version import __version__ as flaml_version
+
+ARTIFACT_VERSION = 1
+META_FILE = "meta.json"
+PAYLOAD_FILE = "model.joblib"
+
+
+class ServingModel:
+    """The trained model loaded by `flaml.load_model`.
+
+    It transforms the input as the AutoML does and predicts with the final estimator.
+    """
+
+    def __init__(
+        self, estimator, transformer, label_transformer, task, feature_names_in=None
+    ):
+        """Constructor.
+
+        Args:
+            estimator: The trained flaml estimator.
+            transformer: None or the DataTransformer fitted on the training data.
+            label_transformer: None or the label encoder fitted on the training labels.
+            task: A string of the task type.
+            feature_names_in: None or a list of the feature names of the training data.
+        """
+        self._estimator = estimator
+        self._transformer = transformer
+        self._label_transformer = label_transformer
+        self._task = task
+        self._feature_names_in = feature_names_in
+
+    @property
+    def task(self):
+        return self._task
+
+    @property
+    def model(self):
+        """The trained flaml estimator."""
+        return self._estimator
+
+    @property
+    def classes_(self):
+        """A numpy array of shape (n_classes,) for class labels."""
+        if self._label_transformer:
+            return self._label_transformer.classes_
+        return self._estimator.classes_
+
+    @property
+    def feature_names_in_(self):
+        attr = getattr(self._estimator, "feature_names_in_", None)
+        return self._feature_names_in if attr is None else attr
+
+    def predict(self, X, **pred_kwargs):
+        """Predict label from features, as `AutoML.predict`."""
+        X = preprocess_test_data(X, self._transformer, self._task)
+        y_pred = self._estimator.predict(X, **pred_kwargs)
+        return postprocess_prediction(y_pred, self._label_transformer)
+
+    def predict_proba(self, X, **pred_kwargs):
+        """Predict the probability of each class from features, as `AutoML.predict_proba`."""
+        X = preprocess_test_data(X, self._transformer, self._task)
+        return self._estimator.predict_proba(X, **pred_kwargs)
+
+    def _predict_chunk(self, chunk, method, pred_kwargs):
+        X, owned = chunk
+        X = preprocess_test_data(X, self._transformer, self._task, copy=not owned)
+        if method == "predict_proba":
+            return self._estimator.predict_proba(X, **pred_kwargs)
+        y_pred = self._estimator.predict(X, **pred_kwargs)
+        return postprocess_prediction(y_pred, self._label_transformer)
+
+    def predict_batches(
+        self,
+        source,
+        output=None,
+        chunk_rows=100000,
+        n_workers=1,
+        method="predict",
+        **pred_kwargs,
+    ):
+        """Score a large dataset chunk by chunk, as `AutoML.predict_batches`."""
+        if method not in ("predict", "predict_proba"):
+            raise ValueError(
+                f"method must be 'predict' or 'predict_proba', got {method!r}."
+            )
+        # the timestamp column of the time series tasks is renamed in training
+        feature_names = None if self._task in TS_FORECAST else self._feature_names_in
+        chunks = _iter_chunks(source, chunk_rows, feature_names)
+        results = _ordered_map(
+            lambda chunk: self._predict_chunk(chunk, method, pred_kwargs),
+            chunks,
+            n_workers,
+        )
+        if output is None:
+            return results
+        columns = [str(c) for c in self.classes_] if method == "predict_proba" else None
+        return _write_predictions(results, output, columns)
+
+
+def _iter_chunks(source, chunk_rows, feature_names=None):
+    """Yield the chunks of the source, each with whether it is owned by the caller.
+
+    The chunks read from a file are owned, so that they are transformed in place.
+    When the feature names are known, only the columns among them are read.
+    """
+    if isinstance(source, str):
+        name = os.path.basename(source).lower()
+        keep = set(feature_names) if feature_names is not None else None
+        if name.endswith((".parquet", ".pq")):
+            import pyarrow.parquet as pq
+
+            file = pq.ParquetFile(source)
+            columns = keep and [c for c in file.schema_arrow.names if c in keep]
+            for batch in file.iter_batches(
+                batch_size=chunk_rows, columns=columns or None
+            ):
+                yield batch.to_pandas(), True
+        elif ".csv" in name:
+            usecols = (lambda c: c in keep) if keep else None
+            for X in pd.read_csv(source, chunksize=chunk_rows, usecols=usecols):
+                yield X, True
+        else:
+            raise ValueError(f"{source} is not a Parquet or CSV file.")
+    elif hasattr(source, "shape"):
+        # a dataframe, a numpy array or a sparse matrix in memory
+        for i in range(0, source.shape[0], chunk_rows):
+            yield (
+                source.iloc[i : i + chunk_rows]
+                if isinstance(source, pd.DataFrame)
+                else source[i : i + chunk_rows]
+            ), False
+    else:
+        for X in source:
+            yield X, False
+
+
+def _ordered_map(func, items, n_workers):
+    """Map func over items in n_workers threads, yielding the results in order.
+
+    At most 2 * n_workers items are in flight, which bounds the memory.
+    """
+    if n_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= 2 * n_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _prediction_frame(y_pred, columns=None):
+    if isinstance(y_pred, pd.DataFrame):
+        return y_pred
+    y_pred = np.asarray(y_pred)
+    if y_pred.ndim == 1:
+        return pd.DataFrame({"prediction": y_pred})
+    return pd.DataFrame(y_pred, columns=columns)
+
+
+def _write_predictions(results, output, columns=None):
+    """Append the predictions of each chunk to a Parquet or CSV file.
+
+    Returns:
+        An integer of the number of rows written.
+    """
+    name = os.path.basename(output).lower()
+    parquet = name.endswith((".parquet", ".pq"))
+    if not parquet and ".csv" not in name:
+        raise ValueError(f"{output} is not a Parquet or CSV file.")
+    n_rows, writer = 0, None
+    try:
+        for y_pred in results:
+            df = _prediction_frame(y_pred, columns)
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)
+            else:
+                df.to_csv(
+                    output, mode="a" if n_rows else "w", header=not n_rows, index=False
+                )
+            n_rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+def _library(model):
+    return type(model).__module__.split(".", 1)[0]
+
+
+def _detach_native_model(estimator):
+    """Split the estimator into a copy without the native model, and the native model.
+
+    Returns:
+        A tuple of (the estimator copy, the native model format, a function to save
+        the native model to a file). The last two are None if the model is not
+        supported.
+    """
+    model = estimator.model
+    estimator = copy.copy(estimator)
+    library = _library(model)
+    if library == "lightgbm" and getattr(model, "_Booster", None) is not None:
+        detached = copy.copy(model)
+        detached._Booster = None
+        fmt, save = "lightgbm", model._Booster.save_model
+    elif library == "xgboost":
+        if hasattr(model, "get_booster"):
+            detached = copy.copy(model)
+            detached._Booster = None
+            booster = model.get_booster()
+        else:  # a Booster trained by XGBoostEstimator
+            detached, booster = None, model
+        fmt, save = "xgboost", booster.save_model
+    elif library == "catboost":
+        # the class, to construct the model to load into
+        detached = type(model)
+        fmt, save = "catboost", model.save_model
+    else:
+        return estimator, None, None
+    estimator._model = detached
+    return estimator, fmt, save
+
+
+def _attach_native_model(estimator, fmt, filename):
+    detached = estimator._model
+    if fmt == "lightgbm":
+        import lightgbm
+
+        detached._Booster = lightgbm.Booster(model_file=filename)
+    elif fmt == "xgboost":
+        import xgboost
+
+        booster = xgboost.Booster(model_file=filename)
+        if detached is None:
+            estimator._model = booster
+        else:
+            detached._Booster = booster
+    elif fmt == "catboost":
+        estimator._model = detached().load_model(filename)
+
+
+_NATIVE_FILES = {
+    "lightgbm": "model.txt",
+    "xgboost": "model.ubj",
+    "catboost": "model.cbm",
+}
+
+
+def export_model(automl, path):
+    """Export a trained AutoML to a directory. See `AutoML.export`.
+
+    Args:
+        automl: The trained AutoML.
+        path: A string of the directory to export to.
+    """
+    import joblib
+
+    estimator = getattr(automl, "_trained_estimator", None)
+    if estimator is None:
+        raise ValueError("No estimator is trained. Please run fit with enough budget.")
+    os.makedirs(path, exist_ok=True)
+    estimator, fmt, save = _detach_native_model(estimator)
+    # the learning curve and the validation data recorded for pruning,
+    # and the last fit kept to warm start the next fold
+    estimator.__dict__.pop("_curve", None)
+    estimator.__dict__.pop("_curve_data", None)
+    estimator.__dict__.pop("_last_fit", None)
+    native_file = None
+    if fmt is not None:
+        native_file = _NATIVE_FILES[fmt]
+        save(os.path.join(path, native_file))
+    joblib.dump(
+        {
+            "estimator": estimator,
+            "transformer": getattr(automl, "_transformer", None),
+            "label_transformer": getattr(automl, "_label_transformer", None),
+            "feature_names_in": getattr(automl, "_feature_names_in_", None),
+        },
+        os.path.join(path, PAYLOAD_FILE),
+    )
+    meta = {
+        "artifact_version": ARTIFACT_VERSION,
+        "flaml_version": flaml_version,
+        "task": automl._state.task,
+        "estimator": automl.best_estimator,
+        "native_model": native_file and {"format": fmt, "file": native_file},
+    }
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_model(path, mmap_mode="r"):
+    """Load a model exported by `AutoML.export`.
+
+    ```python
+    import flaml
+
+    model = flaml.load_model("model_dir")
+    y_pred = model.predict(X_test)
+    ```
+
+    Args:
+        path: A string of the exported directory.
+        mmap_mode: None or a string of the mode to memory-map the numpy arrays,
+            as in `joblib.load`. None means to read the arrays into memory.
+
+    Returns:
+        A ServingModel.
+    """
+    import joblib
+
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta["artifact_version"] > ARTIFACT_VERSION:
+        raise ValueError(
+            f"The artifact version {meta['artifact_version']} is not supported by "
+            f"flaml {flaml_version}. Please upgrade flaml."
+        )
+    payload = joblib.load(os.path.join(path, PAYLOAD_FILE), mmap_mode=mmap_mode)
+    estimator = payload["estimator"]
+    native = meta["native_model"]
+    if native:
+        _attach_native_model(
+            estimator, native["format"], os.path.join(path, native["file"])
+        )
+    return ServingModel(
+        estimator,
+        payload["transformer"],
+        payload["label_transformer"],
+        meta["task"],
+        payload["feature_names_in"],
+    )
@@ -0,0 +1,324 @@
+# !
+#  * Copyright (c) FLAML authors. All rights reserved.
+#  * Licensed under the MIT License. See LICENSE file in the
+#  * project root for license information.
+"""Vectorized metric kernels for the validated inputs of the model evaluation.
+
+They skip the input validation of sklearn.metrics and return the same losses as
+`flaml.automl.ml.sklearn_metric_loss_score` up to floating point error. A kernel
+returns None when the inputs are outside of the cases it covers, so that the caller
+falls back to sklearn.
+"""
+import numpy as np
+import pandas as pd
+
+from flaml.automl.data import group_counts
+
+KERNEL_METRICS = {
+    "accuracy",
+    "roc_auc",
+    "roc_auc_weighted",
+    "roc_auc_ovr",
+    "roc_auc_ovr_weighted",
+    "log_loss",
+    "f1",
+    "micro_f1",
+    "macro_f1",
+    "ndcg",
+}
+
+
+def _to_numpy(x):
+    return x.to_numpy() if isinstance(x, (pd.Series, pd.DataFrame)) else np.asarray(x)
+
+
+def binary_auc(y_true, y_score, sample_weight=None):
+    """ROC AUC of a binary target from a single sort of the scores.
+
+    The tied scores count half, which equals the trapezoidal area under the ROC curve.
+
+    Args:
+        y_true: A 1d numpy array of bool, whether each example is positive.
+        y_score: A 1d numpy array of the scores of the positive class.
+        sample_weight: None or a 1d numpy array of the sample weight.
+
+    Returns:
+        A float of the AUC.
+    """
+    order = np.argsort(y_score, kind="mergesort")
+    score = y_score[order]
+    weight = (
+        np.ones(len(order)) if sample_weight is None else sample_weight[order]
+    ).astype(float)
+    pos_weight = np.where(y_true[order], weight, 0.0)
+    # the last index of each run of tied scores
+    ends = np.flatnonzero(np.append(score[1:] != score[:-1], True))
+    cum_pos = np.cumsum(pos_weight)[ends]
+    cum_neg = np.cumsum(weight - pos_weight)[ends]
+    total_pos, total_neg = cum_pos[-1], cum_neg[-1]
+    if total_pos == 0 or total_neg == 0:
+        raise ValueError(
+            "Only one class present in y_true. ROC AUC score is not defined in that case."
+        )
+    block_pos = np.diff(cum_pos, prepend=0)
+    block_neg = np.diff(cum_neg, prepend=0)
+    return (block_pos * (cum_neg - 0.5 * block_neg)).sum() / (total_pos * total_neg)
+
+
+def ovr_auc(y_true, y_proba, classes, sample_weight=None, average="macro"):
+    """One-vs-rest ROC AUC of a multiclass target, sorting each class column once."""
+    aucs = np.array(
+        [
+            binary_auc(y_true == c, y_proba[:, i], sample_weight)
+            for i, c in enumerate(classes)
+        ]
+    )
+    if average == "weighted":
+        support = _class_weight_sum(y_true, classes, sample_weight)
+        return np.average(aucs, weights=support)
+    return aucs.mean()
+
+
+def _class_weight_sum(y_true, classes, sample_weight=None):
+    codes = np.searchsorted(classes, y_true)
+    return np.bincount(codes, weights=sample_weight, minlength=len(classes))
+
+
+def _classes(y_true, labels=None):
+    classes = np.unique(y_true if labels is None else labels)
+    codes = np.searchsorted(classes, y_true)
+    if (codes >= len(classes)).any() or (classes[codes] != y_true).any():
+        return None, None
+    return classes, codes
+
+
+def log_loss(y_true, y_proba, labels=None, sample_weight=None):
+    """Log loss, reading only the probability of the true class of each example."""
+    classes, codes = _classes(y_true, labels)
+    if classes is None or len(classes) < 2:
+        return None
+    if y_proba.ndim == 1:
+        y_proba = np.column_stack((1 - y_proba, y_proba))
+    if y_proba.shape[1] != len(classes):
+        return None
+    eps = np.finfo(y_proba.dtype).eps if y_proba.dtype.kind == "f" else 1e-15
+    y_proba = np.clip(y_proba, eps, 1 - eps)
+    p_true = y_proba[np.arange(len(codes)), codes] / y_proba.sum(axis=1)
+    return -np.average(np.log(p_true), weights=sample_weight)
+
+
+def _confusion_counts(y_true, y_pred, sample_weight=None):
+    """The weighted true, predicted and correct counts of each label."""
+    labels, codes = np.unique(np.concatenate((y_true, y_pred)), return_inverse=True)
+    n = len(y_true)
+    true_codes, pred_codes = codes[:n], codes[n:]
+    k = len(labels)
+    true_count = np.bincount(true_codes, weights=sample_weight, minlength=k)
+    pred_count = np.bincount(pred_codes, weights=sample_weight, minlength=k)
+    correct = true_codes == pred_codes
+    tp = np.bincount(
+        true_codes[correct],
+        weights=None if sample_weight is None else sample_weight[correct],
+        minlength=k,
+    )
+    return labels, true_count, pred_count, tp
+
+
+def _f1(tp, true_count, pred_count):
+    denominator = true_count + pred_count
+    return np.divide(
+        2 * tp, denominator, out=np.zeros(len(denominator)), where=denominator > 0
+    )
+
+
+def ndcg_loss(y_true, y_score, counts=None, k=None):
+    """1 - the mean NDCG@k over the groups of consecutive examples, in one pass.
+
+    The gains of tied scores are averaged as in sklearn.metrics.ndcg_score.
+
+    Args:
+        y_true: A 1d numpy array of the non-negative relevance.
+        y_score: A 1d numpy array of the predicted scores.
+        counts: None or a 1d numpy array of the sizes of the consecutive groups.
+            None means a single group.
+        k: None or an int of the number of top ranked examples of each group.
+
+    Returns:
+        A float of the loss.
+    """
+    n = len(y_true)
+    counts = np.array([n]) if counts is None else np.asarray(counts)
+    if (counts < 2).any():
+        raise ValueError(
+            "Computing NDCG is only meaningful when there is more than 1 document. "
+            "Got 1 instead."
+        )
+    if (y_true < 0).any():
+        raise ValueError("ndcg_score should not be used on negative y_true values.")
+    y_true = y_true.astype(float)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    group = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(n) - offsets
+    discount = 1 / np.log2(position + 2)
+    if k is not None:
+        discount[position >= k] = 0
+    # ideal dcg with the examples sorted by relevance in each group
+    ideal_order = np.lexsort((-y_true, group))
+    ideal = np.bincount(group, weights=y_true[ideal_order] * discount)
+    # dcg with the gains averaged over the runs of tied scores in each group
+    order = np.lexsort((-y_score, group))
+    score = y_score[order]
+    new_run = np.ones(n, dtype=bool)
+    new_run[1:] = (score[1:] != score[:-1]) | (group[order][1:] != group[order][:-1])
+    run = np.cumsum(new_run) - 1
+    run_size = np.bincount(run)
+    run_gain = np.bincount(run, weights=y_true[order]) / run_size
+    run_discount = np.bincount(run, weights=discount)
+    dcg = np.bincount(group[order][new_run], weights=run_gain * run_discount)
+    ndcg = np.divide(dcg, ideal, out=np.zeros_like(dcg), where=ideal > 0)
+    return 1 - ndcg.mean()
+
+
+def kernel_loss_score(
+    metric_name, y_predict, y_true, labels=None, sample_weight=None, groups=None
+):
+    """The loss of a metric in KERNEL_METRICS, or None if the inputs are not covered.
+
+    The inputs with NaN or infinite predictions are not covered, so that sklearn
+    validates them.
+
+    Args:
+        metric_name: A string of the metric name.
+        y_predict: A 1d or 2d numpy array of the predictions, as for
+            `flaml.automl.ml.sklearn_metric_loss_score`.
+        y_true: A 1d numpy array of the true labels.
+        labels: A list or an array of the unique labels.
+        sample_weight: A 1d numpy array of the sample weight.
+        groups: A 1d numpy array of the group labels.
+
+    Returns:
+        A float of the loss, or None.
+    """
+    name = metric_name.lower()
+    if name.split("@", 1)[0] not in KERNEL_METRICS:
+        return None
+    y_true, y_predict = _to_numpy(y_true), _to_numpy(y_predict)
+    if sample_weight is not None:
+        sample_weight = _to_numpy(sample_weight).astype(float)
+    if y_true.ndim != 1 or len(y_true) != len(y_predict):
+        return None
+    if y_predict.dtype.kind == "f" and not np.isfinite(y_predict).all():
+        # sklearn raises an error for NaN or inf, e.g., from a diverged model
+        return None
+    if name.startswith("ndcg"):
+        if "@" in name:
+            return ndcg_loss(
+                y_true, y_predict, group_counts(groups), int(name.split("@", 1)[-1])
+            )
+        return ndcg_loss(y_true, y_predict)
+    if name == "log_loss":
+        return log_loss(y_true, y_predict, labels, sample_weight)
+    if name.startswith("roc_auc"):
+        classes, _ = _classes(y_true)
+        if classes is None:
+            return None
+        if name in ("roc_auc", "roc_auc_weighted"):
+            if y_predict.ndim != 1 or len(classes) > 2:
+                return None
+            return 1.0 - binary_auc(y_true == classes[-1], y_predict, sample_weight)
+        if (
+            y_predict.ndim != 2
+            or y_predict.shape[1] != len(classes)
+            or len(classes) < 3
+        ):
+            return None
+        average = "weighted" if name.endswith("weighted") else "macro"
+        return 1.0 - ovr_auc(y_true, y_predict, classes, sample_weight, average)
+    if y_predict.ndim != 1:
+        return None
+    if name in ("accuracy", "micro_f1"):
+        # micro f1 equals the accuracy for single-label targets
+        return 1.0 - np.average(y_true == y_predict, weights=sample_weight)
+    found, true_count, pred_count, tp = _confusion_counts(
+        y_true, y_predict, sample_weight
+    )
+    if name == "macro_f1":
+        return 1.0 - _f1(tp, true_count, pred_count).mean()
+    # binary f1 of the positive label 1
+    if len(found) > 2 or not set(found.tolist()) <= {0, 1} or 1 not in found:
+        return None
+    return 1.0 - _f1(tp, true_count, pred_count)[-1]
+
+
+def loss_scores(
+    metric_names, y_true, y_proba, labels=None, sample_weight=None, groups=None
+):
+    """The losses of several metrics from a single predict_proba output.
+
+    The predicted labels are derived once, and the per-class AUCs are shared by the
+    one-vs-rest AUC metrics. It suits a customized metric function logging several
+    metrics, e.g.,
+
+    ```python
+    def custom_metric(X_val, y_val, estimator, labels, X_train, y_train, *args):
+        losses = loss_scores(
+            ["log_loss", "roc_auc_ovr", "macro_f1"], y_val, estimator.predict_proba(X_val)
+        )
+        return losses["log_loss"], losses
+    ```
+
+    Args:
+        metric_names: A list of the metric names in KERNEL_METRICS.
+        y_true: A 1d numpy array of the true labels.
+        y_proba: A 2d numpy array of the predicted probabilities, whose columns
+            follow the sorted unique labels.
+        labels: A list or an array of the unique labels.
+        sample_weight: A 1d numpy array of the sample weight.
+        groups: A 1d numpy array of the group labels.
+
+    Returns:
+        A dict of the metric names to the losses.
+    """
+    from .ml import sklearn_metric_loss_score
+
+    y_true, y_proba = _to_numpy(y_true), _to_numpy(y_proba)
+    classes = np.unique(y_true if labels is None else labels)
+    if y_proba.ndim == 1:
+        y_proba = np.column_stack((1 - y_proba, y_proba))
+    binary = len(classes) == 2
+    y_pred = classes[y_proba.argmax(axis=1)]
+    class_aucs = {}
+
+    def ovr(average):
+        if "aucs" not in class_aucs:
+            class_aucs["aucs"] = np.array(
+                [
+                    binary_auc(y_true == c, y_proba[:, i], sample_weight)
+                    for i, c in enumerate(classes)
+                ]
+            )
+        weights = (
+            _class_weight_sum(y_true, classes, sample_weight)
+            if average == "weighted"
+            else None
+        )
+        return 1.0 - np.average(class_aucs["aucs"], weights=weights)
+
+    losses = {}
+    for name in metric_names:
+        if name in ("roc_auc_ovr", "roc_auc_ovr_weighted") and not binary:
+            losses[name] = ovr("weighted" if name.endswith("weighted") else "macro")
+            continue
+        if name in ("log_loss",) or name.startswith("roc_auc"):
+            y_predict = y_proba[:, 1] if binary and name != "log_loss" else y_proba
+        else:
+            y_predict = y_pred
+        loss = kernel_loss_score(name, y_predict, y_true, labels, sample_weight, groups)
+        losses[name] = (
+            sklearn_metric_loss_score(
+                name, y_predict, y_true, labels, sample_weight, groups
+            )
+            if loss is None
+            else loss
+        )
+    return losses
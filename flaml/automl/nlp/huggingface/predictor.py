@@ -0,0 +1,258 @@
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from flaml.automl.data import NLG_TASKS
+from .trainer import TokenBudgetBatchSampler, _restore_order
+from .utils import tokenize_batch, postprocess_prediction_and_true
+
+
+def _pad_and_concat(arrays, padding_index=-100):
+    """Concatenate the outputs of the batches along the first axis, padding the second axis."""
+    if arrays[0].ndim == 1 or all(x.shape[1] == arrays[0].shape[1] for x in arrays):
+        return np.concatenate(arrays)
+    width = max(x.shape[1] for x in arrays)
+    result = np.full(
+        (sum(len(x) for x in arrays), width) + arrays[0].shape[2:],
+        padding_index,
+        dtype=arrays[0].dtype,
+    )
+    start = 0
+    for x in arrays:
+        result[start : start + len(x), : x.shape[1]] = x
+        start += len(x)
+    return result
+
+
+class InferencePipeline:
+    """A persistent inference pipeline of a fine-tuned transformers model.
+
+    It holds the loaded model, tokenizer and data collator across the calls, tokenizes
+    the input in batches, runs the length-grouped micro-batches under
+    `torch.inference_mode`, and restores the order of the predictions.
+
+    Example:
+
+    ```python
+    pipeline = automl.model.inference_pipeline
+    y_pred = pipeline.predict(X_test)
+    for y_pred_chunk in pipeline.stream(X_large, chunk_size=10000):
+        ...
+    future = pipeline.submit(X_request)  # batched with the other requests in flight
+    y_pred_request = future.result()
+    ```
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        data_collator,
+        task,
+        hf_args,
+        device=None,
+        quantize=False,
+        max_wait=0.01,
+        max_batch_rows=256,
+    ):
+        """Constructor.
+
+        Args:
+            model: The fine-tuned model.
+            tokenizer: The tokenizer of the model.
+            data_collator: The data collator to pad the batches.
+            task: A string of the task type.
+            hf_args: The TrainingArgumentsForAuto. per_device_eval_batch_size or
+                max_tokens_per_batch (if set) controls the size of the micro-batches.
+            device: None or a string of the torch device. None means "cuda" if
+                available and not hf_args.no_cuda, otherwise "cpu".
+            quantize: A bool of whether to apply dynamic int8 quantization to the
+                linear layers of the model. Only effective on CPU.
+            max_wait: A float of the max seconds to wait for more requests to
+                batch together in `submit`.
+            max_batch_rows: An integer of the max number of rows to batch together
+                in `submit`.
+        """
+        import torch
+
+        if device is None:
+            device = (
+                "cuda"
+                if torch.cuda.is_available() and not getattr(hf_args, "no_cuda", False)
+                else "cpu"
+            )
+        self.device = torch.device(device)
+        model = model.to(self.device).eval()
+        if quantize and self.device.type == "cpu":
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model = model
+        self.tokenizer = tokenizer
+        self.data_collator = data_collator
+        self.task = task
+        self.hf_args = hf_args
+        self.max_wait = max_wait
+        self.max_batch_rows = max_batch_rows
+        self._queue = []
+        self._cond = threading.Condition()
+        self._worker = None
+        self._closed = False
+
+    def _tokenize(self, X):
+        tokenized = tokenize_batch(
+            {key: X[key].tolist() for key in X.keys()},
+            list(X.keys()),
+            task=self.task,
+            hf_args=self.hf_args,
+            tokenizer=self.tokenizer,
+        )
+        input_names = set(self.tokenizer.model_input_names)
+        return {key: value for key, value in tokenized.items() if key in input_names}
+
+    def _batches(self, lengths):
+        max_tokens = getattr(self.hf_args, "max_tokens_per_batch", None)
+        if not max_tokens:
+            batch_size = max(1, self.hf_args.per_device_eval_batch_size)
+            # group the examples of similar lengths into the fixed-size batches
+            order = np.argsort(-lengths, kind="stable")
+            return [
+                order[i : i + batch_size].tolist()
+                for i in range(0, len(order), batch_size)
+            ]
+        return list(TokenBudgetBatchSampler(lengths, max_tokens))
+
+    def _forward(self, batch):
+        if self.task in NLG_TASKS:
+            generated = self.model.generate(
+                **batch,
+                max_length=getattr(self.hf_args, "generation_max_length", None),
+                num_beams=getattr(self.hf_args, "generation_num_beams", None),
+            )
+            return generated.cpu().numpy()
+        return self.model(**batch).logits.float().cpu().numpy()
+
+    def predict_logits(self, X):
+        """Predict the logits (or the generated token ids for NLG tasks) of X.
+
+        Args:
+            X: A dataframe of the raw text data.
+
+        Returns:
+            A numpy array of the logits (or the generated token ids), in the order of X.
+        """
+        import torch
+
+        tokenized = self._tokenize(X)
+        features = [dict(zip(tokenized, values)) for values in zip(*tokenized.values())]
+        input_ids = tokenized["input_ids"]
+        lengths = np.array(
+            [
+                len(x) * max(len(c) for c in x)
+                if x and isinstance(x[0], list)
+                else len(x)
+                for x in input_ids
+            ]
+        )
+        batches = self._batches(lengths)
+        padding_index = self.tokenizer.pad_token_id if self.task in NLG_TASKS else -100
+        outputs = []
+        with torch.inference_mode():
+            for batch in batches:
+                inputs = self.data_collator([features[i] for i in batch])
+                inputs = {key: value.to(self.device) for key, value in inputs.items()}
+                outputs.append(self._forward(inputs))
+        return _restore_order(
+            _pad_and_concat(outputs, padding_index), np.concatenate(batches)
+        )
+
+    def predict(self, X):
+        """Predict the labels (or the generated text for NLG tasks) of X."""
+        y_pred, _ = postprocess_prediction_and_true(
+            task=self.task,
+            y_pred=self.predict_logits(X),
+            tokenizer=self.tokenizer,
+            hf_args=self.hf_args,
+            X=X,
+        )
+        return y_pred
+
+    def stream(self, X, chunk_size=1024):
+        """Predict a large input or an iterable of inputs chunk by chunk.
+
+        Args:
+            X: A dataframe, or an iterable of dataframes, of the raw text data.
+            chunk_size: An integer of the number of rows per chunk of a dataframe.
+
+        Yields:
+            The predictions of each chunk, in the order of the input.
+        """
+        chunks = (
+            (X.iloc[i : i + chunk_size] for i in range(0, len(X), chunk_size))
+            if isinstance(X, pd.DataFrame)
+            else X
+        )
+        for chunk in chunks:
+            yield self.predict(chunk)
+
+    def submit(self, X):
+        """Submit a request to predict X, which is batched with the other requests
+        submitted within `max_wait` seconds.
+
+        Args:
+            X: A dataframe of the raw text data.
+
+        Returns:
+            A concurrent.futures.Future of the predictions of X.
+        """
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The inference pipeline is closed.")
+            self._queue.append((X, future))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._serve, daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future
+
+    def _serve(self):
+        import time
+
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+                deadline = time.time() + self.max_wait
+                # wait for more requests until the deadline or the batch is full
+                while (
+                    sum(len(x) for x, _ in self._queue) < self.max_batch_rows
+                    and not self._closed
+                    and self._cond.wait(max(0, deadline - time.time()))
+                ):
+                    pass
+                requests, self._queue = self._queue, []
+            X = pd.concat([x for x, _ in requests], ignore_index=True)
+            try:
+                y_pred = self.predict(X)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for x, future in requests:
+                future.set_result(y_pred[start : start + len(x)])
+                start += len(x)
+
+    def close(self):
+        """Stop the worker thread serving the submitted requests."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 
 try:
     from transformers import Seq2SeqTrainer
@@ -6,7 +7,150 @@ except ImportError:
     Seq2SeqTrainer = object
 
 
+def example_lengths(dataset):
+    """The number of tokens of each example in a tokenized dataset.
+
+    For multiple choice examples, it is the number of choices times the longest choice.
+    """
+    lengths = []
+    for input_ids in dataset.with_format(None)["input_ids"]:
+        if input_ids and isinstance(input_ids[0], list):
+            lengths.append(len(input_ids) * max(len(x) for x in input_ids))
+        else:
+            lengths.append(len(input_ids))
+    return np.array(lengths, dtype=int)
+
+
+class TokenBudgetBatchSampler:
+    """A batch sampler which groups the examples of similar lengths into batches,
+    and sets the size of each batch by a budget of padded tokens.
+
+    Without shuffle, the examples are sorted by decreasing length. With shuffle,
+    the examples are shuffled, sorted by length within chunks of about
+    `mega_batch_mult` batches, and the batches are shuffled again.
+    """
+
+    def __init__(self, lengths, max_tokens, shuffle=False, seed=0, mega_batch_mult=50):
+        self.lengths = np.asarray(lengths)
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.seed = seed
+        self.mega_batch_mult = mega_batch_mult
+        self.epoch = 0
+        self._plan = None
+        self._sorted_batches = self._make_batches(
+            np.argsort(-self.lengths, kind="stable")
+        )
+
+    def _make_batches(self, order):
+        batches, batch, max_length = [], [], 0
+        for i in order.tolist():
+            length = max(max_length, self.lengths[i])
+            if batch and length * (len(batch) + 1) > self.max_tokens:
+                batches.append(batch)
+                batch, length = [], self.lengths[i]
+            batch.append(i)
+            max_length = length
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _epoch_batches(self):
+        """The shuffled batches of the current epoch, planned once per epoch so that
+        __len__ counts the batches which __iter__ yields."""
+        if self._plan is None or self._plan[0] != self.epoch:
+            rng = np.random.RandomState(self.seed + self.epoch)
+            order = rng.permutation(len(self.lengths))
+            chunk_size = (
+                max(1, len(order) // len(self._sorted_batches)) * self.mega_batch_mult
+            )
+            order = np.concatenate(
+                [
+                    chunk[np.argsort(-self.lengths[chunk], kind="stable")]
+                    for chunk in np.array_split(order, -(-len(order) // chunk_size))
+                ]
+            )
+            batches = self._make_batches(order)
+            rng.shuffle(batches)
+            self._plan = self.epoch, batches
+        return self._plan[1]
+
+    def __iter__(self):
+        if not self.shuffle:
+            return iter(self._sorted_batches)
+        batches = self._epoch_batches()
+        self.epoch += 1
+        return iter(batches)
+
+    def __len__(self):
+        """The number of batches of the next epoch. With shuffle, it may differ
+        slightly across the epochs."""
+        if not self.shuffle:
+            return len(self._sorted_batches)
+        return len(self._epoch_batches())
+
+    @property
+    def order(self):
+        """The order of the examples yielded without shuffle."""
+        return np.concatenate(self._sorted_batches)
+
+
+def _restore_order(predictions, order):
+    if isinstance(predictions, (tuple, list)):
+        return type(predictions)(_restore_order(x, order) for x in predictions)
+    if predictions is None:
+        return None
+    restored = np.empty_like(predictions)
+    restored[order] = predictions
+    return restored
+
+
 class TrainerForAuto(Seq2SeqTrainer):
+    def _use_token_budget(self):
+        return (
+            getattr(self.args, "max_tokens_per_batch", None)
+            and self.args.world_size == 1
+        )
+
+    def _token_budget_dataloader(self, dataset, description, shuffle=False):
+        from torch.utils.data import DataLoader
+
+        dataset = self._remove_unused_columns(dataset, description=description)
+        batch_sampler = TokenBudgetBatchSampler(
+            example_lengths(dataset),
+            self.args.max_tokens_per_batch,
+            shuffle=shuffle,
+            seed=self.args.seed,
+        )
+        return DataLoader(
+            dataset,
+            batch_sampler=batch_sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory,
+        )
+
+    def get_train_dataloader(self):
+        if not self._use_token_budget():
+            return super().get_train_dataloader()
+        return self._token_budget_dataloader(
+            self.train_dataset, "training", shuffle=True
+        )
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        if not self._use_token_budget():
+            return super().get_eval_dataloader(eval_dataset)
+        eval_dataset = eval_dataset if eval_dataset is not None else self.eval_dataset
+        # the order of the predictions does not matter for the metrics
+        return self._token_budget_dataloader(eval_dataset, "evaluation")
+
+    def get_test_dataloader(self, test_dataset):
+        if not self._use_token_budget():
+            return super().get_test_dataloader(test_dataset)
+        dataloader = self._token_budget_dataloader(test_dataset, "test")
+        self._test_order = dataloader.batch_sampler.order
+        return dataloader
+
     def predict(
         self,
         test_dataset,
@@ -15,8 +159,9 @@ class TrainerForAuto(Seq2SeqTrainer):
         max_length=None,
         num_beams=None,
     ):
+        self._test_order = None
         if getattr(self, "_is_seq2seq", None):
-            return super().predict(
+            output = super().predict(
                 test_dataset,
                 ignore_keys,
                 metric_key_prefix=metric_key_prefix,
@@ -24,9 +169,16 @@ class TrainerForAuto(Seq2SeqTrainer):
                 num_beams=num_beams,
             )
         else:
-            return super(Seq2SeqTrainer, self).predict(
+            output = super(Seq2SeqTrainer, self).predict(
                 test_dataset, ignore_keys, metric_key_prefix
             )
+        if self._test_order is not None:
+            # the examples were sorted by length
+            output = output._replace(
+                predictions=_restore_order(output.predictions, self._test_order),
+                label_ids=_restore_order(output.label_ids, self._test_order),
+            )
+        return output
 
     def prediction_step(
         self,
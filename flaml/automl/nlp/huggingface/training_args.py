@@ -34,6 +34,18 @@ class TrainingArgumentsForAuto(TrainingArguments):
             (1) The token labels, i.e., [B-PER, I-PER, B-LOC]; (2) Id labels. For (2), need to pass the label_list (e.g., [B-PER, I-PER, B-LOC])
             to convert the Id to token labels when computing the metric with metric_loss_score.
             See the example in [a simple token classification example](../../../../Examples/AutoML-NLP#a-simple-token-classification-example).
+        tokenizer_num_proc (int, optional, defaults to None): An integer, the number of processes to tokenize
+            the data in parallel. The data are tokenized in the main process when it is None or 1.
+        tokenized_data_cache_dir (str, optional, defaults to None): A string, the directory to persist the
+            tokenized training and validation data, so that they are tokenized only once across the trials.
+            None or an empty string disables the cache. The cache is not evicted: each distinct training
+            data (e.g., each sample size or fold) adds a dataset to the dir, so clean it up after the search.
+        max_tokens_per_batch (int, optional, defaults to None): An integer, the budget of (padded) tokens per batch.
+            If set, the examples of similar lengths are grouped into dynamically padded batches whose sizes are set
+            by this budget instead of per_device_train_batch_size and per_device_eval_batch_size, for training,
+            evaluation and prediction. It is recommended to keep pad_to_max_length False with it.
+        dynamic_quantization (bool, optional, defaults to "False"): A bool, whether to apply dynamic int8
+            quantization to the linear layers of the fine-tuned model for prediction on CPU.
     """
 
     task: str = field(default="seq-classification")
@@ -75,6 +87,30 @@ class TrainingArgumentsForAuto(TrainingArguments):
         default=None, metadata={"help": "The string list of the label names. "}
     )
 
+    tokenizer_num_proc: Optional[int] = field(
+        default=None,
+        metadata={"help": "The number of processes to tokenize the data in parallel."},
+    )
+
+    tokenized_data_cache_dir: Optional[str] = field(
+        default=None,
+        metadata={"help": "The dir to persist the tokenized data across trials."},
+    )
+
+    max_tokens_per_batch: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": "The budget of padded tokens per batch of length-grouped examples."
+        },
+    )
+
+    dynamic_quantization: bool = field(
+        default=False,
+        metadata={
+            "help": "Whether to quantize the model to int8 for prediction on CPU."
+        },
+    )
+
     eval_steps: int = field(
         default=500, metadata={"help": "Run an evaluation every X steps."}
     )
@@ -1,6 +1,10 @@
 import pandas as pd
-from itertools import chain
 import numpy as np
+import copy
+import hashlib
+import os
+import shutil
+import uuid
 
 from flaml.automl.data import (
     SUMMARIZATION,
@@ -11,6 +15,12 @@ from flaml.automl.data import (
     NLG_TASKS,
 )
 
+# per-process caches of the loaded tokenizers, model configs and pretrained models
+_TOKENIZERS = {}
+_MODEL_CONFIGS = {}
+_PRETRAINED_MODELS = {}
+_SENTENCE_TOKENIZER = None
+
 
 def todf(X, Y, column_name):
     """
@@ -54,6 +64,151 @@ def tokenize_text(X, Y=None, task=None, hf_args=None, tokenizer=None):
     return X_tokenized, Y_tokenized
 
 
+def tokenize_text_to_dataset(
+    X, Y=None, task=None, hf_args=None, tokenizer=None, num_proc=None, cache_dir=None
+):
+    """Tokenize the text data into an Arrow-backed datasets.Dataset.
+
+    The examples are tokenized in batches with one tokenizer call per batch,
+    and the batches are sharded over `num_proc` processes if it is larger than 1.
+
+    Args:
+        X: A dataframe of the text data.
+        Y: None or a series of the labels.
+        task: A string of the task type.
+        hf_args: The TrainingArgumentsForAuto.
+        tokenizer: The (fast) tokenizer.
+        num_proc: None or an integer of the number of processes to tokenize the data.
+        cache_dir: None or a string of the directory to persist the tokenized dataset.
+            If the same data was tokenized with the same tokenizer and arguments before,
+            the dataset is loaded from the cache instead.
+
+    Returns:
+        A datasets.Dataset of the tokenized columns and the label column
+        ("labels" for token classification and NLG tasks, "label" otherwise).
+    """
+    from datasets import Dataset, load_from_disk
+
+    if cache_dir:
+        path = os.path.join(
+            cache_dir, _tokenized_data_key(X, Y, task, hf_args, tokenizer)
+        )
+        if os.path.isdir(path):
+            return load_from_disk(path)
+    x_columns = list(X.keys())
+    data = {key: X[key].tolist() for key in x_columns}
+    y_column = None
+    if Y is not None:
+        y_column = "__label__"
+        data[y_column] = list(Y)
+    dataset = Dataset.from_dict(data)
+    dataset = dataset.map(
+        tokenize_batch,
+        fn_kwargs={
+            "x_columns": x_columns,
+            "y_column": y_column,
+            "task": task,
+            "hf_args": hf_args,
+            "tokenizer": tokenizer,
+        },
+        batched=True,
+        num_proc=num_proc if num_proc and num_proc > 1 else None,
+        remove_columns=dataset.column_names,
+    )
+    if cache_dir:
+        # save to a temporary dir first, so that concurrent trials never load a partial dataset
+        tmp_path = f"{path}.{uuid.uuid4().hex}"
+        dataset.save_to_disk(tmp_path)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # another trial has saved the same dataset
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return load_from_disk(path)
+    return dataset
+
+
+def _tokenized_data_key(X, Y, task, hf_args, tokenizer):
+    """The key of a tokenized dataset: a hash of the tokenizer, the arguments which
+    affect the tokenization and the fingerprint of the data."""
+    md5 = hashlib.md5()
+    md5.update(
+        repr(
+            (
+                task,
+                type(tokenizer).__name__,
+                getattr(tokenizer, "name_or_path", None),
+                getattr(tokenizer, "add_prefix_space", None),
+                hf_args and hf_args.max_seq_length,
+                hf_args and hf_args.pad_to_max_length,
+                hf_args and hf_args.label_all_tokens,
+                hf_args and hf_args.label_list,
+                list(X.keys()),
+                len(X),
+            )
+        ).encode()
+    )
+    for column in [X[key] for key in X.keys()] + ([] if Y is None else [Y]):
+        column = pd.Series(column).reset_index(drop=True)
+        if column.dtype == object:
+            column = column.astype(str)
+        md5.update(pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes())
+    return md5.hexdigest()
+
+
+def tokenize_batch(
+    batch, x_columns, y_column=None, task=None, hf_args=None, tokenizer=None
+):
+    """Tokenize a batch of examples, given as a dict of column name to list of values."""
+    columns = [batch[key] for key in x_columns]
+    labels = batch[y_column] if y_column else None
+    if task in (SEQCLASSIFICATION, SEQREGRESSION):
+        tokenized = tokenize_columns(columns, tokenizer, task=task, hf_args=hf_args)
+        if labels is not None:
+            tokenized["label"] = labels
+    elif task == TOKENCLASSIFICATION:
+        tokenized = tokenize_and_align_labels(
+            columns[0],
+            tokenizer,
+            labels=labels,
+            label_to_id={i: i for i in range(len(hf_args.label_list))},
+            b_to_i_label=get_b_to_i_label(hf_args.label_list),
+            hf_args=hf_args,
+        )
+    elif task in NLG_TASKS:
+        tokenized = tokenize_columns(
+            columns, tokenizer, task=task, hf_args=hf_args, prefix_str="summarize: "
+        )
+        if labels is not None:
+            tokenized["labels"] = tokenize_labels_seq2seq(
+                labels, tokenizer, task=task, hf_args=hf_args
+            )
+    elif task == MULTICHOICECLASSIFICATION:
+        tokenized = tokenize_swag(dict(zip(x_columns, columns)), tokenizer, hf_args)
+        tokenized.update(zip(x_columns, columns))
+        if labels is not None:
+            tokenized["label"] = labels
+    return tokenized
+
+
+def _tokenizer_kwargs(hf_args):
+    return {
+        "padding": "max_length" if hf_args and hf_args.pad_to_max_length else False,
+        "max_length": hf_args.max_seq_length if hf_args else None,
+        "truncation": True,
+    }
+
+
+def tokenize_labels_seq2seq(labels, tokenizer, task=None, hf_args=None):
+    input_ids = tokenize_columns(
+        [labels], tokenizer, task=task, hf_args=hf_args, prefix_str=""
+    )["input_ids"]
+    return [
+        [(each_l if each_l != tokenizer.pad_token_id else -100) for each_l in label]
+        for label in input_ids
+    ]
+
+
 def tokenize_seq2seq(X, Y, tokenizer, task=None, hf_args=None):
     model_inputs = tokenize_onedataframe(
         X,
@@ -64,36 +219,39 @@ def tokenize_seq2seq(X, Y, tokenizer, task=None, hf_args=None):
     )
     model_outputs = None
     if Y is not None:
-        model_outputs = tokenize_onedataframe(
-            Y.to_frame(),
-            tokenizer=tokenizer,
-            task=task,
-            hf_args=hf_args,
-            prefix_str="",
-        )
-        model_outputs["labels"] = [
-            [(each_l if each_l != tokenizer.pad_token_id else -100) for each_l in label]
-            for label in model_outputs["input_ids"]
-        ]
-        model_outputs = model_outputs.drop(
-            columns=["attention_mask", "input_ids", "decoder_input_ids"]
+        model_outputs = pd.DataFrame(
+            {
+                "labels": tokenize_labels_seq2seq(
+                    Y.tolist(), tokenizer, task=task, hf_args=hf_args
+                )
+            },
+            index=Y.index,
         )
     return model_inputs, model_outputs
 
 
+def get_b_to_i_label(label_list):
+    # If the label_all_tokens flag is True, use b_to_i_label to convert the B- labels to I- labels
+    b_to_i_label = []
+    for idx, label in enumerate(label_list):
+        if label.startswith("B-") and label.replace("B-", "I-") in label_list:
+            b_to_i_label.append(label_list.index(label.replace("B-", "I-")))
+        else:
+            b_to_i_label.append(idx)
+    return b_to_i_label
+
+
 def tokenize_and_align_labels(
-    examples,
+    words,
     tokenizer,
-    label_to_id,
-    b_to_i_label,
+    labels=None,
+    label_to_id=None,
+    b_to_i_label=None,
     hf_args=None,
-    X_sent_key=None,
-    Y_sent_key=None,
-    return_column_name=False,
 ):
     # tokenize_and_align_labels is only called by the token-classification task
     tokenized_inputs = tokenizer(
-        [list(examples[X_sent_key])],
+        [list(x) for x in words],
         padding="max_length"
         if hf_args and hf_args.pad_to_max_length
         else False,  # to be consistent with https://github.com/huggingface/transformers/blob/main/examples/pytorch/token-classification/run_ner.py#L394
@@ -102,114 +260,45 @@ def tokenize_and_align_labels(
         # We use this argument because the texts in our dataset are lists of words (with a label for each word).
         is_split_into_words=True,
     )
-    if Y_sent_key is not None:
-        previous_word_idx = None
-        label_ids = []
-        for word_idx in tokenized_inputs.word_ids(batch_index=0):
-            if word_idx is None:
-                label_ids.append(-100)
-            elif word_idx != previous_word_idx:
-                label_ids.append(label_to_id[examples[Y_sent_key][word_idx]])
-            # For the other tokens in a word, we set the label to either the current label or -100, depending on
-            # the label_all_tokens flag.
-            else:
-                # Use the label_all_tokens to control whether to copy the label to all subtokens or to pad the additional tokens as -100
-                if hf_args.label_all_tokens:
-                    # If the B- word is converted into multiple subtokens, map the additional subtokens to I-
-                    label_ids.append(
-                        b_to_i_label[label_to_id[examples[Y_sent_key][word_idx]]]
-                    )
-                else:
+    tokenized = {key: tokenized_inputs[key] for key in sorted(tokenized_inputs.keys())}
+    if labels is not None:
+        label_ids_list = []
+        for batch_index, label in enumerate(labels):
+            previous_word_idx = None
+            label_ids = []
+            for word_idx in tokenized_inputs.word_ids(batch_index=batch_index):
+                if word_idx is None:
                     label_ids.append(-100)
-            previous_word_idx = word_idx
-        tokenized_inputs["labels"] = label_ids
-    tmp_column_names = sorted(tokenized_inputs.keys())
-    tokenized_input_and_labels = [tokenized_inputs[x] for x in tmp_column_names]
-    for key_idx, each_key in enumerate(tmp_column_names):
-        if each_key != "labels":
-            tokenized_input_and_labels[key_idx] = tokenized_input_and_labels[key_idx][0]
-    if return_column_name:
-        return tokenized_input_and_labels, tmp_column_names
-    else:
-        return tokenized_input_and_labels
+                elif word_idx != previous_word_idx:
+                    label_ids.append(label_to_id[label[word_idx]])
+                # For the other tokens in a word, we set the label to either the current label or -100, depending on
+                # the label_all_tokens flag.
+                else:
+                    # Use the label_all_tokens to control whether to copy the label to all subtokens or to pad the additional tokens as -100
+                    if hf_args.label_all_tokens:
+                        # If the B- word is converted into multiple subtokens, map the additional subtokens to I-
+                        label_ids.append(b_to_i_label[label_to_id[label[word_idx]]])
+                    else:
+                        label_ids.append(-100)
+                previous_word_idx = word_idx
+            label_ids_list.append(label_ids)
+        tokenized["labels"] = label_ids_list
+    return tokenized
 
 
 def tokenize_text_tokclassification(X, Y, tokenizer, hf_args=None):
-    # If the label_all_tokens flag is True, prepare two dicts label_to_id and b_to_i_label to convert the B- labels to I- labels
-    label_to_id = {i: i for i in range(len(hf_args.label_list))}
-    b_to_i_label = []
-    for idx, label in enumerate(hf_args.label_list):
-        if label.startswith("B-") and label.replace("B-", "I-") in hf_args.label_list:
-            b_to_i_label.append(hf_args.label_list.index(label.replace("B-", "I-")))
-        else:
-            b_to_i_label.append(idx)
-
+    tokenized = tokenize_and_align_labels(
+        X[list(X.keys())[0]].tolist(),
+        tokenizer,
+        labels=None if Y is None else Y.tolist(),
+        label_to_id={i: i for i in range(len(hf_args.label_list))},
+        b_to_i_label=get_b_to_i_label(hf_args.label_list),
+        hf_args=hf_args,
+    )
+    y_tokenized = None
     if Y is not None:
-        X_and_Y = pd.concat([X, Y.to_frame()], axis=1)
-        X_key = list(X.keys())[0]
-        Y_key = list(Y.to_frame().keys())[0]
-        # tokenize_and_align_labels is only called by the token-classification task
-        _, tokenized_column_names = tokenize_and_align_labels(
-            X_and_Y.iloc[0],
-            tokenizer=tokenizer,
-            hf_args=hf_args,
-            X_sent_key=X_key,
-            Y_sent_key=Y_key,
-            return_column_name=True,
-            label_to_id=label_to_id,
-            b_to_i_label=b_to_i_label,
-        )
-        X_and_Y_tokenized = X_and_Y.apply(
-            lambda x: tokenize_and_align_labels(
-                x,
-                tokenizer=tokenizer,
-                hf_args=hf_args,
-                X_sent_key=X_key,
-                Y_sent_key=Y_key,
-                label_to_id=label_to_id,
-                b_to_i_label=b_to_i_label,
-            ),
-            axis=1,
-            result_type="expand",
-        )
-        label_idx = tokenized_column_names.index("labels")
-        other_indices = sorted(
-            set(range(len(tokenized_column_names))).difference({label_idx})
-        )
-        other_column_names = [tokenized_column_names[x] for x in other_indices]
-        d = X_and_Y_tokenized.iloc[:, other_indices]
-        y_tokenized = X_and_Y_tokenized.iloc[:, label_idx]
-    else:
-        X_key = list(X.keys())[0]
-
-        _, tokenized_column_names = tokenize_and_align_labels(
-            X.iloc[0],
-            tokenizer=tokenizer,
-            hf_args=hf_args,
-            X_sent_key=X_key,
-            Y_sent_key=None,
-            return_column_name=True,
-            label_to_id=label_to_id,
-            b_to_i_label=b_to_i_label,
-        )
-
-        d = X.apply(
-            lambda x: tokenize_and_align_labels(
-                x,
-                tokenizer=tokenizer,
-                hf_args=hf_args,
-                X_sent_key=X_key,
-                Y_sent_key=None,
-                label_to_id=label_to_id,
-                b_to_i_label=b_to_i_label,
-            ),
-            axis=1,
-            result_type="expand",
-        )
-        other_column_names = tokenized_column_names
-        y_tokenized = None
-    X_tokenized = pd.DataFrame(columns=other_column_names)
-    X_tokenized[other_column_names] = d
+        y_tokenized = pd.Series(tokenized.pop("labels"), index=X.index)
+    X_tokenized = pd.DataFrame(tokenized, index=X.index)
     return X_tokenized, y_tokenized
 
 
@@ -220,106 +309,76 @@ def tokenize_onedataframe(
     hf_args=None,
     prefix_str=None,
 ):
-    with tokenizer.as_target_tokenizer():
-        _, tokenized_column_names = tokenize_row(
-            dict(X.iloc[0]),
-            tokenizer,
-            prefix=(prefix_str,) if task is SUMMARIZATION else None,
-            task=task,
-            hf_args=hf_args,
-            return_column_name=True,
-        )
-        d = X.apply(
-            lambda x: tokenize_row(
-                x,
-                tokenizer,
-                prefix=(prefix_str,) if task is SUMMARIZATION else None,
-                task=task,
-                hf_args=hf_args,
-            ),
-            axis=1,
-            result_type="expand",
-        )
-        X_tokenized = pd.DataFrame(columns=tokenized_column_names)
-        X_tokenized[tokenized_column_names] = d
-        return X_tokenized
+    tokenized = tokenize_columns(
+        [X[key].tolist() for key in X.keys()],
+        tokenizer,
+        task=task,
+        hf_args=hf_args,
+        prefix_str=prefix_str,
+    )
+    return pd.DataFrame(tokenized, index=X.index)
 
 
-def tokenize_row(
-    this_row,
+def tokenize_columns(
+    columns,
     tokenizer,
-    prefix=None,
     task=None,
     hf_args=None,
-    return_column_name=False,
+    prefix_str=None,
 ):
-    if prefix:
-        this_row = tuple(["".join(x) for x in zip(prefix, this_row)])
+    """Tokenize the text columns (and text pair columns) in one batched tokenizer call.
 
-    # tokenizer.pad_token = tokenizer.eos_token
-    tokenized_example = tokenizer(
-        *tuple(this_row),
-        padding="max_length" if hf_args and hf_args.pad_to_max_length else False,
-        max_length=hf_args.max_seq_length if hf_args else None,
-        truncation=True,
-    )
+    Returns:
+        A dict of the tokenized columns in sorted order of the names.
+    """
+    if task == SUMMARIZATION:
+        # only the first column is used for summarization
+        columns = [[prefix_str + x for x in columns[0]]]
+    with tokenizer.as_target_tokenizer():
+        tokenized_example = tokenizer(*columns, **_tokenizer_kwargs(hf_args))
+    tokenized_example = dict(tokenized_example)
     if task in NLG_TASKS:
         tokenized_example["decoder_input_ids"] = tokenized_example["input_ids"]
-    tmp_column_names = sorted(tokenized_example.keys())
-
-    if return_column_name:
-        return [tokenized_example[x] for x in tmp_column_names], tmp_column_names
-    else:
-        return [tokenized_example[x] for x in tmp_column_names]
+    return {key: tokenized_example[key] for key in sorted(tokenized_example.keys())}
 
 
 def tokenize_text_multiplechoice(X, tokenizer, hf_args=None):
-    t = X[["sent1", "sent2", "ending0", "ending1", "ending2", "ending3"]]
-    _, tokenized_column_names = tokenize_swag(
-        t.iloc[0],
+    tokenized = tokenize_swag(
+        {
+            key: X[key].tolist()
+            for key in ["sent1", "sent2", "ending0", "ending1", "ending2", "ending3"]
+        },
         tokenizer=tokenizer,
         hf_args=hf_args,
-        return_column_name=True,
-    )
-    d = t.apply(
-        lambda x: tokenize_swag(x, tokenizer=tokenizer, hf_args=hf_args),
-        axis=1,
-        result_type="expand",
     )
-
-    X_tokenized = pd.DataFrame(columns=tokenized_column_names)
-    X_tokenized[tokenized_column_names] = d
+    X_tokenized = pd.DataFrame(tokenized, index=X.index)
     output = X_tokenized.join(X)
     return output
 
 
-def tokenize_swag(this_row, tokenizer, hf_args=None, return_column_name=False):
-    first_sentences = [[this_row["sent1"]] * 4]
+def tokenize_swag(batch, tokenizer, hf_args=None):
+    endings = ["ending0", "ending1", "ending2", "ending3"]
     # get each 1st sentence, multiply to 4 sentences
-    question_headers = this_row["sent2"]
+    first_sentences = [sent1 for sent1 in batch["sent1"] for _ in endings]
     # sent2 are the noun part of 2nd line
+    # now the 2nd-sentences are formed by combing the noun part and 4 ending parts
     second_sentences = [
-        question_headers + " " + this_row[key]
-        for key in ["ending0", "ending1", "ending2", "ending3"]
+        question_header + " " + ending
+        for question_header, *row_endings in zip(
+            batch["sent2"], *(batch[key] for key in endings)
+        )
+        for ending in row_endings
     ]
-    # now the 2nd-sentences are formed by combing the noun part and 4 ending parts
-
-    # Flatten out
-    # From 2 dimension to 1 dimension array
-    first_sentences = list(chain(*first_sentences))
 
     tokenized_example = tokenizer(
-        *tuple([first_sentences, second_sentences]),
-        truncation=True,
-        max_length=hf_args.max_seq_length if hf_args else None,
-        padding="max_length" if hf_args and hf_args.pad_to_max_length else False,
+        first_sentences, second_sentences, **_tokenizer_kwargs(hf_args)
     )
-    tmp_column_names = sorted(tokenized_example.keys())
-
-    if return_column_name:
-        return [tokenized_example[x] for x in tmp_column_names], tmp_column_names
-    else:
-        return [tokenized_example[x] for x in tmp_column_names]
+    # un-flatten the tokenized sentences into groups of 4 choices per example
+    n = len(endings)
+    return {
+        key: [values[i : i + n] for i in range(0, len(values), n)]
+        for key, values in sorted(tokenized_example.items())
+    }
 
 
 def postprocess_prediction_and_true(
@@ -373,11 +432,9 @@ def postprocess_prediction_and_true(
             y_pred = np.argmax(y_pred[0], axis=2)
         decoded_preds = tokenizer.batch_decode(y_pred, skip_special_tokens=True)
 
-        import nltk
-
-        nltk.download("punkt")
+        sent_tokenize = load_sentence_tokenizer()
         decoded_preds = [pred.strip() for pred in decoded_preds]
-        decoded_preds = ["\n".join(nltk.sent_tokenize(pred)) for pred in decoded_preds]
+        decoded_preds = ["\n".join(sent_tokenize(pred)) for pred in decoded_preds]
 
         if y_true is not None:
             y_true_labels = np.where(y_true != -100, y_true, tokenizer.pad_token_id)
@@ -386,7 +443,7 @@ def postprocess_prediction_and_true(
             )
             decoded_y_true_labels = [label.strip() for label in decoded_y_true_labels]
             decoded_y_true_labels = [
-                "\n".join(nltk.sent_tokenize(label)) for label in decoded_y_true_labels
+                "\n".join(sent_tokenize(label)) for label in decoded_y_true_labels
             ]
         else:
             decoded_y_true_labels = None
@@ -396,12 +453,88 @@ def postprocess_prediction_and_true(
         return np.argmax(y_pred, axis=1), y_true
 
 
-def load_model(checkpoint_path, task, num_labels=None):
+def load_sentence_tokenizer():
+    """The nltk sentence tokenizer to split the summaries into sentences for rouge.
+    The punkt data are checked once per process and downloaded only if not found."""
+    global _SENTENCE_TOKENIZER
+    if _SENTENCE_TOKENIZER is None:
+        import nltk
+
+        try:
+            nltk.sent_tokenize("Load the tokenizer.")
+        except LookupError:
+            nltk.download("punkt")
+        _SENTENCE_TOKENIZER = nltk.sent_tokenize
+    return _SENTENCE_TOKENIZER
+
+
+def load_tokenizer(model_path, task=None, add_prefix_space=False):
+    """Load the fast tokenizer of a model, cached per process."""
+    key = (model_path, task == SUMMARIZATION, add_prefix_space)
+    tokenizer = _TOKENIZERS.get(key)
+    if tokenizer is None:
+        from transformers import AutoTokenizer
+
+        if task == SUMMARIZATION:
+            tokenizer = AutoTokenizer.from_pretrained(
+                pretrained_model_name_or_path=model_path,
+                cache_dir=None,
+                use_fast=True,
+                revision="main",
+                use_auth_token=None,
+            )
+        else:
+            tokenizer = AutoTokenizer.from_pretrained(
+                model_path,
+                use_fast=True,
+                add_prefix_space=add_prefix_space,
+            )
+        _TOKENIZERS[key] = tokenizer
+    return tokenizer
+
+
+def _load_config(checkpoint_path, **kwargs):
+    from transformers import AutoConfig
+
+    key = (checkpoint_path, tuple(sorted(kwargs.items())))
+    config = _MODEL_CONFIGS.get(key)
+    if config is None:
+        _MODEL_CONFIGS[key] = config = AutoConfig.from_pretrained(
+            checkpoint_path, **kwargs
+        )
+    return copy.deepcopy(config)
+
+
+def _clone_pretrained_model(pretrained_model, newly_initialized_keys):
+    """Copy the pretrained model, and re-initialize the weights which are not loaded from
+    the checkpoint (e.g., the classification head), using the current random state."""
+    model = copy.deepcopy(pretrained_model)
+    modules = {key.rsplit(".", 1)[0] for key in newly_initialized_keys}
+    for name in sorted(modules):
+        model._init_weights(model.get_submodule(name))
+    return model
+
+
+def load_model(checkpoint_path, task, num_labels=None, use_cache=False, clone=True):
+    """Load the model from a checkpoint.
+
+    Args:
+        checkpoint_path: A string of the pretrained model name or the checkpoint path.
+        task: A string of the task type.
+        num_labels: None or an integer of the number of labels.
+        use_cache: A bool of whether to keep the loaded model in memory for the
+            following calls with the same arguments in this process.
+        clone: A bool of whether to return a copy of the cached model, with the
+            newly initialized weights re-initialized. Only effective when use_cache is True.
+            If False, the cached model is returned and must not be modified.
+
+    Returns:
+        The model.
+    """
     import transformers
 
     transformers.logging.set_verbosity_error()
 
-    from transformers import AutoConfig
     from ...data import SEQCLASSIFICATION, SEQREGRESSION, TOKENCLASSIFICATION
 
     def get_this_model(checkpoint_path, task, model_config):
@@ -412,38 +545,66 @@ def load_model(checkpoint_path, task, num_labels=None):
 
         if task in (SEQCLASSIFICATION, SEQREGRESSION):
             return AutoModelForSequenceClassification.from_pretrained(
-                checkpoint_path, config=model_config, ignore_mismatched_sizes=True
+                checkpoint_path,
+                config=model_config,
+                ignore_mismatched_sizes=True,
+                output_loading_info=True,
             )
         elif task == TOKENCLASSIFICATION:
             return AutoModelForTokenClassification.from_pretrained(
-                checkpoint_path, config=model_config
+                checkpoint_path, config=model_config, output_loading_info=True
             )
         elif task in NLG_TASKS:
             return AutoModelForSeq2SeqLM.from_pretrained(
-                checkpoint_path, config=model_config
+                checkpoint_path, config=model_config, output_loading_info=True
             )
         elif task == MULTICHOICECLASSIFICATION:
             return AutoModelForMultipleChoice.from_pretrained(
-                checkpoint_path, config=model_config
+                checkpoint_path, config=model_config, output_loading_info=True
             )
 
     def _set_model_config(checkpoint_path):
         if task in (SEQCLASSIFICATION, SEQREGRESSION, TOKENCLASSIFICATION):
-            model_config = AutoConfig.from_pretrained(
+            model_config = _load_config(
                 checkpoint_path,
                 num_labels=model_config_num_labels,
             )
             return model_config
         else:
-            model_config = AutoConfig.from_pretrained(checkpoint_path)
+            model_config = _load_config(checkpoint_path)
             return model_config
 
-    current_config = AutoConfig.from_pretrained(checkpoint_path)
+    key = (checkpoint_path, task, num_labels)
+    if use_cache and key in _PRETRAINED_MODELS:
+        this_model, newly_initialized_keys = _PRETRAINED_MODELS[key]
+        return (
+            _clone_pretrained_model(this_model, newly_initialized_keys)
+            if clone
+            else this_model
+        )
+
+    current_config = _load_config(checkpoint_path)
     this_vocab_size = current_config.vocab_size
 
     model_config_num_labels = num_labels
     new_config = _set_model_config(checkpoint_path)
 
-    this_model = get_this_model(checkpoint_path, task, new_config)
+    if use_cache:
+        import torch
+
+        # load without consuming the random state, so that the clone below initializes
+        # the new weights exactly as the clones of the following calls under the same seed
+        with torch.random.fork_rng(devices=[]):
+            this_model, loading_info = get_this_model(checkpoint_path, task, new_config)
+            this_model.resize_token_embeddings(this_vocab_size)
+        # keep a pristine copy of the pretrained weights, to be cloned by the following trials
+        newly_initialized_keys = loading_info["missing_keys"] + [
+            x[0] for x in loading_info.get("mismatched_keys", [])
+        ]
+        _PRETRAINED_MODELS[key] = this_model, newly_initialized_keys
+        if clone:
+            return _clone_pretrained_model(this_model, newly_initialized_keys)
+        return this_model
+    this_model, loading_info = get_this_model(checkpoint_path, task, new_config)
     this_model.resize_token_embeddings(this_vocab_size)
     return this_model
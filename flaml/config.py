@@ -1,15 +1,15 @@
-"""!
- * Copyright (c) 2020-2021 Microsoft Corporation. All rights reserved.
- * Licensed under the MIT License.
-"""
-
-N_SPLITS = 5
-RANDOM_SEED = 1
-SPLIT_RATIO = 0.1
-MEM_THRES = 4 * (1024**3)
-SMALL_LARGE_THRES = 10000000
-MIN_SAMPLE_TRAIN = 10000
-CV_HOLDOUT_THRESHOLD = 100000
-SAMPLE_MULTIPLY_FACTOR = 4
-SEARCH_THREAD_EPS = 1.0
-PENALTY = 1e10  # penalty term for constraints
+"""!
+ * Copyright (c) 2020-2021 Microsoft Corporation. All rights reserved.
+ * Licensed under the MIT License.
+"""
+
+N_SPLITS = 5
+RANDOM_SEED = 1
+SPLIT_RATIO = 0.1
+MEM_THRES = 4 * (1024**3)
+SMALL_LARGE_THRES = 10000000
+MIN_SAMPLE_TRAIN = 10000
+CV_HOLDOUT_THRESHOLD = 100000
+SAMPLE_MULTIPLY_FACTOR = 4
+SEARCH_THREAD_EPS = 1.0
+PENALTY = 1e10  # penalty term for constraints
@@ -1,5 +1,6 @@
 from .suggest import (
     suggest_config,
+    suggest_config_many,
     suggest_learner,
     suggest_hyperparams,
     preprocess_and_suggest_hyperparams,
@@ -1,12 +1,26 @@
 import numpy as np
-import pandas as pd
 from sklearn.preprocessing import RobustScaler
 from sklearn.metrics import pairwise_distances
 
 
-def _augment(row):
-    max, avg, id = row.max(), row.mean(), row.index[0]
-    return row.apply(lambda x: (x, max, avg, id))
+def _preference_rank(regret, regret_matrix):
+    """Rank of each config (row) per task (column) for the nearest neighbor predictor.
+
+    A config with lower regret on the task is preferred. Ties are broken by the
+    max regret, the average regret and the name of the config.
+    """
+    max_regret = regret_matrix.max(axis=1).to_numpy()
+    avg_regret = regret_matrix.mean(axis=1).to_numpy()
+    names = regret_matrix.index.astype(str).to_numpy()
+    secondary = np.empty(len(names), dtype=int)
+    secondary[np.lexsort((names, avg_regret, max_regret))] = np.arange(len(names))
+    primary = np.where(np.isnan(regret), np.inf, regret)
+    order = np.lexsort(
+        (np.broadcast_to(secondary[:, None], regret.shape), primary), axis=0
+    )
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(len(names))[:, None], axis=0)
+    return rank
 
 
 def construct_portfolio(regret_matrix, meta_features, regret_bound):
@@ -25,68 +39,81 @@ def construct_portfolio(regret_matrix, meta_features, regret_bound):
     Returns:
         A list of configuration names.
     """
-    configs = []
-    all_configs = set(regret_matrix.index.tolist())
+    all_configs = regret_matrix.index.tolist()
     tasks = regret_matrix.columns
+    regret = regret_matrix.to_numpy(dtype=float)
+    n_configs, n_tasks = regret.shape
+    task_ids = np.arange(n_tasks)
     # pre-processing
     if meta_features is not None:
         scaler = RobustScaler()
-        meta_features = meta_features.loc[tasks]
-        meta_features.loc[:, :] = scaler.fit_transform(meta_features)
-        nearest_task = {}
-        for t in tasks:
-            other_meta_features = meta_features.drop(t)
-            dist = pd.DataFrame(
-                pairwise_distances(
-                    meta_features.loc[t].to_numpy().reshape(1, -1),
-                    other_meta_features,
-                    metric="l2",
-                ),
-                columns=other_meta_features.index,
-            )
-            nearest_task[t] = dist.idxmin(axis=1)
-        regret_matrix = regret_matrix.apply(_augment, axis=1)
-        print(regret_matrix)
+        dist = pairwise_distances(
+            scaler.fit_transform(meta_features.loc[tasks]), metric="l2"
+        )
+        np.fill_diagonal(dist, np.inf)
+        nearest_task = dist.argmin(axis=1)
+        rank = _preference_rank(regret, regret_matrix)
+        # the rank and the index of the config chosen for each task by the predictor
+        best_rank = np.full(n_tasks, n_configs)
+        best_config = np.zeros(n_tasks, dtype=int)
+    else:
+        # the best regret for each task achieved by the configs chosen so far
+        best_regret = np.full(n_tasks, np.nan)
 
-    def loss(configs):
-        """Loss of config set `configs`, according to nearest neighbor config predictor."""
+    def loss(candidates):
+        """Loss of adding each of the `candidates` to the chosen configs, according to
+        nearest neighbor config predictor."""
         if meta_features is not None:
-            r = []
-            best_config_per_task = regret_matrix.loc[configs, :].min()
-            for t in tasks:
-                config = best_config_per_task[nearest_task[t]].iloc[0][-1]
-                r.append(regret_matrix[t][config][0])
+            chosen = np.where(
+                rank[candidates] < best_rank,
+                candidates[:, None],
+                best_config,
+            )
+            r = regret[chosen[:, nearest_task], task_ids]
         else:
-            r = regret_matrix.loc[configs].min()
-        excessive_regret = (np.array(r) - regret_bound).clip(min=0).sum()
-        avg_regret = np.array(r).mean()
+            r = np.fmin(regret[candidates], best_regret)
+        excessive_regret = (r - regret_bound).clip(min=0).sum(axis=1)
+        avg_regret = r.mean(axis=1)
         return excessive_regret, avg_regret
 
+    def add(config):
+        nonlocal best_regret, best_rank, best_config
+        if meta_features is not None:
+            better = rank[config] < best_rank
+            best_rank = np.where(better, rank[config], best_rank)
+            best_config = np.where(better, config, best_config)
+        else:
+            best_regret = np.fmin(regret[config], best_regret)
+        configs.append(config)
+
+    configs = []
+    remaining = np.ones(n_configs, dtype=bool)
     prev = np.inf
     i = 0
     eps = 1e-5
-    while True:
-        candidates = [configs + [d] for d in all_configs.difference(configs)]
-        losses, avg_regret = tuple(zip(*(loss(x) for x in candidates)))
+    while remaining.any():
+        candidates = np.flatnonzero(remaining)
+        losses, avg_regret = loss(candidates)
         sorted_losses = np.sort(losses)
-        if sorted_losses[1] - sorted_losses[0] < eps:
+        if len(losses) > 1 and sorted_losses[1] - sorted_losses[0] < eps:
             minloss = np.nanmin(losses)
             print(
                 f"tie detected at loss = {sorted_losses[0]}, using alternative metric."
             )
             tied = np.flatnonzero(losses - minloss < eps)
-            losses = [(avg_regret[i], i) for i in tied]
-            minloss, ind = min(losses)
+            ind = tied[np.argmin(avg_regret[tied])]
+            minloss = avg_regret[ind]
             if minloss > prev - eps:
                 print(
                     f"May be overfitting at k = {i + 1}, current = {minloss:.5f}, "
                     f"prev = {prev:.5f}. Stopping."
                 )
                 break
-            configs = candidates[ind]
             prev = minloss
         else:
-            configs = candidates[np.nanargmin(losses)]
+            ind = np.nanargmin(losses)
+        add(candidates[ind])
+        remaining[candidates[ind]] = False
         i += 1
         if sorted_losses[0] <= eps:
             print(
@@ -94,4 +121,4 @@ def construct_portfolio(regret_matrix, meta_features, regret_bound):
             )
             break
 
-    return configs
+    return [all_configs[config] for config in configs]
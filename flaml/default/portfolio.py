@@ -23,7 +23,7 @@ def config_predictor_tuple(tasks, configs, meta_features, regret_matrix):
     """
     # pre-processing
     scaler = RobustScaler()
-    meta_features_norm = meta_features.loc[tasks]  # this makes a copy
+    meta_features_norm = meta_features.loc[tasks].astype(float)  # this makes a copy
     meta_features_norm.loc[:, :] = scaler.fit_transform(meta_features_norm)
 
     proc = {
@@ -35,14 +35,11 @@ def config_predictor_tuple(tasks, configs, meta_features, regret_matrix):
     # choices = regret_matrix[tasks].loc[configs].reset_index(drop=True).idxmin()
 
     # break ties using the order in configs
-    regret = (
-        regret_matrix[tasks]
-        .loc[configs]
-        .reset_index(drop=True)
-        .apply(lambda row: row.apply(lambda x: (x, row.name)), axis=1)
-    )
+    regret = regret_matrix[tasks].loc[configs].reset_index(drop=True)
     print(regret)
-    preferences = np.argsort(regret, axis=0)
+    preferences = pd.DataFrame(
+        np.argsort(regret.to_numpy(), axis=0, kind="stable"), columns=regret.columns
+    )
     print(preferences)
     return (meta_features_norm, preferences, proc)
 
@@ -162,6 +159,42 @@ def serialize(configs, regret, meta_features, output_file, config_path):
 #         print(tasks[i], "best_regret", best, "task", regrets.idxmin())
 
 
+def _build_estimator_portfolio(args, estimator, meta_features):
+    """Build and serialize the portfolio of one estimator.
+
+    Returns:
+        all: A dataframe of the results of all the configs.
+        baseline: A series of the baseline result of each task.
+        configsource: A list of the names of the configs in the portfolio.
+    """
+    # produce regret
+    all, baseline = load_result(
+        f"{args.input}/{estimator}/results.csv", args.task, "result"
+    )
+    regret = build_regret(all, baseline)
+    regret = regret.replace(np.inf, np.nan).dropna(axis=1, how="all")
+
+    if args.exclude:
+        regret = regret.loc[[i for i in regret.index if args.exclude not in i]]
+        regret = regret[[c for c in regret.columns if args.exclude not in c]]
+
+    print(
+        f"Regret matrix complete: {100 * regret.count().sum() / regret.shape[0] / regret.shape[1]}%"
+    )
+    print(f"Num models considered: {regret.shape[0]}")
+
+    configs = build_portfolio(meta_features, regret, args.strategy)
+    meta_predictor = serialize(
+        configs,
+        regret,
+        meta_features,
+        f"{args.output}/{estimator}/{args.task}.json",
+        Path(f"{args.input}/{estimator}"),
+    )
+    # analyze(regret, meta_predictor)
+    return all, baseline, meta_predictor["configsource"]
+
+
 def main():
     parser = argparse.ArgumentParser(description="Build a portfolio.")
     parser.add_argument(
@@ -178,52 +211,49 @@ def main():
         default=["lgbm", "xgboost"],
         nargs="+",
     )
+    parser.add_argument(
+        "--n_jobs",
+        help="Number of processes to build the portfolios of the estimators in parallel",
+        type=int,
+        default=1,
+    )
     args = parser.parse_args()
 
     meta_features = pd.read_csv(args.metafeatures, index_col=0).groupby(level=0).first()
     if args.exclude:
         meta_features.drop(args.exclude, inplace=True)
 
+    if args.n_jobs == 1:
+        results = [
+            _build_estimator_portfolio(args, estimator, meta_features)
+            for estimator in args.estimator
+        ]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=args.n_jobs) as executor:
+            results = list(
+                executor.map(
+                    _build_estimator_portfolio,
+                    [args] * len(args.estimator),
+                    args.estimator,
+                    [meta_features] * len(args.estimator),
+                )
+            )
     baseline_best = None
     all_results = None
-    for estimator in args.estimator:
-        # produce regret
-        all, baseline = load_result(
-            f"{args.input}/{estimator}/results.csv", args.task, "result"
-        )
-        regret = build_regret(all, baseline)
-        regret = regret.replace(np.inf, np.nan).dropna(axis=1, how="all")
-
-        if args.exclude:
-            regret = regret.loc[[i for i in regret.index if args.exclude not in i]]
-            regret = regret[[c for c in regret.columns if args.exclude not in c]]
-
-        print(
-            f"Regret matrix complete: {100 * regret.count().sum() / regret.shape[0] / regret.shape[1]}%"
-        )
-        print(f"Num models considered: {regret.shape[0]}")
-
-        configs = build_portfolio(meta_features, regret, args.strategy)
-        meta_predictor = serialize(
-            configs,
-            regret,
-            meta_features,
-            f"{args.output}/{estimator}/{args.task}.json",
-            Path(f"{args.input}/{estimator}"),
-        )
-        configsource = meta_predictor["configsource"]
+    for estimator, (all, baseline, configsource) in zip(args.estimator, results):
         all = all.loc[configsource]
-        all.rename({x: f"{estimator}/{x}" for x in regret.index.values}, inplace=True)
+        all.rename({x: f"{estimator}/{x}" for x in all.index.values}, inplace=True)
         baseline_best = (
             baseline
             if baseline_best is None
             else pd.DataFrame({0: baseline_best, 1: baseline}).max(1)
         )
         all_results = all if all_results is None else pd.concat([all_results, all])
-        # analyze(regret, meta_predictor)
     regrets = build_regret(all_results, baseline_best)
     if len(args.estimator) > 1:
-        meta_predictor = serialize(
+        serialize(
             regrets.index,
             regrets,
             meta_features,
@@ -1,5 +1,14 @@
 from time import sleep
+import copy
 import logging
+import pickle
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from functools import partial
+from itertools import chain
 import numpy as np
 from flaml import tune, BlendSearch
 
@@ -38,6 +47,270 @@ def get_key(config):
     return config
 
 
+class RateLimiter:
+    """A token-bucket limiter of requests and tokens per minute, shared by threads.
+
+    The number of tokens of a request is only known after the response, so a request
+    is admitted whenever the token bucket is not in debt, and the tokens it used
+    are charged afterwards.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        """Constructor.
+
+        Args:
+            requests_per_minute (float, Optional): The max number of requests per minute.
+            tokens_per_minute (float, Optional): The max number of tokens per minute.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = requests_per_minute or 0
+        self._tokens = tokens_per_minute or 0
+        self._time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed_min = (now - self._time) / 60
+        self._time = now
+        if self.requests_per_minute:
+            self._requests = min(
+                self.requests_per_minute,
+                self._requests + elapsed_min * self.requests_per_minute,
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + elapsed_min * self.tokens_per_minute,
+            )
+
+    def acquire(self):
+        """Wait until a request can be sent."""
+        while True:
+            with self._lock:
+                self._refill()
+                wait = 0
+                if self.requests_per_minute and self._requests < 1:
+                    wait = (1 - self._requests) / self.requests_per_minute * 60
+                if self.tokens_per_minute and self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.tokens_per_minute * 60)
+                if not wait:
+                    self._requests -= 1
+                    return
+            sleep(wait)
+
+    def consume(self, tokens):
+        """Charge the tokens used by a request."""
+        with self._lock:
+            self._tokens -= tokens
+
+
+class ResponseCache:
+    """A two-tier cache of api responses: an in-memory LRU tier in front of a diskcache.
+
+    Concurrent requests of the same key are coalesced: only one of them calls the api
+    and the others wait for its response.
+    """
+
+    def __init__(
+        self,
+        directory,
+        memory_size=1024,
+        size_limit=None,
+        ttl=None,
+        compress=False,
+    ):
+        """Constructor.
+
+        Args:
+            directory (str): The directory of the disk tier.
+            memory_size (int, Optional): The max number of responses in the memory tier.
+                0 disables the memory tier.
+            size_limit (int, Optional): The max size of the disk tier in bytes. The least
+                recently used responses are evicted beyond it. None means diskcache's default.
+            ttl (float, Optional): The time to live of a cached response in seconds.
+                None means the responses never expire.
+            compress (bool, Optional): Whether to compress the responses stored on disk.
+        """
+        disk_settings = {"eviction_policy": "least-recently-used"}
+        if size_limit is not None:
+            disk_settings["size_limit"] = size_limit
+        self._disk = diskcache.Cache(directory, **disk_settings)
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.compress = compress
+        self._memory = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "api_calls": 0,
+            "api_time": 0.0,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the disk tier and clear the memory tier."""
+        with self._lock:
+            self._memory.clear()
+        self._disk.close()
+
+    def _set_memory(self, key, value):
+        if not self.memory_size:
+            return
+        expire_time = self.ttl and time.time() + self.ttl
+        # a copy, so that the callers modifying their response do not modify the cache
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._memory[key] = (value, expire_time)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Get a copy of the cached response of a key, or default if not found."""
+        value = None
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                value, expire_time = item
+                if expire_time is None or expire_time > time.time():
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                else:
+                    value = None
+                    del self._memory[key]
+        if value is not None:
+            return copy.deepcopy(value)
+        value = self._disk.get(key, None)
+        if value is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return default
+        if isinstance(value, bytes):
+            value = pickle.loads(zlib.decompress(value))
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        self._set_memory(key, value)
+        return value
+
+    def set(self, key, value):
+        """Cache the response of a key."""
+        self._set_memory(key, value)
+        stored = zlib.compress(pickle.dumps(value)) if self.compress else value
+        self._disk.set(key, stored, expire=self.ttl)
+
+    def record_call(self, seconds):
+        """Count an api call which took the given seconds."""
+        with self._lock:
+            self.stats["api_calls"] += 1
+            self.stats["api_time"] += seconds
+
+    def get_or_call(self, key, func, accept=None):
+        """Get the cached response of a key, or call func to get and cache it.
+
+        Args:
+            key (tuple): The key of the response.
+            func (callable): A function without arguments which returns the response.
+            accept (callable, Optional): A function to check whether a cached response
+                can be used. If it returns False, the response is fetched again.
+
+        Returns:
+            The response.
+        """
+        while True:
+            value = self.get(key)
+            if value is not None and (accept is None or accept(value)):
+                return value
+            with self._lock:
+                event = self._in_flight.get(key)
+                leader = event is None
+                if leader:
+                    event = self._in_flight[key] = threading.Event()
+                else:
+                    self.stats["coalesced"] += 1
+            if not leader:
+                # wait for the identical request in flight and check the cache again
+                event.wait()
+                continue
+            try:
+                start_time = time.perf_counter()
+                value = func()
+                self.record_call(time.perf_counter() - start_time)
+                self.set(key, value)
+                return value
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                event.set()
+
+
+class _ResponseStream:
+    """An iterator of the responses of a list of configs in order, which keeps at most
+    max_in_flight requests submitted to the executor at a time.
+    """
+
+    def __init__(self, executor, get_response, configs, max_in_flight, batched):
+        self._executor = executor
+        self._get_response = get_response
+        self._configs = iter(configs)
+        self._max_in_flight = max_in_flight
+        self._batched = batched
+        self._pending = deque()
+        # the responses of a batch not consumed yet
+        self._ready = deque()
+
+    def _submit(self):
+        while len(self._pending) < self._max_in_flight:
+            config = next(self._configs, None)
+            if config is None:
+                return
+            self._pending.append(self._executor.submit(self._get_response, config))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._ready:
+            self._submit()
+            if not self._pending:
+                raise StopIteration
+            response = self._pending.popleft().result()
+            self._submit()
+            self._ready.extend(response if self._batched else [response])
+        return self._ready.popleft()
+
+    def close(self):
+        """Stop sending the requests.
+
+        The requests not started are cancelled, and the ones being sent are waited for.
+
+        Returns:
+            A list of the responses received but not consumed.
+        """
+        self._configs = iter(())
+        responses = list(self._ready)
+        self._ready.clear()
+        while self._pending:
+            future = self._pending.popleft()
+            if future.cancel():
+                continue
+            try:
+                response = future.result()
+            except Exception:
+                continue
+            responses.extend(response if self._batched else [response])
+        return responses
+
+
 class Completion:
     """A class for OpenAI API completion."""
 
@@ -69,9 +342,33 @@ class Completion:
     retry_time = 10
     # fail a request after hitting RateLimitError for this many seconds
     retry_timeout = 60
+    # max number of requests sent concurrently in eval()
+    num_concurrent_requests = 1
+    # rate limits shared by all the requests, None means no limit
+    requests_per_minute = None
+    tokens_per_minute = None
+    # max number of prompts packed into one request in eval()
+    batch_size = 1
+    # max estimated number of prompt and completion tokens of one request, None means no limit
+    max_tokens_per_request = None
+    _executor = None
+    _rate_limiter = None
+    # settings of the response cache
+    memory_cache_size = 1024
+    cache_size_limit = None
+    cache_ttl = None
+    cache_compress = False
 
     @classmethod
-    def set_cache(cls, seed=41, cache_path=".cache"):
+    def set_cache(
+        cls,
+        seed=41,
+        cache_path=".cache",
+        memory_cache_size=1024,
+        size_limit=None,
+        ttl=None,
+        compress=False,
+    ):
         """Set cache path.
 
         Args:
@@ -79,26 +376,267 @@ class Completion:
                 Results corresponding to different seeds will be cached in different places.
             cache_path (str, Optional): The root path for the cache.
                 The complete cache path will be {cache_path}/{seed}.
+            memory_cache_size (int, Optional): The max number of responses kept in memory
+                in front of the disk cache. 0 disables the memory tier.
+            size_limit (int, Optional): The max size of the disk cache in bytes.
+                The least recently used responses are evicted beyond it.
+            ttl (float, Optional): The time to live of a cached response in seconds.
+            compress (bool, Optional): Whether to compress the responses stored on disk.
         """
         cls.seed = seed
         cls.cache_path = f"{cache_path}/{seed}"
+        cls.memory_cache_size = memory_cache_size
+        cls.cache_size_limit = size_limit
+        cls.cache_ttl = ttl
+        cls.cache_compress = compress
+
+    @classmethod
+    def _open_cache(cls):
+        return ResponseCache(
+            cls.cache_path,
+            memory_size=cls.memory_cache_size,
+            size_limit=cls.cache_size_limit,
+            ttl=cls.cache_ttl,
+            compress=cls.cache_compress,
+        )
+
+    @classmethod
+    def cache_stats(cls):
+        """Get the hit/miss and latency counters of the response cache.
+
+        Returns:
+            dict: The number of memory_hits, disk_hits, misses, coalesced requests
+                and api_calls, and the total api_time in seconds.
+        """
+        cache = getattr(cls, "_cache", None)
+        return dict(cache.stats) if cache is not None else {}
+
+    @classmethod
+    def set_concurrency(
+        cls,
+        num_concurrent_requests=1,
+        requests_per_minute=None,
+        tokens_per_minute=None,
+    ):
+        """Set the concurrency and rate limits of the api calls in eval().
+
+        Args:
+            num_concurrent_requests (int, Optional): The max number of requests sent concurrently.
+            requests_per_minute (float, Optional): The max number of requests per minute.
+            tokens_per_minute (float, Optional): The max number of tokens per minute.
+        """
+        cls.num_concurrent_requests = num_concurrent_requests
+        cls.requests_per_minute = requests_per_minute
+        cls.tokens_per_minute = tokens_per_minute
+
+    @classmethod
+    def set_batching(cls, batch_size=1, max_tokens_per_request=None):
+        """Set the batching of prompts in eval().
+
+        The prompts of consecutive data instances are packed into one api call,
+        which reduces the number of requests.
+
+        Args:
+            batch_size (int, Optional): The max number of prompts in one request.
+            max_tokens_per_request (int, Optional): The max estimated number of prompt
+                and completion tokens in one request.
+        """
+        cls.batch_size = batch_size
+        cls.max_tokens_per_request = max_tokens_per_request
+
+    @classmethod
+    def _get_rate_limiter(cls):
+        limiter = cls._rate_limiter
+        if not (cls.requests_per_minute or cls.tokens_per_minute):
+            return None
+        if (
+            limiter is None
+            or limiter.requests_per_minute != cls.requests_per_minute
+            or limiter.tokens_per_minute != cls.tokens_per_minute
+        ):
+            limiter = cls._rate_limiter = RateLimiter(
+                cls.requests_per_minute, cls.tokens_per_minute
+            )
+        return limiter
+
+    @classmethod
+    def _get_responses(cls, configs: list, eval_only=False):
+        """Get the responses of a list of configs in order.
+
+        The requests are sent concurrently by a thread pool kept across calls, so the
+        http session of each thread is reused. At most num_concurrent_requests requests
+        are in flight, and the rest are sent as the responses are consumed. If
+        num_concurrent_requests is 1, the requests are sent lazily one after another.
+        If batch_size > 1, the prompts of consecutive configs are packed into one request.
+
+        Returns:
+            An iterator of the responses, or a _ResponseStream when the requests are
+            sent concurrently. Its close() stops sending the requests.
+        """
+        batched = cls.batch_size > 1 and len(configs) > 1
+        if batched:
+            get_response = partial(cls._get_batch_response, eval_only=eval_only)
+            configs = cls._make_batches(configs)
+        else:
+            get_response = partial(cls._get_response, eval_only=eval_only)
+        if cls.num_concurrent_requests <= 1 or len(configs) <= 1:
+            responses = map(get_response, configs)
+        else:
+            executor = cls._executor
+            if executor is None or executor._max_workers != cls.num_concurrent_requests:
+                from concurrent.futures import ThreadPoolExecutor
+
+                if executor is not None:
+                    executor.shutdown(wait=False)
+                executor = cls._executor = ThreadPoolExecutor(
+                    max_workers=cls.num_concurrent_requests
+                )
+            return _ResponseStream(
+                executor, get_response, configs, cls.num_concurrent_requests, batched
+            )
+        if batched:
+            return chain.from_iterable(responses)
+        return responses
+
+    @classmethod
+    def _close_responses(cls, responses, model):
+        """Stop the requests of the responses not consumed, and add the cost of the
+        ones which have been sent to the total cost.
+
+        Returns:
+            A float of the cost of the responses not consumed.
+        """
+        if not isinstance(responses, _ResponseStream):
+            return 0
+        cost = sum(
+            response["usage"]["total_tokens"] * cls.price1K[model] / 1000
+            for response in responses.close()
+            if response != -1
+        )
+        cls._total_cost += cost
+        return cost
+
+    @staticmethod
+    def _estimate_tokens(config):
+        # roughly 4 characters per token for the prompt, plus the max completion tokens
+        return len(config["prompt"]) // 4 + config.get("max_tokens", 16) * config.get(
+            "best_of", config.get("n", 1)
+        )
+
+    @classmethod
+    def _make_batches(cls, configs: list):
+        """Split a list of configs into batches of at most batch_size and max_tokens_per_request."""
+        batches, batch, batch_tokens = [], [], 0
+        for config in configs:
+            n_tokens = cls._estimate_tokens(config)
+            if batch and (
+                len(batch) >= cls.batch_size
+                or cls.max_tokens_per_request
+                and batch_tokens + n_tokens > cls.max_tokens_per_request
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(config)
+            batch_tokens += n_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def _split_response(response, prompts: list, n: int):
+        """Split the response of a request with a list of prompts into one response per prompt.
+
+        The choices of the i-th prompt have index in [i * n, (i + 1) * n). The prompt tokens
+        are attributed proportionally to the prompt lengths, and the completion tokens
+        proportionally to the lengths of the completions.
+        """
+        if response == -1:
+            return [-1] * len(prompts)
+        choices = [[] for _ in prompts]
+        for choice in response["choices"]:
+            choices[choice["index"] // n].append(
+                dict(choice, index=choice["index"] % n)
+            )
+        usage = response["usage"]
+        prompt_tokens = usage.get(
+            "prompt_tokens", usage["total_tokens"] - usage["completion_tokens"]
+        )
+        prompt_len = sum(len(prompt) for prompt in prompts) or 1
+        completion_lens = [sum(len(c["text"]) for c in choice) for choice in choices]
+        completion_len = sum(completion_lens) or 1
+        responses = []
+        for prompt, choice, completion_len_i in zip(prompts, choices, completion_lens):
+            instance_prompt_tokens = prompt_tokens * len(prompt) / prompt_len
+            instance_completion_tokens = (
+                usage["completion_tokens"] * completion_len_i / completion_len
+            )
+            responses.append(
+                dict(
+                    response,
+                    choices=choice,
+                    usage={
+                        "prompt_tokens": instance_prompt_tokens,
+                        "completion_tokens": instance_completion_tokens,
+                        "total_tokens": instance_prompt_tokens
+                        + instance_completion_tokens,
+                    },
+                )
+            )
+        return responses
+
+    @classmethod
+    def _get_batch_response(cls, configs: list, eval_only=False):
+        """Get the responses of a batch of configs which only differ in the prompt.
+
+        Try cache first for each config. The prompts not found are sent in one api call,
+        and the split responses are cached per prompt.
+        """
+        if len(configs) == 1:
+            return [cls._get_response(configs[0], eval_only)]
+        keys = [get_key(config) for config in configs]
+        responses = [cls._cache.get(key) for key in keys]
+        missing = [
+            i
+            for i, response in enumerate(responses)
+            if response is None or response == -1 and eval_only
+        ]
+        if not missing:
+            return responses
+        prompts = [configs[i]["prompt"] for i in missing]
+        start_time = time.perf_counter()
+        response = cls._call_api(dict(configs[0], prompt=prompts), eval_only)
+        cls._cache.record_call(time.perf_counter() - start_time)
+        split = cls._split_response(response, prompts, configs[0].get("n", 1))
+        for i, response in zip(missing, split):
+            cls._cache.set(keys[i], response)
+            responses[i] = response
+        return responses
 
     @classmethod
     def _get_response(cls, config: dict, eval_only=False):
         """Get the response from the openai api call.
 
-        Try cache first. If not found, call the openai api. If the api call fails, retry after retry_time.
+        Try cache first. If not found, call the openai api. Identical requests in flight
+        are coalesced into one api call.
         """
-        key = get_key(config)
-        response = cls._cache.get(key, None)
-        if response is not None and (response != -1 or not eval_only):
-            # print("using cached response")
-            return response
+        return cls._cache.get_or_call(
+            get_key(config),
+            partial(cls._call_api, config, eval_only),
+            accept=lambda response: response != -1 or not eval_only,
+        )
+
+    @classmethod
+    def _call_api(cls, config: dict, eval_only=False):
+        """Call the openai api. If the api call fails, retry after retry_time with a random jitter."""
         retry = 0
+        rate_limiter = cls._get_rate_limiter()
         while eval_only or retry * cls.retry_time < cls.retry_timeout:
+            if rate_limiter:
+                rate_limiter.acquire()
             try:
                 response = openai.Completion.create(**config)
-                cls._cache.set(key, response)
+                if rate_limiter:
+                    rate_limiter.consume(response["usage"]["total_tokens"])
                 return response
             except (
                 ServiceUnavailableError,
@@ -106,10 +644,11 @@ class Completion:
                 APIConnectionError,
             ):
                 logger.info(f"retrying in {cls.retry_time} seconds...", exc_info=1)
-                sleep(cls.retry_time)
+                sleep(cls.retry_time * random.uniform(0.5, 1.5))
             except RateLimitError:
                 logger.info(f"retrying in {cls.retry_time} seconds...", exc_info=1)
                 retry += 1
+                sleep(cls.retry_time * random.uniform(0.5, 1.5))
             except InvalidRequestError:
                 if "model" in config:
                     config = config.copy()
@@ -119,9 +658,7 @@ class Completion:
         logger.warning(
             f"Failed to get response from openai api due to getting RateLimitError for {cls.retry_timeout} seconds."
         )
-        response = -1
-        cls._cache.set(key, response)
-        return response
+        return -1
 
     @classmethod
     def _get_max_valid_n(cls, key, max_tokens):
@@ -224,11 +761,18 @@ class Completion:
             data_early_stop = False  # whether data early stop happens for this n
             while True:  # data_limit <= data_length
                 # limit the number of data points to avoid rate limit
-                for i in range(prev_data_limit, data_limit):
-                    data_i = data[i]
-                    params["prompt"] = prompt.format(**data_i)
-                    response = cls._get_response(params, eval_only)
+                responses_iter = cls._get_responses(
+                    [
+                        dict(params, prompt=prompt.format(**data[i]))
+                        for i in range(prev_data_limit, data_limit)
+                    ],
+                    eval_only,
+                )
+                for i, response in zip(
+                    range(prev_data_limit, data_limit), responses_iter
+                ):
                     if response == -1:  # rate limit error, treat as invalid
+                        cost += cls._close_responses(responses_iter, config["model"])
                         cls._update_invalid_n(
                             prune, region_key, max_tokens, num_completions
                         )
@@ -257,6 +801,7 @@ class Completion:
                         and not eval_only
                     ):
                         # limit the total tuning cost
+                        cost += cls._close_responses(responses_iter, config["model"])
                         return {
                             metric: 0,
                             "total_cost": cls._total_cost,
@@ -398,7 +943,7 @@ class Completion:
                 logger.warning(
                     "temperature and top_p are not recommended to vary together."
                 )
-        with diskcache.Cache(cls.cache_path) as cls._cache:
+        with cls._open_cache() as cls._cache:
             cls._max_valid_n_per_max_tokens, cls._min_invalid_n_per_max_tokens = {}, {}
             cls.optimization_budget = optimization_budget
             cls.inference_budget = inference_budget
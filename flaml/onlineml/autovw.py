@@ -1,5 +1,9 @@
 from typing import Optional, Union
 import logging
+import os
+import pickle
+import shutil
+import numpy as np
 from flaml.tune import (
     Trial,
     Categorical,
@@ -21,6 +25,7 @@ class AutoVW:
     WARMSTART_NUM = 100
     AUTOMATIC = "_auto"
     VW_INTERACTION_ARG_NAME = "interactions"
+    MANIFEST_NAME = "autovw.pkl"
 
     def __init__(
         self,
@@ -35,6 +40,7 @@ class AutoVW:
         random_seed: Optional[int] = None,
         model_selection_mode: Optional[str] = "min",
         cb_coef: Optional[float] = None,
+        challenger_priority: Optional[str] = None,
     ):
         """Constructor.
 
@@ -59,6 +65,7 @@ class AutoVW:
         automl_runner_args = {
             "champion_test_policy": 'loss_ucb', # the statistic test for a better champion
             "remove_worse": False,              # whether to do worse than test
+            "num_workers": 0,                   # the number of worker processes to train the live models in learn_batch()
         }
         ```
 
@@ -87,6 +94,11 @@ class AutoVW:
             model_selection_mode: A string in ['min', 'max'] to specify the objective as
                 minimization or maximization.
             cb_coef: A float coefficient (optional) used in the sample complexity bound.
+            challenger_priority: A string to specify the order to try the new namespace
+                interactions generated from a champion. None means a random order.
+                'cost' means the interactions with lower feature dimension are tried first.
+                'success' means the interactions whose namespaces were more often in the
+                interactions added by the previous champions are tried first.
         """
         self._max_live_model_num = max_live_model_num
         self._search_space = search_space
@@ -101,6 +113,7 @@ class AutoVW:
         self._model_select_policy = model_select_policy
         self._model_selection_mode = model_selection_mode
         self._random_seed = random_seed
+        self._challenger_priority = challenger_priority
         self._trial_runner = None
         self._best_trial = None
         # code for debugging purpose
@@ -111,11 +124,10 @@ class AutoVW:
         """Set up the _trial_runner based on one vw_example."""
         # setup the default search space for the namespace interaction hyperparameter
         search_space = self._search_space.copy()
+        namespace_feature_dim = self.get_ns_feature_dim_from_vw_example(vw_example)
         for k, v in self._search_space.items():
             if k == self.VW_INTERACTION_ARG_NAME and v == self.AUTOMATIC:
-                raw_namespaces = self.get_ns_feature_dim_from_vw_example(
-                    vw_example
-                ).keys()
+                raw_namespaces = namespace_feature_dim.keys()
                 search_space[k] = polynomial_expansion_set(
                     init_monomials=set(raw_namespaces)
                 )
@@ -132,6 +144,8 @@ class AutoVW:
             "space": search_space,
             "random_seed": self._random_seed,
             "online_trial_args": self._online_trial_args,
+            "challenger_priority": self._challenger_priority,
+            "namespace_feature_dim": namespace_feature_dim,
         }
         logger.info("original search_space %s", self._search_space)
         logger.info("original init_config %s", self._init_config)
@@ -144,7 +158,7 @@ class AutoVW:
             max_live_model_num=self._max_live_model_num,
             searcher=searcher,
             scheduler=scheduler,
-            **self._automl_runner_args
+            **self._automl_runner_args,
         )
 
     def predict(self, data_sample):
@@ -153,10 +167,32 @@ class AutoVW:
         Args:
             data_sample: one data example in vw format.
         """
+        self._update_prediction_trial(data_sample)
+        self._y_predict = self._best_trial.predict(data_sample)
+        self._log_prediction_trial()
+        return self._y_predict
+
+    def predict_batch(self, data_samples: list):
+        """Predict on a batch of data samples.
+
+        Args:
+            data_samples: A list of data examples in vw format.
+
+        Returns:
+            A numpy array of the predictions.
+        """
+        self._update_prediction_trial(data_samples[0])
+        y_predict = self._best_trial.predict_batch(data_samples)
+        self._log_prediction_trial()
+        return y_predict
+
+    def _update_prediction_trial(self, data_sample):
+        """Select the trial to make predictions with."""
         if self._trial_runner is None:
             self._setup_trial_runner(data_sample)
         self._best_trial = self._select_best_trial()
-        self._y_predict = self._best_trial.predict(data_sample)
+
+    def _log_prediction_trial(self):
         # code for debugging purpose
         if (
             self._prediction_trial_id is None
@@ -169,7 +205,6 @@ class AutoVW:
                 self._iter,
                 self._best_trial.result.resource_used,
             )
-        return self._y_predict
 
     def learn(self, data_sample):
         """Perform one online learning step with the given data sample.
@@ -181,23 +216,106 @@ class AutoVW:
         self._iter += 1
         self._trial_runner.step(data_sample, (self._y_predict, self._best_trial))
 
+    def learn_batch(self, data_samples: list):
+        """Perform online learning with a batch of data samples.
+
+        Every live model learns from the batch, one example after another, and the
+        champion tests and scheduling are done once per batch.
+
+        Args:
+            data_samples: A list of data examples in vw format.
+        """
+        if not data_samples:
+            return
+        if self._trial_runner is None:
+            self._setup_trial_runner(data_samples[0])
+        self._iter += len(data_samples)
+        self._trial_runner.step_batch(data_samples)
+
+    def save(self, path: str):
+        """Save the full state into a directory.
+
+        The vw models of the live trials are saved in their native binary format,
+        and the rest of the state, including the statistics, the searcher and the
+        scheduler, in a pickled manifest. The directory is replaced atomically, so
+        calling save() periodically keeps the last complete snapshot.
+
+        Args:
+            path: A string of the directory to save the state in.
+        """
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        model_files = {}
+        if self._trial_runner is not None:
+            for i, trial in enumerate(self._trial_runner.running_trials):
+                if trial.model is not None:
+                    filename = f"model_{i}.vw"
+                    trial.model.save(os.path.join(os.path.abspath(tmp_path), filename))
+                    model_files[trial.trial_id] = filename
+        with open(os.path.join(tmp_path, self.MANIFEST_NAME), "wb") as f:
+            pickle.dump(
+                {"autovw": self, "model_files": model_files},
+                f,
+                pickle.HIGHEST_PROTOCOL,
+            )
+        old_path = f"{path}.old"
+        if os.path.exists(path):
+            # a backup left by a crashed save is stale, since path is complete
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> "AutoVW":
+        """Load an AutoVW instance saved by save().
+
+        If a save() crashed after moving the previous snapshot aside, the
+        previous snapshot is loaded from "{path}.old".
+
+        Args:
+            path: A string of the directory the state is saved in.
+
+        Returns:
+            An AutoVW instance which continues from the saved state.
+        """
+        if not os.path.exists(path) and os.path.exists(f"{path}.old"):
+            path = f"{path}.old"
+        with open(os.path.join(path, cls.MANIFEST_NAME), "rb") as f:
+            state = pickle.load(f)
+        autovw, model_files = state["autovw"], state["model_files"]
+        if autovw._trial_runner is not None:
+            for trial in autovw._trial_runner.get_trials():
+                filename = model_files.get(trial.trial_id)
+                if filename is not None:
+                    trial.load_model(os.path.join(os.path.abspath(path), filename))
+        return autovw
+
+    def close(self):
+        """Stop the worker processes which train the live models, if any."""
+        if self._trial_runner is not None:
+            self._trial_runner.close()
+
     def _select_best_trial(self):
         """Select a best trial from the running trials according to the _model_select_policy."""
-        best_score = (
-            float("+inf") if self._model_selection_mode == "min" else float("-inf")
-        )
         new_best_trial = None
-        for trial in self._trial_runner.running_trials:
-            if trial.result is not None and (
-                "threshold" not in self._model_select_policy
-                or trial.result.resource_used >= self.WARMSTART_NUM
-            ):
-                score = trial.result.get_score(self._model_select_policy)
-                if ("min" == self._model_selection_mode and score < best_score) or (
-                    "max" == self._model_selection_mode and score > best_score
-                ):
-                    best_score = score
-                    new_best_trial = trial
+        trials = [
+            trial
+            for trial in self._trial_runner.running_trials
+            if trial.result is not None
+        ]
+        if trials:
+            result_store = self._trial_runner.result_store
+            rows = [trial.result.row for trial in trials]
+            scores = result_store.get_scores(rows, self._model_select_policy)
+            if "min" != self._model_selection_mode:
+                scores = -scores
+            if "threshold" in self._model_select_policy:
+                scores[result_store.resource_used[rows] < self.WARMSTART_NUM] = np.inf
+            best_index = np.argmin(scores)
+            if scores[best_index] < np.inf:
+                new_best_trial = trials[best_index]
         if new_best_trial is not None:
             logger.debug(
                 "best_trial resource used: %s", new_best_trial.result.resource_used
@@ -4,6 +4,8 @@ import time
 import math
 import copy
 import collections
+import itertools
+import multiprocessing
 from typing import Optional, Union
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 from flaml.tune import Trial
@@ -46,6 +48,80 @@ def get_ns_feature_dim_from_vw_example(vw_example) -> dict:
     return ns_feature_dim
 
 
+def _learn_batch(model, data_samples) -> np.ndarray:
+    """Predict on and then learn from each data sample, and return the predictions."""
+    y_pred = np.empty(len(data_samples))
+    for i, data_sample in enumerate(data_samples):
+        example = model.parse(data_sample)
+        y_pred[i] = model.predict(example)
+        model.learn(example)
+        model.finish_example(example)
+    return y_pred
+
+
+class OnlineResultStore:
+    """An array-backed store of the result statistics of online trials.
+
+    The statistics are kept as a struct of arrays with one row per OnlineResult,
+    so the tests across many trials can be done with vectorized numpy operations.
+    """
+
+    FIELDS = ("loss_avg", "loss_cb", "observation_count", "resource_used")
+
+    def __init__(self, capacity: Optional[int] = 16):
+        """Constructor.
+
+        Args:
+            capacity: An int of the initial number of rows. The store grows as needed.
+        """
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros(capacity))
+        self._free_rows = list(range(capacity - 1, -1, -1))
+
+    def allocate(self) -> int:
+        """Allocate a row and return its index."""
+        if not self._free_rows:
+            capacity = len(self.loss_avg)
+            for field in self.FIELDS:
+                setattr(
+                    self,
+                    field,
+                    np.concatenate([getattr(self, field), np.zeros(capacity)]),
+                )
+            self._free_rows = list(range(2 * capacity - 1, capacity - 1, -1))
+        return self._free_rows.pop()
+
+    def release(self, row: int):
+        """Release a row to be reused."""
+        self._free_rows.append(row)
+
+    def get_scores(self, rows, score_name, cb_ratio=1) -> np.ndarray:
+        """Get the scores of the given rows as in OnlineResult.get_score."""
+        loss_avg = self.loss_avg[rows]
+        if "lcb" in score_name:
+            return np.maximum(
+                loss_avg - cb_ratio * self.loss_cb[rows], OnlineResult.LOSS_MIN
+            )
+        elif "ucb" in score_name:
+            return np.minimum(
+                loss_avg + cb_ratio * self.loss_cb[rows], OnlineResult.LOSS_MAX
+            )
+        elif "avg" in score_name:
+            return loss_avg
+        else:
+            raise NotImplementedError
+
+
+def _store_field(field):
+    def fget(self):
+        return float(getattr(self._store, field)[self.row])
+
+    def fset(self, value):
+        getattr(self._store, field)[self.row] = value
+
+    return property(fget, fset)
+
+
 class OnlineResult:
     """Class for managing the result statistics of a trial."""
 
@@ -62,6 +138,7 @@ class OnlineResult:
         init_cb: Optional[float] = 100.0,
         mode: Optional[str] = "min",
         sliding_window_size: Optional[int] = 100,
+        store: Optional[OnlineResultStore] = None,
     ):
         """Constructor.
 
@@ -74,11 +151,15 @@ class OnlineResult:
                 minimization or maximization.
             sliding_window_size: An int to specify the size of the sliding windown
                 (for experimental purpose).
+            store: An OnlineResultStore to keep the statistics in. If None, a store
+                of this result only is created.
         """
         self._result_type_name = result_type_name  # for example 'mse' or 'mae'
         self._mode = mode
         self._init_loss = init_loss
-        # statistics needed for alg
+        # statistics needed for alg, kept in a row of the store
+        self._store = store if store is not None else OnlineResultStore(1)
+        self.row = self._store.allocate()
         self.observation_count = 0
         self.resource_used = 0.0
         self._loss_avg = 0.0
@@ -88,6 +169,15 @@ class OnlineResult:
         self._sliding_window_size = sliding_window_size
         self._loss_queue = collections.deque(maxlen=self._sliding_window_size)
 
+    observation_count = _store_field("observation_count")
+    resource_used = _store_field("resource_used")
+    _loss_avg = _store_field("loss_avg")
+    _loss_cb = _store_field("loss_cb")
+
+    def release(self):
+        """Release the row of the statistics in the store."""
+        self._store.release(self.row)
+
     def update_result(
         self,
         new_loss,
@@ -97,14 +187,47 @@ class OnlineResult:
         new_observation_count=1.0,
     ):
         """Update result statistics."""
+        self._update_statistics(
+            new_loss,
+            new_resource_used,
+            data_dimension,
+            bound_of_range,
+            new_observation_count,
+        )
+        self._loss_queue.append(new_loss)
+
+    def update_result_batch(
+        self,
+        new_losses,
+        new_resource_used,
+        data_dimension,
+        bound_of_range=1.0,
+    ):
+        """Update result statistics with the losses of a batch of observations."""
+        self._update_statistics(
+            np.sum(new_losses),
+            new_resource_used,
+            data_dimension,
+            bound_of_range,
+            len(new_losses),
+        )
+        self._loss_queue.extend(new_losses[-self._sliding_window_size :])
+
+    def _update_statistics(
+        self,
+        loss_sum,
+        new_resource_used,
+        data_dimension,
+        bound_of_range,
+        new_observation_count,
+    ):
         self.resource_used += new_resource_used
         # keep the running average instead of sum of loss to avoid over overflow
         self._loss_avg = self._loss_avg * (
             self.observation_count / (self.observation_count + new_observation_count)
-        ) + new_loss / (self.observation_count + new_observation_count)
+        ) + loss_sum / (self.observation_count + new_observation_count)
         self.observation_count += new_observation_count
         self._loss_cb = self._update_loss_cb(bound_of_range, data_dimension)
-        self._loss_queue.append(new_loss)
 
     def _update_loss_cb(
         self, bound_of_range, data_dim, bound_name="sample_complexity_bound"
@@ -299,6 +422,8 @@ class VowpalWabbitTrial(BaseOnlineTrial):
         self.model = None  # model is None until the config is scheduled to run
         self.result = None
         self.trainable_class = pyvw.vw
+        # the OnlineResultStore to keep the result statistics in
+        self.result_store = None
         # variables that are needed during online training
         self._metric = metric
         self._y_min_observed = None
@@ -324,7 +449,7 @@ class VowpalWabbitTrial(BaseOnlineTrial):
             config_id_full = config_id_full + config_id
         return config_id_full
 
-    def _initialize_vw_model(self, vw_example):
+    def _initialize_vw_model(self, vw_example, init_result=True):
         """Initialize a vw model using the trainable_class"""
         self._vw_config = self.config.copy()
         ns_interactions = self.config.get(
@@ -338,15 +463,39 @@ class VowpalWabbitTrial(BaseOnlineTrial):
         # get the dimensionality of the feature according to the namespace configuration
         namespace_feature_dim = get_ns_feature_dim_from_vw_example(vw_example)
         self._dim = self._get_dim_from_ns(namespace_feature_dim, ns_interactions)
+        # keep the extra state needed to resume learning from a saved model
+        self._vw_config.setdefault("save_resume", True)
         # construct an instance of vw model using the input config and fixed config
         self.model = self.trainable_class(**self._vw_config)
+        if init_result:
+            self._initialize_result()
+
+    def _initialize_result(self):
         self.result = OnlineResult(
             self._metric,
             cb_coef=self._cb_coef,
             init_loss=0.0,
             init_cb=100.0,
+            store=self.result_store,
         )
 
+    def load_model(self, filename):
+        """Load the model saved in a file by model.save(filename)."""
+        self.model = self.trainable_class(**self._vw_config, initial_regressor=filename)
+
+    def __getstate__(self):
+        # the model is saved separately in its native format
+        state = self.__dict__.copy()
+        state["model"] = None
+        del state["trainable_class"]
+        return state
+
+    def __setstate__(self, state):
+        from vowpalwabbit import pyvw
+
+        self.__dict__.update(state)
+        self.trainable_class = pyvw.vw
+
     def train_eval_model_online(self, data_sample, y_pred):
         """Train and evaluate model online."""
         # extract info needed the first time we see the data
@@ -376,6 +525,48 @@ class VowpalWabbitTrial(BaseOnlineTrial):
             bound_of_range,
         )
 
+    def train_eval_model_online_batch(self, data_samples, y=None, y_pred=None):
+        """Train and evaluate model online on a batch of data samples.
+
+        Each sample is parsed once, predicted on and then learned from, so the
+        progressive validation loss is the same as calling train_eval_model_online
+        on each sample in order.
+
+        Args:
+            data_samples: A list of data examples in vw format.
+            y: A numpy array of the labels of data_samples. Parsed from data_samples if None.
+            y_pred: A numpy array of the predictions made before learning each sample,
+                if the model has already learned from data_samples in a worker process.
+        """
+        if y is None:
+            y = np.array([self._get_y_from_vw_example(x) for x in data_samples])
+        if self.model is None:
+            # initialize self.model and self.result
+            self._initialize_vw_model(data_samples[0])
+        elif self.result is None:
+            self._initialize_result()
+        if self._resource_lease == "auto" or self._resource_lease is None:
+            self._resource_lease = self._dim * self.MIN_RES_CONST
+        if y_pred is None:
+            y_pred = _learn_batch(self.model, data_samples)
+        # the observed range of y when each sample is learned
+        y_min = np.minimum.accumulate(y)
+        y_max = np.maximum.accumulate(y)
+        if self._y_min_observed is not None:
+            y_min = np.minimum(y_min, self._y_min_observed)
+            y_max = np.maximum(y_max, self._y_max_observed)
+        self._y_min_observed, self._y_max_observed = y_min[-1], y_max[-1]
+        new_losses = self._get_losses(y, y_pred, self._metric, y_min, y_max)
+        bound_of_range = self._y_max_observed - self._y_min_observed
+        if bound_of_range == 0:
+            bound_of_range = 1.0
+        self.result.update_result_batch(
+            new_losses,
+            VowpalWabbitTrial.cost_unit * len(data_samples),
+            self._dim,
+            bound_of_range,
+        )
+
     def predict(self, x):
         """Predict using the model."""
         if self.model is None:
@@ -383,6 +574,29 @@ class VowpalWabbitTrial(BaseOnlineTrial):
             self._initialize_vw_model(x)
         return self.model.predict(x)
 
+    def predict_batch(self, data_samples):
+        """Predict on a list of data samples using the model."""
+        if self.model is None:
+            # initialize self.model and self.result
+            self._initialize_vw_model(data_samples[0])
+        if isinstance(self.model, RemoteVowpalWabbitModel):
+            return self.model.predict_batch(data_samples)
+        return np.array([self.model.predict(x) for x in data_samples])
+
+    @staticmethod
+    def _get_losses(y_true, y_pred, loss_func_name, y_min_observed, y_max_observed):
+        """Get the instantaneous losses of numpy arrays y_true and y_pred.
+        For mae_clip, y_pred is clipped in the observed range of y, given as arrays.
+        """
+        if "mse" in loss_func_name or "squared" in loss_func_name:
+            return (y_true - y_pred) ** 2
+        elif "mae" in loss_func_name or "absolute" in loss_func_name:
+            if "clip" in loss_func_name:
+                y_pred = np.minimum(y_max_observed, np.maximum(y_pred, y_min_observed))
+            return np.abs(y_true - y_pred)
+        else:
+            raise NotImplementedError
+
     def _get_loss(self, y_true, y_pred, loss_func_name, y_min_observed, y_max_observed):
         """Get instantaneous loss from y_true and y_pred, and loss_func_name
         For mae_clip, we clip y_pred in the observed range of y
@@ -424,6 +638,11 @@ class VowpalWabbitTrial(BaseOnlineTrial):
         return total_dim
 
     def clean_up_model(self):
+        if isinstance(self.model, RemoteVowpalWabbitModel):
+            # release the model in the worker process
+            self.model.finish()
+        if self.result is not None:
+            self.result.release()
         self.model = None
         self.result = None
 
@@ -431,3 +650,172 @@ class VowpalWabbitTrial(BaseOnlineTrial):
     def _get_y_from_vw_example(vw_example):
         """Get y from a vw_example. this works for regression datasets."""
         return float(vw_example.split("|")[0])
+
+
+def _vw_worker(conn):
+    """The loop of a worker process which holds vw models and runs commands on them."""
+    from vowpalwabbit import pyvw
+
+    models = {}
+    while True:
+        command, *args = conn.recv()
+        if command == "close":
+            break
+        try:
+            if command == "create":
+                model_id, config = args
+                models[model_id] = pyvw.vw(**config)
+                result = None
+            elif command == "save":
+                model_id, filename = args
+                models[model_id].save(filename)
+                result = None
+            elif command == "finish":
+                models.pop(args[0]).finish()
+                result = None
+            elif command == "predict":
+                model_id, data_samples = args
+                result = np.array([models[model_id].predict(x) for x in data_samples])
+            elif command == "learn":
+                model_ids, data_samples = args
+                result = {
+                    model_id: _learn_batch(models[model_id], data_samples)
+                    for model_id in model_ids
+                }
+            else:
+                raise ValueError(f"Unknown command {command}.")
+            conn.send((None, result))
+        except Exception as e:
+            conn.send((e, None))
+    for model in models.values():
+        model.finish()
+    conn.close()
+
+
+class RemoteVowpalWabbitModel:
+    """A proxy of a vw model held by a worker process of a VowpalWabbitWorkerPool."""
+
+    def __init__(self, pool, worker, model_id):
+        self._pool = pool
+        self.worker = worker
+        self.model_id = model_id
+
+    def predict(self, x):
+        return self._pool.call(self.worker, "predict", self.model_id, [x])[0]
+
+    def predict_batch(self, data_samples):
+        return self._pool.call(self.worker, "predict", self.model_id, data_samples)
+
+    def learn(self, x):
+        self._pool.call(self.worker, "learn", [self.model_id], [x])
+
+    def save(self, filename):
+        self._pool.call(self.worker, "save", self.model_id, filename)
+
+    def finish(self):
+        self._pool.finish_model(self)
+
+
+class VowpalWabbitWorkerPool:
+    """A pool of long-lived worker processes which hold and train vw models.
+
+    The models of the live trials are sharded across the workers. A batch of
+    data samples is broadcast to all the workers, which train their models concurrently.
+    """
+
+    def __init__(self, num_workers: int, start_method: Optional[str] = None):
+        """Constructor.
+
+        Args:
+            num_workers: An int of the number of worker processes.
+            start_method: A string of the multiprocessing start method.
+                None means the platform default.
+        """
+        context = multiprocessing.get_context(start_method)
+        self._conns, self._processes = [], []
+        for _ in range(num_workers):
+            conn, worker_conn = context.Pipe()
+            process = context.Process(
+                target=_vw_worker, args=(worker_conn,), daemon=True
+            )
+            process.start()
+            worker_conn.close()
+            self._conns.append(conn)
+            self._processes.append(process)
+        self._num_models = [0] * num_workers
+        self._model_ids = itertools.count()
+
+    def _recv(self, worker):
+        error, result = self._conns[worker].recv()
+        if error is not None:
+            raise error
+        return result
+
+    def call(self, worker, command, *args):
+        """Run a command in a worker and wait for the result."""
+        self._conns[worker].send((command,) + args)
+        return self._recv(worker)
+
+    def create_model(self, **config) -> RemoteVowpalWabbitModel:
+        """Create a vw model in the least loaded worker.
+
+        It has the same signature as pyvw.vw, so it can be used as the
+        trainable_class of a VowpalWabbitTrial.
+        """
+        worker = int(np.argmin(self._num_models))
+        model_id = next(self._model_ids)
+        self.call(worker, "create", model_id, config)
+        self._num_models[worker] += 1
+        return RemoteVowpalWabbitModel(self, worker, model_id)
+
+    def finish_model(self, model: RemoteVowpalWabbitModel):
+        """Release a model in its worker."""
+        self.call(model.worker, "finish", model.model_id)
+        self._num_models[model.worker] -= 1
+
+    def learn_batch(self, trials: list, data_samples: list) -> dict:
+        """Train the models of the trials on a batch of data samples concurrently in the workers.
+
+        Args:
+            trials: A list of VowpalWabbitTrial whose trainable_class is create_model.
+            data_samples: A list of data examples in vw format.
+
+        Returns:
+            A dict from the trial_id to a numpy array of the predictions made
+            before learning each sample.
+        """
+        model_ids = collections.defaultdict(list)
+        trial_ids = {}
+        for trial in trials:
+            if trial.model is None:
+                # the result is initialized when the trial reports it
+                trial._initialize_vw_model(data_samples[0], init_result=False)
+            model_ids[trial.model.worker].append(trial.model.model_id)
+            trial_ids[trial.model.model_id] = trial.trial_id
+        # send the batch to all the workers before collecting any result
+        for worker, ids in model_ids.items():
+            self._conns[worker].send(("learn", ids, data_samples))
+        y_pred = {}
+        error = None
+        for worker in model_ids:
+            try:
+                for model_id, y_pred_model in self._recv(worker).items():
+                    y_pred[trial_ids[model_id]] = y_pred_model
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return y_pred
+
+    def close(self):
+        """Stop the worker processes."""
+        for conn, process in zip(self._conns, self._processes):
+            try:
+                conn.send(("close",))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+            conn.close()
+        self._conns, self._processes = [], []
@@ -2,6 +2,11 @@ import numpy as np
 import math
 from flaml.tune import Trial
 from flaml.tune.scheduler import TrialScheduler
+from flaml.onlineml.trial import (
+    OnlineResult,
+    OnlineResultStore,
+    VowpalWabbitWorkerPool,
+)
 
 import logging
 
@@ -50,6 +55,12 @@ class OnlineTrialRunner:
                 resources for the trials.
             champion_test_policy: A string to specify what test policy to test for
                 champion. Currently can choose from ['loss_ucb', 'loss_avg', 'loss_lcb', None].
+            **kwargs: Other settings, including
+                - remove_worse: A bool of whether to stop the trials worse than the champion.
+                - bound_trial_num: A bool of whether to bound the number of trials.
+                - num_workers: An int of the number of worker processes which hold and
+                    train the vw models of the live trials in step_batch(). Default is 0,
+                    i.e., the models are trained in the current process.
         """
         # ************A NOTE about the input searcher and scheduler******
         # Required methods of the searcher:
@@ -79,6 +90,10 @@ class OnlineTrialRunner:
         self._remove_worse = kwargs.get("remove_worse", True)
         self._bound_trial_num = kwargs.get("bound_trial_num", False)
         self._no_model_persistence = True
+        self._num_workers = kwargs.get("num_workers", 0)
+        self._worker_pool = (
+            VowpalWabbitWorkerPool(self._num_workers) if self._num_workers > 1 else None
+        )
 
         # stores all the trials added to the OnlineTrialRunner
         # i.e., include the champion and all the challengers
@@ -87,7 +102,10 @@ class OnlineTrialRunner:
         self._best_challenger_trial = None
         self._first_challenger_pool_size = None
         self._random_state = np.random.RandomState(self.RANDOM_SEED)
-        self._running_trials = set()
+        # the running trials, as the keys of a dict to iterate in a deterministic order
+        self._running_trials = {}
+        # the result statistics of all the trials, for vectorized tests
+        self._result_store = OnlineResultStore()
 
         # initially schedule up to max_live_model_num of live models and
         # set the first trial as the champion (which is done inside self.step())
@@ -102,10 +120,15 @@ class OnlineTrialRunner:
         """The champion trial."""
         return self._champion_trial
 
+    @property
+    def result_store(self) -> OnlineResultStore:
+        """The store of the result statistics of the trials."""
+        return self._result_store
+
     @property
     def running_trials(self):
         """The running/'live' trials."""
-        return self._running_trials
+        return self._running_trials.keys()
 
     def step(self, data_sample=None, prediction_trial_tuple=None):
         """Schedule one trial to run each time it is called.
@@ -137,46 +160,110 @@ class OnlineTrialRunner:
                 prediction_trial_tuple[1],
             )
             # assert prediction_trial.status == Trial.RUNNING
-            trials_to_pause = []
-            for trial in list(self._running_trials):
+
+            def train(trial):
                 if trial != prediction_trial:
                     y_predicted = trial.predict(data_sample)
                 else:
                     y_predicted = prediction_made
                 trial.train_eval_model_online(data_sample, y_predicted)
-                logger.debug(
-                    "running trial at iter %s %s %s %s %s %s",
-                    self._total_steps,
-                    trial.trial_id,
-                    trial.result.loss_avg,
-                    trial.result.loss_cb,
-                    trial.result.resource_used,
-                    trial.resource_lease,
+
+            self._update_running_trials(train)
+        self._schedule_trials()
+
+    def step_batch(self, data_samples: list):
+        """Perform one step with a batch of data examples.
+
+        Each running trial learns from the whole batch before the results are reported,
+        and the champion tests and scheduling are done once per batch.
+
+        Args:
+            data_samples: A list of data examples.
+        """
+        if data_samples:
+            self._total_steps += len(data_samples)
+            # parse the labels once for all the trials
+            y = np.array([float(x.split("|")[0]) for x in data_samples])
+            if self._worker_pool is None:
+                self._update_running_trials(
+                    lambda trial: trial.train_eval_model_online_batch(data_samples, y)
                 )
-                # report result to the searcher
-                self._searcher.on_trial_result(trial.trial_id, trial.result)
-                # report result to the scheduler and the scheduler makes a decision about
-                # the running status of the trial
-                decision = self._scheduler.on_trial_result(self, trial, trial.result)
-                # set the status of the trial according to the decision made by the scheduler
-                logger.debug(
-                    "trial decision %s %s at step %s",
-                    decision,
-                    trial.trial_id,
-                    self._total_steps,
+            else:
+                # train the models concurrently in the workers, and keep the
+                # statistics and the champion/challenger bookkeeping here
+                y_pred = self._worker_pool.learn_batch(
+                    list(self._running_trials), data_samples
                 )
-                if decision == TrialScheduler.STOP:
-                    self.stop_trial(trial)
-                elif decision == TrialScheduler.PAUSE:
-                    trials_to_pause.append(trial)
-                else:
-                    self.run_trial(trial)
-            # ***********Statistical test of champion*************************************
-            self._champion_test()
-            # Pause the trial after the tests because the tests involves the reset of the trial's result
-            for trial in trials_to_pause:
-                self.pause_trial(trial)
-        # ***********Add and schedule new trials to run if there are opening slots****
+                self._update_running_trials(
+                    lambda trial: trial.train_eval_model_online_batch(
+                        data_samples, y, y_pred[trial.trial_id]
+                    )
+                )
+        self._schedule_trials()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_worker_pool"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._num_workers > 1:
+            # restart the worker processes
+            self._worker_pool = VowpalWabbitWorkerPool(self._num_workers)
+            for trial in self._trials:
+                trial.trainable_class = self._worker_pool.create_model
+
+    def close(self):
+        """Stop the worker processes if any."""
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+            self._worker_pool = None
+
+    def _update_running_trials(self, train):
+        """Train the running trials, run the champion tests and apply the scheduler's decisions.
+
+        Args:
+            train: A function which trains and evaluates a trial on the observations.
+        """
+        trials_to_pause = []
+        for trial in list(self._running_trials):
+            train(trial)
+            logger.debug(
+                "running trial at iter %s %s %s %s %s %s",
+                self._total_steps,
+                trial.trial_id,
+                trial.result.loss_avg,
+                trial.result.loss_cb,
+                trial.result.resource_used,
+                trial.resource_lease,
+            )
+            # report result to the searcher
+            self._searcher.on_trial_result(trial.trial_id, trial.result)
+            # report result to the scheduler and the scheduler makes a decision about
+            # the running status of the trial
+            decision = self._scheduler.on_trial_result(self, trial, trial.result)
+            # set the status of the trial according to the decision made by the scheduler
+            logger.debug(
+                "trial decision %s %s at step %s",
+                decision,
+                trial.trial_id,
+                self._total_steps,
+            )
+            if decision == TrialScheduler.STOP:
+                self.stop_trial(trial)
+            elif decision == TrialScheduler.PAUSE:
+                trials_to_pause.append(trial)
+            else:
+                self.run_trial(trial)
+        # ***********Statistical test of champion*************************************
+        self._champion_test()
+        # Pause the trial after the tests because the tests involves the reset of the trial's result
+        for trial in trials_to_pause:
+            self.pause_trial(trial)
+
+    def _schedule_trials(self):
+        """Add and schedule new trials to run if there are opening slots."""
         # Add trial if needed: add challengers into consideration through _add_trial_from_searcher()
         # if there are available slots
         for _ in range(self._max_live_model_num - len(self._running_trials)):
@@ -214,18 +301,18 @@ class OnlineTrialRunner:
             test_attribute = "loss_lcb"
         else:
             raise NotImplementedError
-        top_running_valid_trials = []
         logger.info(
             "Running trial ids %s", [trial.trial_id for trial in running_valid_trials]
         )
         self._random_state.shuffle(running_valid_trials)
-        results = [
-            trial.result.get_score(test_attribute) for trial in running_valid_trials
-        ]
-        # sorted result (small to large) index
-        sorted_index = np.argsort(np.array(results))
-        for i in range(min(top_number, len(running_valid_trials))):
-            top_running_valid_trials.append(running_valid_trials[sorted_index[i]])
+        results = self._result_store.get_scores(
+            [trial.result.row for trial in running_valid_trials], test_attribute
+        )
+        # the indexes of the top_number smallest results, sorted (small to large)
+        top_number = min(top_number, len(running_valid_trials))
+        top_index = np.argpartition(results, top_number - 1)[:top_number]
+        top_index = top_index[np.argsort(results[top_index])]
+        top_running_valid_trials = [running_valid_trials[i] for i in top_index]
         logger.info(
             "Top running ids %s", [trial.trial_id for trial in top_running_valid_trials]
         )
@@ -294,14 +381,30 @@ class OnlineTrialRunner:
 
         # performs _worse_than_champion_test, which is an optional component in ChaCha
         if self._remove_worse:
-            to_stop = []
-            for trial_to_test in self._trials:
-                if trial_to_test.status != Trial.TERMINATED:
-                    worse_than_champion = self._worse_than_champion_test(
-                        self._champion_trial, trial_to_test, self.WARMSTART_NUM
-                    )
-                    if worse_than_champion:
-                        to_stop.append(trial_to_test)
+            trials_to_test = [
+                trial
+                for trial in self._trials
+                if trial.status != Trial.TERMINATED and trial.result is not None
+            ]
+            rows = [trial.result.row for trial in trials_to_test]
+            champion_result = self._champion_trial.result
+            is_worse = (
+                self._result_store.resource_used[rows] >= self.WARMSTART_NUM
+            ) & (
+                self._result_store.get_scores(rows, "lcb")
+                > (
+                    champion_result.loss_ucb
+                    if champion_result is not None
+                    else OnlineResult.LOSS_MAX
+                )
+            )
+            to_stop = [
+                trials_to_test[i]
+                for i in np.flatnonzero(is_worse)
+                if self._worse_than_champion_test(
+                    self._champion_trial, trials_to_test[i], self.WARMSTART_NUM
+                )
+            ]
             # we want to ensure there are at least #max_live_model_num of challengers remaining
             max_to_stop_num = (
                 len([t for t in self._trials if t.status != Trial.TERMINATED])
@@ -331,9 +434,9 @@ class OnlineTrialRunner:
         ]
         if active_trials:
             self._random_state.shuffle(active_trials)
-            results = [
-                trial.result.get_score(test_attribute) for trial in active_trials
-            ]
+            results = self._result_store.get_scores(
+                [trial.result.row for trial in active_trials], test_attribute
+            )
             best_index = np.argmin(results)
             self._best_challenger_trial = active_trials[best_index]
 
@@ -387,6 +490,9 @@ class OnlineTrialRunner:
             new_trial.trial_id,
             len(self._trials),
         )
+        new_trial.result_store = self._result_store
+        if self._worker_pool is not None:
+            new_trial.trainable_class = self._worker_pool.create_model
         self._trials.append(new_trial)
         self._scheduler.on_trial_add(self, new_trial)
 
@@ -407,7 +513,7 @@ class OnlineTrialRunner:
             trial.clean_up_model()
             self._scheduler.on_trial_remove(self, trial)
             self._searcher.on_trial_complete(trial.trial_id)
-            self._running_trials.remove(trial)
+            del self._running_trials[trial]
 
     def pause_trial(self, trial):
         """Pause a trial: set the status of a trial to be Trial.PAUSED
@@ -429,7 +535,7 @@ class OnlineTrialRunner:
             # clean up model and result if no model persistence
             if self._no_model_persistence:
                 trial.clean_up_model()
-            self._running_trials.remove(trial)
+            del self._running_trials[trial]
 
     def run_trial(self, trial):
         """Run a trial: set the status of a trial to be Trial.RUNNING
@@ -439,7 +545,7 @@ class OnlineTrialRunner:
             return
         else:
             trial.set_status(Trial.RUNNING)
-            self._running_trials.add(trial)
+            self._running_trials[trial] = None
 
     def _better_than_champion_test(self, trial_to_test):
         """Test whether there is a config in the existing trials that
@@ -1,40 +1,85 @@
-try:
-    from ray import __version__ as ray_version
-
-    assert ray_version >= "1.10.0"
-    from ray.tune import (
-        uniform,
-        quniform,
-        randint,
-        qrandint,
-        randn,
-        qrandn,
-        loguniform,
-        qloguniform,
-        lograndint,
-        qlograndint,
-    )
-
-    if ray_version.startswith("1."):
-        from ray.tune import sample
-    else:
-        from ray.tune.search import sample
-except (ImportError, AssertionError):
-    from .sample import (
-        uniform,
-        quniform,
-        randint,
-        qrandint,
-        randn,
-        qrandn,
-        loguniform,
-        qloguniform,
-        lograndint,
-        qlograndint,
-    )
-    from . import sample
-from .tune import run, report, INCUMBENT_RESULT
-from .sample import polynomial_expansion_set
-from .sample import PolynomialExpansionSet, Categorical, Float
-from .trial import Trial
-from .utils import choice
+import importlib
+import sys
+import types
+from flaml import _import_submodule
+
+# The public API is imported on the first access (PEP 562). Ray is detected when a
+# sampling function is first accessed, instead of when flaml.tune is imported.
+_SAMPLERS = (
+    "uniform",
+    "quniform",
+    "randint",
+    "qrandint",
+    "randn",
+    "qrandn",
+    "loguniform",
+    "qloguniform",
+    "lograndint",
+    "qlograndint",
+)
+_LAZY_ATTRS = {
+    "run": ".tune",
+    "report": ".tune",
+    "INCUMBENT_RESULT": ".tune",
+    "polynomial_expansion_set": ".sample",
+    "PolynomialExpansionSet": ".sample",
+    "Categorical": ".sample",
+    "Float": ".sample",
+    "Trial": ".trial",
+    "choice": ".utils",
+}
+
+
+def _sampler_module():
+    """ray.tune if ray>=1.10 is installed, otherwise flaml.tune.sample."""
+    try:
+        from ray import __version__ as ray_version
+
+        assert ray_version >= "1.10.0"
+        import ray.tune as sampler_module
+    except (ImportError, AssertionError):
+        from . import sample as sampler_module
+    return sampler_module
+
+
+def _sample_module():
+    """The sample module of ray.tune if ray>=1.10 is installed, otherwise flaml.tune.sample."""
+    try:
+        from ray import __version__ as ray_version
+
+        assert ray_version >= "1.10.0"
+        if ray_version.startswith("1."):
+            from ray.tune import sample
+        else:
+            from ray.tune.search import sample
+    except (ImportError, AssertionError):
+        sample = importlib.import_module(".sample", __name__)
+    return sample
+
+
+def __getattr__(name):
+    if name in _SAMPLERS:
+        value = getattr(_sampler_module(), name)
+    elif name == "sample":
+        value = _sample_module()
+    elif name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    else:
+        value = _import_submodule(__name__, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SAMPLERS) | set(_LAZY_ATTRS) | {"sample"})
+
+
+class _TuneModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        # the import system binds flaml.tune.sample to this package when it is loaded,
+        # which would shadow the sample module of ray resolved by __getattr__
+        if name != "sample" or getattr(value, "__name__", None) != __name__ + ".sample":
+            super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _TuneModule
@@ -1,3 +1,27 @@
-from .blendsearch import CFO, BlendSearch, BlendSearchTuner, RandomSearch
-from .flow2 import FLOW2
-from .online_searcher import ChampionFrontierSearcher
+import importlib
+from flaml import _import_submodule
+
+# imported on the first access (PEP 562), so that importing a submodule such as
+# flaml.tune.searcher.variant_generator does not import the searchers, which import
+# flaml.tune.space in turn
+_LAZY_ATTRS = {
+    "CFO": ".blendsearch",
+    "BlendSearch": ".blendsearch",
+    "BlendSearchTuner": ".blendsearch",
+    "RandomSearch": ".blendsearch",
+    "FLOW2": ".flow2",
+    "ChampionFrontierSearcher": ".online_searcher",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    else:
+        value = _import_submodule(__name__, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -41,6 +41,81 @@ class BaseSearcher:
         pass
 
 
+class PolyExpansionConfigs:
+    """A sequence of the configs of a PolynomialExpansionSet hyperparameter, each made
+    from the seed interactions and one combination of new interactions when accessed.
+    """
+
+    def __init__(self, hp_name, seed_interactions, space: List):
+        """Constructor.
+
+        Args:
+            hp_name: A string of the hyperparameter name.
+            seed_interactions: A list of the seed interactions (including the singletons).
+            space: A list of the tuples of the new interactions to add, one per config.
+        """
+        self._hp_name = hp_name
+        self._seed_interactions = set(seed_interactions)
+        self._space = space
+
+    def __len__(self):
+        return len(self._space)
+
+    def __getitem__(self, index):
+        interactions = self._seed_interactions | set(self._space[index])
+        return {self._hp_name: set(e for e in interactions if len(e) > 1)}
+
+
+class ChallengerIterator:
+    """An iterator which creates the challenger configs and trials lazily, one at a time.
+
+    The groups of the partial configs are cheap to keep, while the configs and the trials
+    are only created when the trial runner has a free slot for them.
+    """
+
+    def __init__(self, create_trial, seed_config: Dict, groups: List):
+        """Constructor.
+
+        Args:
+            create_trial: A function to create a trial from a config and a searcher_trial_id.
+            seed_config: A dictionary of the config which the partial configs update.
+            groups: A list of (partial configs, searcher_trial_ids), where the partial
+                configs is a sequence of dictionaries and the searcher_trial_ids is an
+                empty list or a list of the same length. The partial configs are tried
+                from the last one to the first one, and so are the groups.
+        """
+        self._create_trial = create_trial
+        self._seed_config = seed_config
+        self._groups = groups
+        self._len = sum(len(configs) for configs, _ in groups)
+        # the number of the partial configs tried in the last group
+        self._index = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self._groups and self._index >= len(self._groups[-1][0]):
+            self._groups.pop()
+            self._index = 0
+        if not self._groups:
+            raise StopIteration
+        configs, searcher_trial_ids = self._groups[-1]
+        j = len(configs) - 1 - self._index
+        self._index += 1
+        self._len -= 1
+        config = self._seed_config.copy()
+        config.update(configs[j])
+        # For some groups of the hyperparameters, we may have already generated the
+        # searcher_trial_id. Otherwise, a searcher_trial_id is generated when creating
+        # the trial from the config.
+        searcher_trial_id = searcher_trial_ids[j] if searcher_trial_ids else None
+        return self._create_trial(config, searcher_trial_id)
+
+    def __len__(self):
+        return self._len
+
+
 class ChampionFrontierSearcher(BaseSearcher):
     """The ChampionFrontierSearcher class.
 
@@ -93,6 +168,8 @@ class ChampionFrontierSearcher(BaseSearcher):
         random_seed: Optional[int] = 2345,
         online_trial_args: Optional[Dict] = {},
         nonpoly_searcher_name: Optional[str] = "CFO",
+        challenger_priority: Optional[str] = None,
+        namespace_feature_dim: Optional[Dict] = None,
     ):
         """Constructor.
 
@@ -107,12 +184,25 @@ class ChampionFrontierSearcher(BaseSearcher):
                 arguments for experimental purpose.
             nonpoly_searcher_name: A string to specify the search algorithm
                 for nonpoly hyperparameters.
+            challenger_priority: A string to specify the order to try the new
+                interaction candidates of a champion. None means a random order.
+                'cost' means the candidates with lower feature dimension are tried first.
+                'success' means the candidates whose namespaces were more often in the
+                interactions added by the previous champions are tried first.
+            namespace_feature_dim: A dictionary of the feature dimension of each namespace,
+                used to calculate the feature dimension of an interaction.
         """
         self._init_config = init_config
         self._space = space
         self._seed = random_seed
         self._online_trial_args = online_trial_args
         self._nonpoly_searcher_name = nonpoly_searcher_name
+        self._challenger_priority = challenger_priority
+        self._namespace_feature_dim = namespace_feature_dim or {}
+        # the config of the current champion, and the number of times each namespace
+        # was in the interactions added by a new champion
+        self._champion_config = None
+        self._namespace_success = {}
 
         self._random_state = np.random.RandomState(self._seed)
         self._searcher_for_nonpoly_hp = {}
@@ -126,6 +216,7 @@ class ChampionFrontierSearcher(BaseSearcher):
         # value: trial_id, key: searcher_trial_id
         self._trialid_to_searcher_trial_id = {}
 
+        # a stack of ChallengerIterator, one for each champion
         self._challenger_list = []
         # initialize the search in set_search_properties
         self.set_search_properties(
@@ -148,34 +239,32 @@ class ChampionFrontierSearcher(BaseSearcher):
         champion_trial = setting.get(self.CHAMPION_TRIAL_NAME, None)
         if champion_trial is None:
             champion_trial = self._create_trial_from_config(self._init_config)
-        # generate a new list of challenger trials
-        new_challenger_list = self._query_config_oracle(
+        self._record_champion(champion_trial.config)
+        # generate new challengers, which are tried before the existing challengers
+        # there can be duplicates and we check duplicates when calling next_trial()
+        new_challengers = self._query_config_oracle(
             champion_trial.config,
             champion_trial.trial_id,
             self._trialid_to_searcher_trial_id[champion_trial.trial_id],
         )
-        # add the newly generated challengers to existing challengers
-        # there can be duplicates and we check duplicates when calling next_trial()
-        self._challenger_list = self._challenger_list + new_challenger_list
-        # add the champion as part of the new_challenger_list when called initially
+        self._challenger_list.append(new_challengers)
+        # the champion is the first trial when called initially
         if init_call:
-            self._challenger_list.append(champion_trial)
+            self._challenger_list.append(iter([champion_trial]))
         logger.info(
             "**Important** Created challengers from champion %s",
             champion_trial.trial_id,
         )
-        logger.info(
-            "New challenger size %s, %s",
-            len(self._challenger_list),
-            [t.trial_id for t in self._challenger_list],
-        )
+        logger.info("New challenger size %s", len(new_challengers))
 
     def next_trial(self):
         """Return a trial from the _challenger_list."""
-        next_trial = None
-        if self._challenger_list:
-            next_trial = self._challenger_list.pop()
-        return next_trial
+        while self._challenger_list:
+            next_trial = next(self._challenger_list[-1], None)
+            if next_trial is not None:
+                return next_trial
+            self._challenger_list.pop()
+        return None
 
     def _create_trial_from_config(self, config, searcher_trial_id=None):
         if searcher_trial_id is None:
@@ -189,8 +278,8 @@ class ChampionFrontierSearcher(BaseSearcher):
 
     def _query_config_oracle(
         self, seed_config, seed_config_trial_id, seed_config_searcher_trial_id=None
-    ) -> List[Trial]:
-        """Give the seed config, generate a list of new configs (which are supposed to include
+    ) -> ChallengerIterator:
+        """Give the seed config, generate an iterator of new trials (which are supposed to include
         at least one config that has better performance than the input seed_config).
         """
         # group the hyperparameters according to whether the configs of them are independent
@@ -278,32 +367,14 @@ class ChampionFrontierSearcher(BaseSearcher):
                 hyperparameter_config_groups.append(partial_new_nonpoly_configs)
                 searcher_trial_ids_groups.append(new_searcher_trial_ids)
         # ----------- coordinate generation of new challengers in the case of multiple groups
-        new_trials = []
-        for i in range(len(hyperparameter_config_groups)):
-            logger.info(
-                "hyperparameter_config_groups[i] %s %s",
-                len(hyperparameter_config_groups[i]),
-                hyperparameter_config_groups[i],
-            )
-            for j, new_partial_config in enumerate(hyperparameter_config_groups[i]):
-                new_seed_config = seed_config.copy()
-                new_seed_config.update(new_partial_config)
-                # For some groups of the hyperparameters, we may have already generated the
-                # searcher_trial_id. In that case, we only need to retrieve the searcher_trial_id
-                # instead of generating it again. So we do not generate searcher_trial_id and
-                # instead set the searcher_trial_id to be None. When creating a trial from a config,
-                # a searcher_trial_id will be generated if None is provided.
-                # TODO: An alternative option is to generate a searcher_trial_id for each partial config
-                if searcher_trial_ids_groups[i]:
-                    new_searcher_trial_id = searcher_trial_ids_groups[i][j]
-                else:
-                    new_searcher_trial_id = None
-                new_trial = self._create_trial_from_config(
-                    new_seed_config, new_searcher_trial_id
-                )
-                new_trials.append(new_trial)
-        logger.info("new_configs %s", [t.trial_id for t in new_trials])
-        return new_trials
+        for configs in hyperparameter_config_groups:
+            logger.info("hyperparameter_config_groups[i] %s", len(configs))
+        # the configs and the trials are created lazily, only when they are to be added
+        return ChallengerIterator(
+            self._create_trial_from_config,
+            seed_config,
+            list(zip(hyperparameter_config_groups, searcher_trial_ids_groups)),
+        )
 
     def _generate_independent_hp_configs(
         self, hp_name, current_config_value, config_domain
@@ -317,7 +388,7 @@ class ChampionFrontierSearcher(BaseSearcher):
                 seed_interactions,
             )
             logger.info("current_config_value %s", current_config_value)
-            configs = self._generate_poly_expansion_sets(
+            space = self._generate_poly_expansion_sets(
                 seed_interactions,
                 self.EXPANSION_ORDER,
                 config_domain.allow_self_inter,
@@ -326,8 +397,7 @@ class ChampionFrontierSearcher(BaseSearcher):
             )
         else:
             raise NotImplementedError
-        configs_w_key = [{hp_name: hp_config} for hp_config in configs]
-        return configs_w_key
+        return PolyExpansionConfigs(hp_name, seed_interactions, space)
 
     def _generate_poly_expansion_sets(
         self,
@@ -348,12 +418,50 @@ class ChampionFrontierSearcher(BaseSearcher):
             )
         )
         self._random_state.shuffle(space)
-        candidate_configs = [set(seed_interactions) | set(item) for item in space]
-        final_candidate_configs = []
-        for c in candidate_configs:
-            new_c = set([e for e in c if len(e) > 1])
-            final_candidate_configs.append(new_c)
-        return final_candidate_configs
+        # the candidates at the end are tried first
+        if self._challenger_priority == "cost":
+            space.sort(key=self._interaction_cost, reverse=True)
+        elif self._challenger_priority == "success":
+            seed_interactions = set(seed_interactions)
+            space.sort(
+                key=lambda item: self._interaction_success(item, seed_interactions)
+            )
+        elif self._challenger_priority is not None:
+            raise NotImplementedError
+        return space
+
+    def _interaction_cost(self, interactions):
+        """The feature dimension added by the interactions, and their highest order."""
+        cost = 0
+        for interaction in interactions:
+            dim = 1
+            for ns in interaction:
+                dim *= self._namespace_feature_dim.get(ns, 1)
+            cost += dim
+        return cost, max(len(interaction) for interaction in interactions)
+
+    def _interaction_success(self, interactions, seed_interactions=()):
+        """The number of times the namespaces of the interactions, except the seed
+        interactions, were in the new interactions of a champion."""
+        return sum(
+            self._namespace_success.get(ns, 0)
+            for interaction in interactions
+            if interaction not in seed_interactions
+            for ns in set(interaction)
+        )
+
+    def _record_champion(self, config):
+        """Count the namespaces of the interactions which the champion added."""
+        previous_config, self._champion_config = self._champion_config, config
+        if previous_config is None:
+            return
+        for k, v in config.items():
+            if isinstance(self._space.get(k), PolynomialExpansionSet):
+                for interaction in set(v) - set(previous_config.get(k, ())):
+                    for ns in set(interaction):
+                        self._namespace_success[ns] = (
+                            self._namespace_success.get(ns, 0) + 1
+                        )
 
     @staticmethod
     def _generate_all_comb(
@@ -377,7 +485,7 @@ class ChampionFrontierSearcher(BaseSearcher):
 
         def get_interactions(list1, list2):
             """Get combinatorial list of tuples"""
-            new_list = []
+            new_list, new_set = [], set()
             for i in list1:
                 for j in list2:
                     # each interaction is sorted. E.g. after sorting
@@ -385,7 +493,8 @@ class ChampionFrontierSearcher(BaseSearcher):
                     # this is done to ensure we can use the config as the signature
                     # of the trial, i.e., trial id.
                     new_interaction = "".join(sorted(i + j))
-                    if new_interaction not in new_list:
+                    if new_interaction not in new_set:
+                        new_set.add(new_interaction)
                         new_list.append(new_interaction)
             return new_list
 
@@ -410,13 +519,11 @@ class ChampionFrontierSearcher(BaseSearcher):
             seed_interaction_order -= 1
             all_interactions += interactions
         if not allow_self_inter:
-            all_interactions_no_self_inter = []
+            all_interactions_no_self_inter, no_self_inter_set = [], set()
             for s in all_interactions:
                 s_no_inter = strip_self_inter(s)
-                if (
-                    len(s_no_inter) > 1
-                    and s_no_inter not in all_interactions_no_self_inter
-                ):
+                if len(s_no_inter) > 1 and s_no_inter not in no_self_inter_set:
+                    no_self_inter_set.add(s_no_inter)
                     all_interactions_no_self_inter.append(s_no_inter)
             all_interactions = all_interactions_no_self_inter
         if highest_poly_order is not None:
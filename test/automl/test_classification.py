@@ -208,6 +208,64 @@ class TestClassification(unittest.TestCase):
         automl_experiment.fit(X_train=X_train, y_train=y_train, **automl_settings)
         _ = automl_experiment.predict(X_train)
 
+    def test_prune_trials(self):
+        from flaml.automl.model import LearningCurvePruner, LGBMEstimator
+
+        pruner = LearningCurvePruner(interval=2, min_trials=2)
+        for losses in ([0.5, 0.3], [0.4, 0.2]):
+            curve = pruner.new_curve("lgbm")
+            for i, loss in enumerate(losses):
+                assert not curve.report(i, loss)
+            curve.complete()
+        curve = pruner.new_curve("lgbm")
+        assert not curve.report(0, 0.42)
+        assert curve.report(1, 0.6) and curve.pruned_at == 1
+        # the pruned curve is not added to the history
+        curve.complete()
+        assert len(pruner._curves["lgbm"]) == 2 and pruner.n_pruned == 1
+
+        X_train, y_train = load_breast_cancer(return_X_y=True)
+        # the eval_set passed by the user is kept, and no curve is recorded
+        estimator = LGBMEstimator(task="binary", n_estimators=4)
+        estimator.set_pruning(pruner.new_curve("lgbm"), X_train, y_train, "log_loss")
+        estimator.fit(X_train, y_train, eval_set=[(X_train[:100], y_train[:100])])
+        assert len(estimator._model.evals_result_["valid_0"]["binary_logloss"]) == 4
+        assert estimator._curve is None
+
+        for estimator in ("lgbm", "xgboost", "xgb_limitdepth"):
+            automl = AutoML()
+            automl.fit(
+                X_train=X_train,
+                y_train=y_train,
+                task="binary",
+                metric="log_loss",
+                estimator_list=[estimator],
+                max_iter=10,
+                n_jobs=1,
+                prune_trials={"interval": 2, "min_trials": 1},
+            )
+            pruner = automl._state.pruner
+            assert pruner._curves and pruner.n_pruned > 0
+            # some trials are pruned, and the search still finds a good model
+            assert automl.best_loss < np.inf
+            assert (automl.predict(X_train) == y_train).mean() > 0.9
+
+    def test_isolate_trials(self):
+        X_train, y_train = load_breast_cancer(return_X_y=True)
+        automl = AutoML()
+        automl.fit(
+            X_train=X_train,
+            y_train=y_train,
+            task="binary",
+            estimator_list=["lgbm", "xgboost", "lrl1"],
+            max_iter=6,
+            n_jobs=1,
+            isolate_trials=True,
+            prune_trials=True,
+        )
+        assert (automl.predict(X_train) == y_train).mean() > 0.9
+        assert automl.best_loss < np.inf
+
     def test_datetime_columns(self):
         automl_experiment = AutoML()
         automl_settings = {
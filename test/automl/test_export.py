@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+
+import flaml
+from flaml import AutoML
+
+
+def test_export():
+    X, y = load_iris(return_X_y=True, as_frame=True)
+    X["cat"] = pd.Categorical(np.where(X["sepal length (cm)"] > 5.8, "a", "b"))
+    y_label = pd.Series(np.array(["setosa", "versicolor", "virginica"])[y])
+    y_value = X.pop("petal width (cm)")
+    for task, estimator, native_file in [
+        ("classification", "lgbm", "model.txt"),
+        ("classification", "catboost", "model.cbm"),
+        ("classification", "rf", None),
+        ("regression", "lgbm", "model.txt"),
+    ]:
+        classification = task == "classification"
+        automl = AutoML()
+        automl.fit(
+            X,
+            y_label if classification else y_value,
+            task=task,
+            estimator_list=[estimator],
+            max_iter=3,
+            verbose=0,
+        )
+        with tempfile.TemporaryDirectory() as d:
+            automl.export(d)
+            if native_file:
+                assert os.path.exists(os.path.join(d, native_file))
+            for mmap_mode in ("r", None):
+                model = flaml.load_model(d, mmap_mode=mmap_mode)
+                if classification:
+                    assert (model.predict(X) == automl.predict(X)).all()
+                    assert np.allclose(model.predict_proba(X), automl.predict_proba(X))
+                    assert list(model.classes_) == list(automl.classes_)
+                else:
+                    assert np.allclose(model.predict(X), automl.predict(X))
+            del model
+
+
+def test_predict_batches():
+    X, y = load_iris(return_X_y=True, as_frame=True)
+    X["cat"] = np.where(X["sepal length (cm)"] > 5.8, "a", "b")
+    y = pd.Series(np.array(["setosa", "versicolor", "virginica"])[y])
+    automl = AutoML()
+    automl.fit(
+        X, y, task="classification", estimator_list=["lgbm"], max_iter=3, verbose=0
+    )
+    y_pred, proba = automl.predict(X), automl.predict_proba(X)
+    # the chunks of the data in memory
+    chunks = automl.predict_batches(X, chunk_rows=32, n_workers=2)
+    assert (np.concatenate(list(chunks)) == y_pred).all()
+    chunks = automl.predict_batches(
+        (X.iloc[i : i + 50] for i in range(0, len(X), 50)), method="predict_proba"
+    )
+    assert np.allclose(np.concatenate(list(chunks)), proba)
+    with tempfile.TemporaryDirectory() as d:
+        # an extra column not used in training is not read
+        X.assign(id=range(len(X))).to_csv(os.path.join(d, "test.csv"), index=False)
+        X.to_parquet(os.path.join(d, "test.parquet"))
+        for ext in ("csv", "parquet"):
+            source, output = os.path.join(d, f"test.{ext}"), os.path.join(d, "pred.csv")
+            n_rows = automl.predict_batches(source, output, chunk_rows=32, n_workers=2)
+            assert n_rows == len(X)
+            assert (pd.read_csv(output)["prediction"] == y_pred).all()
+            output = os.path.join(d, "proba.parquet")
+            automl.predict_batches(
+                source, output, chunk_rows=32, method="predict_proba"
+            )
+            result = pd.read_parquet(output)
+            assert list(result.columns) == list(automl.classes_)
+            assert np.allclose(result.to_numpy(), proba)
+
+
+if __name__ == "__main__":
+    test_export()
+    test_predict_batches()
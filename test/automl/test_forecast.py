@@ -124,6 +124,137 @@ def test_numpy():
     print(automl.predict(12))
 
 
+def test_arima_warm_start():
+    import pandas as pd
+    from sklearn.model_selection import TimeSeriesSplit
+    from flaml.automl.model import ARIMA
+    from flaml.automl.ml import evaluate_model_CV
+
+    X_train = pd.DataFrame({"ds": pd.date_range("2014-01-01", periods=120, freq="MS")})
+    y_train = pd.Series(
+        np.sin(np.arange(120) / 6) + np.random.RandomState(0).normal(0, 0.1, 120)
+    )
+    estimator = ARIMA(p=2, d=1, q=1)
+    for train_index, val_index in TimeSeriesSplit(3, test_size=12).split(X_train):
+        estimator.cleanup()
+        estimator.fit(
+            X_train.iloc[train_index], y_train.iloc[train_index], warm_start=True
+        )
+        # the consecutive folds extend the model fitted on the first fold
+        assert estimator._model.nobs == len(train_index)
+        assert len(estimator.predict(X_train.iloc[val_index])) == len(val_index)
+    # the last fit is dropped once the folds are evaluated
+    evaluate_model_CV(
+        {},
+        estimator,
+        X_train,
+        y_train,
+        None,
+        TimeSeriesSplit(3, test_size=12),
+        "ts_forecast",
+        "mape",
+        np.inf,
+        fit_kwargs={"warm_start": True},
+    )
+    assert estimator._model is not None and not hasattr(estimator, "_last_fit")
+    # a neighboring config is warm started from the fitted params
+    estimator = ARIMA(p=3, d=1, q=1)
+    estimator.fit(X_train, y_train, warm_start=True)
+    assert estimator._model.mle_retvals["converged"]
+
+    automl = AutoML()
+    automl.fit(
+        X_train=X_train,
+        y_train=y_train,
+        period=12,
+        task="ts_forecast",
+        time_budget=3,
+        eval_method="cv",
+        n_splits=3,
+        estimator_list=["arima", "sarimax"],
+        fit_kwargs_by_estimator={
+            "arima": {"warm_start": True},
+            "sarimax": {"warm_start": True},
+        },
+        log_file_name="test/ts_forecast.log",
+    )
+    print(automl.predict(12))
+
+
+def test_ts_lagged_data_cache():
+    from flaml.automl.model import _TS_LAGGED_DATA, _cached_lagged_data
+
+    _TS_LAGGED_DATA.clear()
+    made = []
+
+    def fit(lags, period, n_folds):
+        # the lagged data of every horizon on every fold, as one trial with cv
+        for fold in range(n_folds):
+            for horizon in range(1, period + 1):
+                key = (lags, horizon, fold)
+                assert (
+                    _cached_lagged_data(
+                        lags, horizon, f"fold{fold}", lambda: made.append(key) or key
+                    )
+                    == key
+                )
+
+    fit(3, period=40, n_folds=5)
+    assert len(made) == 200
+    # the next trials with the same lags reuse all the lagged data
+    fit(3, period=40, n_folds=5)
+    fit(4, period=40, n_folds=5)
+    fit(3, period=40, n_folds=5)
+    assert len(made) == 400
+
+
+def test_ts_sklearn_optimize_for_horizon():
+    import hcrystalball  # noqa: F401
+    import pandas as pd
+    import statsmodels.api as sm
+    from flaml.automl.model import LGBM_TS, _TS_LAGGED_DATA
+
+    data = sm.datasets.co2.load_pandas().data["co2"].resample("MS").mean()
+    data = data.bfill().ffill().reset_index().rename(columns={"index": "ds"})
+    period = 6
+    X_train, y_train = data[["ds"]][:-period], data["co2"][:-period]
+    X_test = data[["ds"]][-period:]
+    config = {
+        "n_estimators": 8,
+        "num_leaves": 4,
+        "min_child_samples": 5,
+        "lags": 3,
+        "optimize_for_horizon": True,
+    }
+    _TS_LAGGED_DATA.clear()
+    forecasts = []
+    for n_jobs in (1, 4):
+        estimator = LGBM_TS(task="ts_forecast", n_jobs=n_jobs, **config)
+        estimator.fit(X_train, y_train, period=period)
+        # a distinct model is fitted on the lagged data of each horizon
+        models = estimator.model
+        assert len(models) == period
+        assert len({id(model) for model in models}) == period
+        assert (
+            len({model.booster_.model_to_string() for model in models}) == period
+        ), "the models of the horizons are the same"
+        forecasts.append(np.asarray(estimator.predict(X_test)).ravel())
+    assert np.allclose(forecasts[0], forecasts[1])
+    # the same as fitting and predicting each horizon on its own
+    estimator = LGBM_TS(task="ts_forecast", n_jobs=1, **config)
+    estimator.fit(X_train, y_train, period=period)
+    wrapper = estimator.hcrystaball_model
+    for horizon, model in enumerate(estimator.model, 1):
+        X_fit, y_fit = wrapper._transform_data_to_tsmodel_input_format(
+            estimator.transform_X(X_train), y_train, horizon
+        )
+        X_pred, _ = wrapper._transform_data_to_tsmodel_input_format(
+            estimator.transform_X(X_test).iloc[:horizon, :]
+        )
+        expected = type(model)(**model.get_params()).fit(X_fit, y_fit).predict(X_pred)
+        assert np.isclose(forecasts[0][horizon - 1], expected[-1])
+
+
 def test_numpy_large():
     import numpy as np
     import pandas as pd
@@ -591,6 +722,43 @@ def test_forecast_panel(budget=5):
     print(automl.min_resource)
 
 
+def test_tft_dataset_cache():
+    from flaml.automl.model import TemporalFusionTransformerEstimator, _TFT_DATASETS
+
+    data, special_days = get_stalliion_data()
+    data = data.sort_values(["agency", "sku", "date"])
+    X_train = data.drop(columns=["date", "volume"])
+    y_train = data["volume"]
+    kwargs = {
+        "period": 6,
+        "group_ids": ["agency", "sku"],
+        "max_encoder_length": 24,
+        "static_categoricals": ["agency", "sku"],
+        "time_varying_known_categoricals": ["special_days", "month"],
+        "variable_groups": {"special_days": special_days},
+        "time_varying_known_reals": ["time_idx", "price_regular"],
+        "time_varying_unknown_reals": ["y", "log_volume"],
+        "batch_size": 256,
+    }
+    _TFT_DATASETS.clear()
+    estimator = TemporalFusionTransformerEstimator(task="ts_forecast_panel")
+    training, _, _ = estimator.transform_ds(X_train, y_train, **kwargs)
+    # the same data and dataset configuration reuse the datasets
+    cached, train_dataloader, _ = TemporalFusionTransformerEstimator(
+        task="ts_forecast_panel"
+    ).transform_ds(X_train, y_train, **dict(kwargs, batch_size=64))
+    assert cached is training and len(_TFT_DATASETS) == 1
+    assert train_dataloader.batch_size == 64
+    # a different dataset configuration or data builds new datasets
+    other, _, _ = estimator.transform_ds(
+        X_train, y_train, **dict(kwargs, max_encoder_length=12)
+    )
+    assert other is not training and other.max_encoder_length == 12
+    assert len(_TFT_DATASETS) == 2
+    other, _, _ = estimator.transform_ds(X_train, y_train + 1, **kwargs)
+    assert other is not training and len(_TFT_DATASETS) == 3
+
+
 if __name__ == "__main__":
     test_forecast_automl(60)
     test_multivariate_forecast_num(5)
@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from sklearn.metrics import ndcg_score
+from flaml.automl.ml import sklearn_metric_loss_score
+from flaml.automl.metrics import kernel_loss_score, loss_scores
+
+
+def test_kernel_loss_score():
+    rng = np.random.RandomState(0)
+    n = 2000
+    for weight in (None, rng.rand(n)):
+        y = rng.randint(0, 2, n)
+        proba = np.round(rng.rand(n), 2)  # with ties
+        for metric in ["roc_auc", "roc_auc_weighted", "accuracy", "f1", "macro_f1"]:
+            y_pred = proba if metric.startswith("roc") else (proba > 0.5).astype(int)
+            assert np.isclose(
+                kernel_loss_score(metric, y_pred, y, sample_weight=weight),
+                sklearn_metric_loss_score(metric, y_pred, y, sample_weight=weight),
+            ), metric
+        y = rng.randint(0, 4, n)
+        proba = rng.dirichlet(np.ones(4), n)
+        for metric in ["roc_auc_ovr", "roc_auc_ovr_weighted", "log_loss"]:
+            assert np.isclose(
+                kernel_loss_score(metric, proba, y, sample_weight=weight),
+                sklearn_metric_loss_score(metric, proba, y, sample_weight=weight),
+            ), metric
+        losses = loss_scores(
+            ["log_loss", "roc_auc_ovr", "micro_f1"], y, proba, sample_weight=weight
+        )
+        assert np.isclose(
+            losses["micro_f1"],
+            sklearn_metric_loss_score(
+                "accuracy", proba.argmax(axis=1), y, sample_weight=weight
+            ),
+        )
+    # not covered by the kernels
+    assert kernel_loss_score("roc_auc_ovo", proba, y) is None
+    assert kernel_loss_score("rmse", proba[:, 0], y) is None
+    # NaN predictions fall back to sklearn, which raises an error
+    nan_score = np.array([0.1, np.nan, 0.3, 0.2])
+    for metric, y_pred in [
+        ("roc_auc", nan_score),
+        ("roc_auc", np.full(4, np.nan)),
+        ("log_loss", nan_score),
+    ]:
+        assert kernel_loss_score(metric, y_pred, np.array([0, 1, 1, 0])) is None
+        try:
+            sklearn_metric_loss_score(metric, y_pred, np.array([0, 1, 1, 0]))
+            assert False, "ValueError expected"
+        except ValueError:
+            pass
+
+
+def test_ndcg():
+    rng = np.random.RandomState(0)
+    groups = np.repeat(np.arange(100), rng.randint(2, 20, 100))
+    y = rng.randint(0, 4, len(groups))
+    score = np.round(rng.rand(len(groups)), 1)  # with ties
+    for k in (1, 3, 10):
+        expected = 1 - np.mean(
+            [
+                ndcg_score([y[groups == g]], [score[groups == g]], k=k)
+                for g in range(100)
+            ]
+        )
+        assert np.isclose(
+            sklearn_metric_loss_score(f"ndcg@{k}", score, y, groups=groups), expected
+        )
+    assert np.isclose(
+        sklearn_metric_loss_score("ndcg", score, y), 1 - ndcg_score([y], [score])
+    )
+
+
+class _PearsonrMetric:
+    """A datasets metric computing pearsonr, which fails on a marked batch."""
+
+    def __init__(self):
+        self.predictions, self.references = [], []
+
+    def add_batch(self, predictions, references):
+        assert isinstance(references, list)
+        if -1 in references:
+            raise ValueError("a bad batch")
+        self.predictions += list(predictions)
+        self.references += list(references)
+
+    def compute(self, predictions=None, references=None):
+        from scipy.stats import pearsonr
+
+        if predictions is not None:
+            self.add_batch(predictions, references)
+        predictions, references = self.predictions, self.references
+        self.predictions, self.references = [], []
+        return {"pearsonr": pearsonr(references, predictions)[0]}
+
+
+def test_hf_metric(monkeypatch):
+    import datasets
+    import pandas as pd
+    from scipy.stats import pearsonr
+    from flaml.automl import ml
+
+    loaded = []
+    monkeypatch.setattr(
+        datasets, "load_metric", lambda name: loaded.append(name) or _PearsonrMetric()
+    )
+    monkeypatch.setattr(ml, "_HF_METRICS", {})
+    monkeypatch.setattr(ml, "HF_METRIC_BATCH_SIZE", 30)
+    rng = np.random.RandomState(0)
+    y_pred, y_true = rng.rand(100), pd.Series(rng.rand(100))
+    expected = pearsonr(y_true, y_pred)[0]
+    # the metric is loaded once, and the series of references is added as a list
+    for _ in range(2):
+        score = ml.metric_loss_score("pearsonr", y_pred, y_true)
+        assert np.isclose(score, 1 - expected)
+    assert loaded == ["pearsonr"]
+    metric = ml.load_hf_metric("pearsonr")
+    # the metric with the batches added before an error is not reused
+    with pytest.raises(ValueError, match="a bad batch"):
+        ml.metric_loss_score("pearsonr", y_pred, y_true.where(y_true.index < 50, -1))
+    assert ml.load_hf_metric("pearsonr") is not metric
+    assert np.isclose(ml.metric_loss_score("pearsonr", y_pred, y_true), 1 - expected)
+    assert loaded == ["pearsonr"] * 2
+
+
+def test_load_sentence_tokenizer(monkeypatch):
+    import sys
+    import types
+    from flaml.automl.nlp.huggingface import utils
+
+    downloaded = []
+    nltk = types.ModuleType("nltk")
+
+    def sent_tokenize(text):
+        if not downloaded:
+            raise LookupError("punkt")
+        return text.split(". ")
+
+    nltk.sent_tokenize = sent_tokenize
+    nltk.download = downloaded.append
+    monkeypatch.setitem(sys.modules, "nltk", nltk)
+    monkeypatch.setattr(utils, "_SENTENCE_TOKENIZER", None)
+    # the punkt data are downloaded if missing, and checked once per process
+    for _ in range(2):
+        assert utils.load_sentence_tokenizer()("A. B") == ["A", "B"]
+    assert downloaded == ["punkt"]
@@ -2,12 +2,15 @@ import sys
 import pickle
 from sklearn.datasets import load_iris, fetch_california_housing, load_breast_cancer
 from sklearn.model_selection import train_test_split
+import numpy as np
 import pandas as pd
 from flaml import AutoML
 from flaml.default import (
     preprocess_and_suggest_hyperparams,
     suggest_hyperparams,
     suggest_learner,
+    suggest_config,
+    suggest_config_many,
 )
 from flaml.default import portfolio, regret
 
@@ -30,6 +33,31 @@ def test_build_portfolio(path="test/default", strategy="greedy"):
     portfolio.main()
 
 
+def test_construct_portfolio():
+    import numpy as np
+    from flaml.default.greedy import construct_portfolio
+
+    # each of the first 3 configs has zero regret on a third of the tasks
+    n_configs, n_tasks = 500, 60
+    rng = np.random.RandomState(0)
+    regret = 0.05 + rng.rand(n_configs, n_tasks)
+    for i in range(3):
+        regret[i, i::3] = 0
+    regret = pd.DataFrame(
+        regret,
+        index=[f"c{i}" for i in range(n_configs)],
+        columns=[f"t{j}" for j in range(n_tasks)],
+    )
+    assert sorted(construct_portfolio(regret, None, 0.01)) == ["c0", "c1", "c2"]
+    meta_features = pd.DataFrame(
+        np.repeat(np.arange(n_tasks // 3), 3)[:, None] * [1, 0]
+        + np.tile(np.arange(3), n_tasks // 3)[:, None] * [0, 100],
+        index=regret.columns,
+    )
+    portfolio = construct_portfolio(regret, meta_features, 0.01)
+    assert sorted(portfolio) == ["c0", "c1", "c2"]
+
+
 def test_iris(as_frame=True):
     automl = AutoML()
     automl_settings = {
@@ -126,6 +154,36 @@ def test_suggest_classification():
     print(suggested)
 
 
+def test_suggest_config_many(location=None):
+    data = [
+        load_breast_cancer(return_X_y=True, as_frame=True),
+        load_iris(return_X_y=True, as_frame=True),
+        load_breast_cancer(return_X_y=True),
+    ]
+    configs = suggest_config_many("classification", data, "lgbm", location, k=2)
+    assert len(configs) == 3
+    for (X, y), config in zip(data, configs):
+        assert len(config) <= 2
+        assert config == suggest_config("classification", X, y, "lgbm", location, k=2)
+    # the index is compiled once and reused
+    from flaml.default.suggest import load_portfolio_index
+
+    assert load_portfolio_index("binary", "lgbm", location) is load_portfolio_index(
+        "binary", "lgbm", location
+    )
+    # the task and the number of classes are resolved from the current labels
+    from flaml.default.suggest import _resolve_task, meta_feature
+
+    y = np.array([0, 1] * 1024)
+    X = np.zeros((len(y), 2))
+    assert _resolve_task("classification", y) == ("binary", 2)
+    assert meta_feature("binary", X, y, ["NumberOfClasses"]) == [2]
+    y[1] = 2
+    assert _resolve_task("classification", y) == ("multiclass", 3)
+    assert meta_feature("multiclass", X, y, ["NumberOfClasses"]) == [3]
+    assert _resolve_task("regression", y) == ("regression", None)
+
+
 def test_suggest_regression():
     location = "test/default"
     X_train, y_train = fetch_california_housing(return_X_y=True, as_frame=True)
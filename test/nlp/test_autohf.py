@@ -83,5 +83,36 @@ def test_hf_data():
             print("PermissionError when deleting test/data/output/")
 
 
+def test_token_budget_batch_sampler():
+    import numpy as np
+    from flaml.automl.nlp.huggingface.trainer import (
+        TokenBudgetBatchSampler,
+        _restore_order,
+    )
+
+    rng = np.random.RandomState(0)
+    lengths = rng.randint(1, 100, size=1000)
+    sampler = TokenBudgetBatchSampler(lengths, max_tokens=256)
+    batches = list(sampler)
+    # all the examples are covered once, and the padded batches fit in the budget
+    assert sorted(np.concatenate(batches)) == list(range(1000))
+    assert all(len(b) * lengths[b].max() <= 256 for b in batches)
+    # the order of the predictions is restored
+    predictions = lengths[sampler.order]
+    assert (_restore_order(predictions, sampler.order) == lengths).all()
+
+    sampler = TokenBudgetBatchSampler(lengths, max_tokens=256, shuffle=True)
+    # the length counts the batches of the next epoch
+    len_1 = len(sampler)
+    epoch_1 = list(sampler)
+    len_2 = len(sampler)
+    epoch_2 = list(sampler)
+    assert (len_1, len_2) == (len(epoch_1), len(epoch_2))
+    assert epoch_1 != epoch_2
+    for batches in (epoch_1, epoch_2):
+        assert sorted(np.concatenate(batches)) == list(range(1000))
+        assert all(len(b) == 1 or len(b) * lengths[b].max() <= 256 for b in batches)
+
+
 if __name__ == "__main__":
     test_hf_data()
@@ -0,0 +1,81 @@
+import sys
+import pytest
+from utils import get_toy_data_seqclassification
+
+MODEL_PATH = "google/electra-small-discriminator"
+
+
+@pytest.mark.skipif(
+    sys.platform == "darwin" or sys.version < "3.7",
+    reason="do not run on mac os or py<3.7",
+)
+def test_pretrained_cache():
+    import torch
+    from flaml.automl.nlp.huggingface.utils import (
+        load_tokenizer,
+        load_model,
+        _load_config,
+    )
+
+    # the tokenizer is loaded once, and the config is copied
+    assert load_tokenizer(MODEL_PATH) is load_tokenizer(MODEL_PATH)
+    config = _load_config(MODEL_PATH)
+    config.num_labels = 5
+    assert _load_config(MODEL_PATH).num_labels != 5
+
+    def model(seed):
+        torch.manual_seed(seed)
+        return load_model(MODEL_PATH, "seq-classification", 2, use_cache=True)
+
+    # the first and the following clones initialize the head the same under a seed
+    first, second, other = model(0), model(0), model(1)
+    cached = load_model(
+        MODEL_PATH, "seq-classification", 2, use_cache=True, clone=False
+    )
+    assert first is not second and first is not cached
+    head = "classifier.dense.weight"
+    assert torch.equal(first.state_dict()[head], second.state_dict()[head])
+    assert not torch.equal(first.state_dict()[head], other.state_dict()[head])
+    # the pretrained weights are shared by the clones and not modified by training
+    body = "electra.embeddings.word_embeddings.weight"
+    assert torch.equal(first.state_dict()[body], cached.state_dict()[body])
+    with torch.no_grad():
+        first.state_dict()[body].add_(1)
+    assert torch.equal(second.state_dict()[body], cached.state_dict()[body])
+
+
+@pytest.mark.skipif(
+    sys.platform == "darwin" or sys.version < "3.7",
+    reason="do not run on mac os or py<3.7",
+)
+def test_tokenized_data_cache(tmp_path):
+    from flaml.automl.nlp.huggingface.training_args import TrainingArgumentsForAuto
+    from flaml.automl.nlp.huggingface.utils import (
+        load_tokenizer,
+        tokenize_text_to_dataset,
+    )
+
+    X_train, y_train, _, _, _ = get_toy_data_seqclassification()
+    hf_args = TrainingArgumentsForAuto(model_path=MODEL_PATH, output_dir=str(tmp_path))
+    # the cache is off by default
+    assert hf_args.tokenized_data_cache_dir is None
+    tokenizer = load_tokenizer(MODEL_PATH)
+    kwargs = dict(task="seq-classification", hf_args=hf_args, tokenizer=tokenizer)
+    dataset = tokenize_text_to_dataset(X_train, y_train, **kwargs)
+    cache_dir = tmp_path / "tokenized_data"
+    cached = tokenize_text_to_dataset(
+        X_train, y_train, cache_dir=str(cache_dir), **kwargs
+    )
+    assert len(list(cache_dir.iterdir())) == 1
+    assert cached.to_dict() == dataset.to_dict()
+    # the same data is loaded from the cache, and different data is added
+    tokenize_text_to_dataset(X_train, y_train, cache_dir=str(cache_dir), **kwargs)
+    assert len(list(cache_dir.iterdir())) == 1
+    tokenize_text_to_dataset(
+        X_train[:2], y_train[:2], cache_dir=str(cache_dir), **kwargs
+    )
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+if __name__ == "__main__":
+    test_pretrained_cache()
@@ -0,0 +1,83 @@
+import sys
+import pickle
+import pytest
+import requests
+from utils import get_toy_data_seqclassification, get_automl_settings
+import os
+import shutil
+
+
+@pytest.mark.skipif(
+    sys.platform == "darwin" or sys.version < "3.7",
+    reason="do not run on mac os or py<3.7",
+)
+def test_inference_pipeline():
+    from concurrent.futures import ThreadPoolExecutor
+    import numpy as np
+    import pandas as pd
+    from flaml import AutoML
+
+    X_train, y_train, X_val, y_val, X_test = get_toy_data_seqclassification()
+    automl = AutoML()
+    automl_settings = get_automl_settings()
+    try:
+        automl.fit(
+            X_train=X_train,
+            y_train=y_train,
+            X_val=X_val,
+            y_val=y_val,
+            **automl_settings
+        )
+    except requests.exceptions.HTTPError:
+        return
+
+    estimator = automl.model
+    X = pd.concat([X_val, X_test], ignore_index=True)
+    # the pipeline predicts the same logits as the trainer
+    test_dataset, _, _ = estimator._preprocess_data(X)
+    trainer_logits = estimator._init_model_for_predict().predict(test_dataset)
+    pipeline = estimator.inference_pipeline
+    assert pipeline is estimator.inference_pipeline
+    assert np.allclose(
+        pipeline.predict_logits(X), trainer_logits.predictions, atol=1e-4
+    )
+    y_pred = pipeline.predict(X)
+    assert (np.asarray(automl.predict(X)) == np.asarray(y_pred)).all()
+
+    # the concurrent requests are batched together, and each gets its own rows
+    rows = [X.iloc[[i]] for i in range(len(X))] + [X.iloc[2:], X.iloc[:3]]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = list(executor.map(pipeline.submit, rows))
+    for x, future in zip(rows, futures):
+        assert (
+            np.asarray(future.result(timeout=60)) == np.asarray(y_pred)[x.index]
+        ).all()
+    assert (
+        np.concatenate(list(pipeline.stream(X, chunk_size=3))) == np.asarray(y_pred)
+    ).all()
+
+    # the closed pipeline rejects the requests, and is rebuilt by the estimator
+    pipeline.close()
+    assert pipeline._worker is None
+    with pytest.raises(RuntimeError):
+        pipeline.submit(X)
+    estimator._set_pred_kwargs({"per_device_eval_batch_size": 2})
+    assert estimator.inference_pipeline is not pipeline
+
+    # the pipeline and its worker thread are not pickled with the estimator
+    estimator.inference_pipeline.submit(X).result(timeout=60)
+    loaded = pickle.loads(pickle.dumps(estimator))
+    assert getattr(loaded, "_pipeline", None) is None
+    assert (np.asarray(loaded.predict(X)) == np.asarray(y_pred)).all()
+    estimator._close_pipeline()
+    loaded._close_pipeline()
+
+    if os.path.exists("test/data/output/"):
+        try:
+            shutil.rmtree("test/data/output/")
+        except PermissionError:
+            print("PermissionError when deleting test/data/output/")
+
+
+if __name__ == "__main__":
+    test_inference_pipeline()
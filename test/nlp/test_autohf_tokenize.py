@@ -0,0 +1,146 @@
+import sys
+import pytest
+from utils import (
+    get_toy_data_seqclassification,
+    get_toy_data_multiplechoiceclassification,
+    get_toy_data_tokenclassification_idlabel,
+)
+
+MODEL_PATH = "google/electra-small-discriminator"
+LABEL_LIST = [
+    "O",
+    "B-PER",
+    "I-PER",
+    "B-ORG",
+    "I-ORG",
+    "B-LOC",
+    "I-LOC",
+    "B-MISC",
+    "I-MISC",
+]
+
+
+def _tokenize_row(tokenizer, hf_args, *texts, **kwargs):
+    # one tokenizer call per row, as the tokenization before batching
+    return tokenizer(
+        *texts,
+        padding="max_length" if hf_args.pad_to_max_length else False,
+        max_length=hf_args.max_seq_length,
+        truncation=True,
+        **kwargs
+    )
+
+
+def _per_row_seqclassification(X, tokenizer, hf_args):
+    rows = [_tokenize_row(tokenizer, hf_args, *row) for row in X.itertuples(False)]
+    return {key: [row[key] for row in rows] for key in rows[0].keys()}
+
+
+def _per_row_multiplechoice(X, tokenizer, hf_args):
+    endings = ["ending0", "ending1", "ending2", "ending3"]
+    rows = [
+        _tokenize_row(
+            tokenizer,
+            hf_args,
+            [row["sent1"]] * 4,
+            [row["sent2"] + " " + row[key] for key in endings],
+        )
+        for _, row in X.iterrows()
+    ]
+    return {key: [row[key] for row in rows] for key in rows[0].keys()}
+
+
+def _per_row_tokenclassification(X, Y, tokenizer, hf_args):
+    label_to_id = {i: i for i in range(len(LABEL_LIST))}
+    b_to_i_label = [
+        LABEL_LIST.index(label.replace("B-", "I-"))
+        if label.startswith("B-") and label.replace("B-", "I-") in LABEL_LIST
+        else idx
+        for idx, label in enumerate(LABEL_LIST)
+    ]
+    result = {}
+    for words, labels in zip(X[X.columns[0]], Y):
+        tokenized = _tokenize_row(
+            tokenizer, hf_args, [list(words)], is_split_into_words=True
+        )
+        for key in tokenized.keys():
+            result.setdefault(key, []).append(tokenized[key][0])
+        previous_word_idx, label_ids = None, []
+        for word_idx in tokenized.word_ids(batch_index=0):
+            if word_idx is None:
+                label_ids.append(-100)
+            elif word_idx != previous_word_idx:
+                label_ids.append(label_to_id[labels[word_idx]])
+            elif hf_args.label_all_tokens:
+                label_ids.append(b_to_i_label[label_to_id[labels[word_idx]]])
+            else:
+                label_ids.append(-100)
+            previous_word_idx = word_idx
+        result.setdefault("labels", []).append(label_ids)
+    return result
+
+
+@pytest.mark.skipif(
+    sys.platform == "darwin" or sys.version < "3.7",
+    reason="do not run on mac os or py<3.7",
+)
+def test_batched_tokenization():
+    from flaml.automl.nlp.huggingface.training_args import TrainingArgumentsForAuto
+    from flaml.automl.nlp.huggingface.utils import (
+        load_tokenizer,
+        tokenize_text,
+        tokenize_text_to_dataset,
+    )
+
+    tokenizer = load_tokenizer(MODEL_PATH)
+
+    def check(X, Y, task, expected, **kwargs):
+        hf_args = TrainingArgumentsForAuto(
+            model_path=MODEL_PATH, output_dir="test/data/output/", **kwargs
+        )
+        X_tokenized, Y_tokenized = tokenize_text(
+            X, Y, task=task, hf_args=hf_args, tokenizer=tokenizer
+        )
+        dataset = tokenize_text_to_dataset(
+            X, Y, task=task, hf_args=hf_args, tokenizer=tokenizer
+        )
+        for key, values in expected(hf_args).items():
+            if key == "labels":
+                assert Y_tokenized["labels"].tolist() == values
+            else:
+                assert X_tokenized[key].tolist() == values
+            assert dataset[key] == values
+
+    X, y, _, _, _ = get_toy_data_seqclassification()
+    for pad_to_max_length in (False, True):
+        check(
+            X,
+            y,
+            "seq-classification",
+            lambda hf_args: _per_row_seqclassification(X, tokenizer, hf_args),
+            pad_to_max_length=pad_to_max_length,
+        )
+
+    X, y, _, _, _, _ = get_toy_data_multiplechoiceclassification()
+    check(
+        X,
+        y,
+        "multichoice-classification",
+        lambda hf_args: _per_row_multiplechoice(X, tokenizer, hf_args),
+    )
+
+    X, y, _, _ = get_toy_data_tokenclassification_idlabel()
+    for label_all_tokens in (False, True):
+        check(
+            X,
+            y,
+            "token-classification",
+            lambda hf_args: _per_row_tokenclassification(X, y, tokenizer, hf_args),
+            label_list=LABEL_LIST,
+            label_all_tokens=label_all_tokens,
+            max_seq_length=None,
+        )
+
+
+if __name__ == "__main__":
+    test_batched_tokenization()
@@ -4,7 +4,7 @@ import subprocess
 import sys
 import numpy as np
 import pytest
-from flaml import oai
+from flaml import oai, tune
 
 
 @pytest.mark.skipif(
@@ -117,6 +117,244 @@ def test_humaneval(num_samples=1):
         print(exc)
 
 
+@pytest.fixture
+def completion_settings(monkeypatch):
+    """Restore the cache and the other settings of oai.Completion after a test."""
+    for name in (
+        "seed",
+        "cache_path",
+        "memory_cache_size",
+        "cache_size_limit",
+        "cache_ttl",
+        "cache_compress",
+        "_cache",
+        "data",
+        "optimization_budget",
+        "_total_cost",
+    ):
+        monkeypatch.setattr(
+            oai.Completion, name, getattr(oai.Completion, name, None), raising=False
+        )
+    yield
+    cache = getattr(oai.Completion, "_cache", None)
+    if cache is not None:
+        cache.close()
+    oai.Completion.set_concurrency()
+    oai.Completion.set_batching()
+
+
+def test_concurrent_eval(tmp_path, monkeypatch, completion_settings):
+    import threading
+    import time
+
+    try:
+        import openai
+    except ImportError as exc:
+        print(exc)
+        return
+
+    n_calls, active, max_active = [0], [0], [0]
+    lock = threading.Lock()
+
+    def create(**config):
+        with lock:
+            n_calls[0] += 1
+            active[0] += 1
+            max_active[0] = max(max_active[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {
+            "choices": [{"text": config["prompt"]}] * config["n"],
+            "usage": {"completion_tokens": 1, "total_tokens": 2},
+        }
+
+    monkeypatch.setattr(openai.Completion, "create", create)
+    oai.Completion.set_cache(cache_path=str(tmp_path))
+    oai.Completion.set_concurrency(8, requests_per_minute=6000)
+    data = [{"prompt": str(i)} for i in range(16)]
+    _, analysis = oai.Completion.tune(
+        data=data,
+        metric="success",
+        mode="max",
+        eval_func=lambda responses, prompt: {"success": responses[0] == prompt},
+        model=tune.choice(["text-ada-001"]),
+        n=1,
+        max_tokens=1,
+        num_samples=2,
+    )
+    assert 1 < max_active[0] <= 8
+    oai.Completion.data = data
+    result = oai.Completion.eval(analysis.best_config, prune=False, eval_only=True)
+    assert result["success"] == 1
+
+
+def test_eval_budget(tmp_path, monkeypatch, completion_settings):
+    import threading
+    import time
+
+    try:
+        import openai
+    except ImportError as exc:
+        print(exc)
+        return
+
+    n_calls, active, max_active = [0], [0], [0]
+    lock = threading.Lock()
+
+    def create(**config):
+        with lock:
+            n_calls[0] += 1
+            active[0] += 1
+            max_active[0] = max(max_active[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {
+            "choices": [{"text": config["prompt"]}] * config["n"],
+            "usage": {"completion_tokens": 500, "total_tokens": 1000},
+        }
+
+    monkeypatch.setattr(openai.Completion, "create", create)
+    oai.Completion.set_cache(cache_path=str(tmp_path / "tune"))
+    oai.Completion.set_concurrency(4, requests_per_minute=60000)
+    data = [{"prompt": str(i)} for i in range(32)]
+    _, analysis = oai.Completion.tune(
+        data=data,
+        metric="success",
+        mode="max",
+        eval_func=lambda responses, prompt: {"success": responses[0] == prompt},
+        model=tune.choice(["text-ada-001"]),
+        n=1,
+        max_tokens=1,
+        num_samples=1,
+    )
+    # the requests in flight are bounded, and the ones sent before an early stop are billed
+    oai.Completion.set_cache(cache_path=str(tmp_path / "eval"))
+    oai.Completion._cache = oai.Completion._open_cache()
+    cost_per_call = 1000 * oai.Completion.price1K["text-ada-001"] / 1000
+    oai.Completion.optimization_budget = 2.5 * cost_per_call
+    oai.Completion._total_cost = 0
+    n_calls[0] = max_active[0] = 0
+    oai.Completion.data = data
+    result = oai.Completion.eval(analysis.best_config, prune=False)
+    assert max_active[0] <= 4
+    assert 3 <= n_calls[0] <= 3 + 4
+    assert result["total_cost"] == pytest.approx(n_calls[0] * cost_per_call)
+    assert oai.Completion._total_cost == result["total_cost"] == result["cost"]
+
+
+def test_batched_eval(tmp_path, monkeypatch, completion_settings):
+    try:
+        import openai
+    except ImportError as exc:
+        print(exc)
+        return
+
+    n_calls = [0]
+
+    def create(**config):
+        n_calls[0] += 1
+        prompts = config["prompt"]
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        n = config["n"]
+        return {
+            "choices": [
+                {"text": prompt, "index": i * n + j}
+                for i, prompt in enumerate(prompts)
+                for j in range(n)
+            ],
+            "usage": {
+                "prompt_tokens": len(prompts),
+                "completion_tokens": len(prompts) * n,
+                "total_tokens": len(prompts) * (n + 1),
+            },
+        }
+
+    monkeypatch.setattr(openai.Completion, "create", create)
+    oai.Completion.set_cache(cache_path=str(tmp_path / "tune"))
+    oai.Completion.set_batching(batch_size=4)
+    data = [{"prompt": str(i)} for i in range(16)]
+    _, analysis = oai.Completion.tune(
+        data=data,
+        metric="success",
+        mode="max",
+        eval_func=lambda responses, prompt: {
+            "success": all(response == prompt for response in responses)
+        },
+        model=tune.choice(["text-ada-001"]),
+        n=2,
+        max_tokens=1,
+        num_samples=1,
+    )
+    assert analysis.best_result["success"] == 1
+    oai.Completion.set_cache(cache_path=str(tmp_path / "eval"))
+    oai.Completion._cache = oai.Completion._open_cache()
+    n_calls[0] = 0
+    oai.Completion.data = data
+    result = oai.Completion.eval(analysis.best_config, prune=False, eval_only=True)
+    # the 16 prompts are sent in 4 requests
+    assert n_calls[0] == 4
+    assert result["success"] == 1
+    assert oai.Completion.cache_stats()["api_calls"] == 4
+    # the choices and usage are split per prompt
+    responses = oai.Completion._split_response(
+        create(prompt=["0", "1"], n=2), ["0", "1"], 2
+    )
+    assert [[c["index"] for c in r["choices"]] for r in responses] == [[0, 1]] * 2
+    assert [r["usage"]["total_tokens"] for r in responses] == [3, 3]
+
+
+def test_response_cache(tmp_path):
+    import threading
+    import time
+
+    try:
+        from flaml.integrations.oai.completion import ResponseCache
+    except ImportError as exc:
+        print(exc)
+        return
+
+    n_calls = [0]
+
+    def call():
+        n_calls[0] += 1
+        time.sleep(0.1)
+        return {"choices": [{"text": "x" * 100}]}
+
+    with ResponseCache(str(tmp_path), memory_size=2, compress=True) as cache:
+        threads = [
+            threading.Thread(target=cache.get_or_call, args=(("key",), call))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # identical requests in flight are coalesced into one call
+        assert n_calls[0] == 1 and cache.stats["api_calls"] == 1
+        assert cache.stats["coalesced"] >= 1
+        assert isinstance(cache._disk.get(("key",)), bytes)
+        cache.set(("a",), 1)
+        cache.set(("b",), 2)
+        # the least recently used response is evicted from memory, but kept on disk
+        assert ("key",) not in cache._memory
+        assert cache.get(("key",)) == call()
+        assert cache.stats["disk_hits"] == 1
+        # the responses are copied, so that modifying one does not modify the cache
+        response = call()
+        cache.set(("d",), response)
+        response["choices"].clear()
+        cache.get(("key",))["choices"].clear()
+        assert cache.get(("key",)) == cache.get(("d",)) == call()
+    with ResponseCache(str(tmp_path), ttl=0.1) as cache:
+        cache.set(("c",), 3)
+        assert cache.get(("c",)) == 3
+        time.sleep(0.2)
+        assert cache.get(("c",)) is None
+
+
 if __name__ == "__main__":
     import openai
 
@@ -339,6 +339,25 @@ def online_learning_loop(iter_num, vw_examples, vw_alg, loss_func, method_name="
     return loss_list
 
 
+def get_synthetic_vw_examples(n=1000, ns_num=5, seed=0):
+    """generate vw examples of a regression problem with a namespace interaction"""
+    rng = np.random.RandomState(seed)
+    X = rng.rand(n, ns_num * 2)
+    y = X[:, 0] * X[:, 2] + X[:, 1] + 0.1 * rng.randn(n)
+    return [
+        "{} |{}".format(
+            y[i],
+            "|".join(
+                "{} {}:{:.6f} {}:{:.6f}".format(
+                    NS_LIST[j], 2 * j, X[i, 2 * j], 2 * j + 1, X[i, 2 * j + 1]
+                )
+                for j in range(ns_num)
+            ),
+        )
+        for i in range(n)
+    ]
+
+
 def get_vw_tuning_problem(tuning_hp="NamesapceInteraction"):
     online_vw_exp_setting = {
         "max_live_model_num": 5,
@@ -438,6 +457,202 @@ class TestAutoVW(unittest.TestCase):
             "final average loss:", sum(cumulative_loss_list) / len(cumulative_loss_list)
         )
 
+    def test_learn_batch(self):
+        vw_examples = get_synthetic_vw_examples()
+        search_space = {"interactions": AutoVW.AUTOMATIC, "quiet": ""}
+        autovw = AutoVW(max_live_model_num=5, search_space=search_space, random_seed=1)
+        loss_list = online_learning_loop(
+            len(vw_examples), vw_examples, autovw, loss_func="squared"
+        )
+        # learning from batches of one example is the same as learning online
+        autovw_batch = AutoVW(
+            max_live_model_num=5, search_space=search_space, random_seed=1
+        )
+        batch_loss_list = []
+        for vw_x in vw_examples:
+            y_pred = autovw_batch.predict_batch([vw_x])
+            autovw_batch.learn_batch([vw_x])
+            batch_loss_list.append(get_loss(y_pred[0], get_y_from_vw_example(vw_x)))
+        assert np.allclose(loss_list, batch_loss_list)
+        # larger batches
+        autovw_batch = AutoVW(
+            max_live_model_num=5, search_space=search_space, random_seed=1
+        )
+        for i in range(0, len(vw_examples), 32):
+            y_pred = autovw_batch.predict_batch(vw_examples[i : i + 32])
+            assert y_pred.shape == (len(vw_examples[i : i + 32]),)
+            autovw_batch.learn_batch(vw_examples[i : i + 32])
+        assert len(autovw_batch._trial_runner.get_trials()) > 1
+
+    def test_learn_batch_parallel(self):
+        from flaml.onlineml.trial import VowpalWabbitTrial, VowpalWabbitWorkerPool
+
+        vw_examples = get_synthetic_vw_examples()
+        configs = [{"quiet": ""}, {"quiet": "", "interactions": {"ab"}}]
+        pool = VowpalWabbitWorkerPool(2)
+        local_trials = [VowpalWabbitTrial(config, "auto") for config in configs]
+        remote_trials = [VowpalWabbitTrial(config, "auto") for config in configs]
+        for trial in remote_trials:
+            trial.trainable_class = pool.create_model
+        for i in range(0, len(vw_examples), 100):
+            batch = vw_examples[i : i + 100]
+            y_pred = pool.learn_batch(remote_trials, batch)
+            for local_trial, remote_trial in zip(local_trials, remote_trials):
+                local_trial.train_eval_model_online_batch(batch)
+                remote_trial.train_eval_model_online_batch(
+                    batch, y_pred=y_pred[remote_trial.trial_id]
+                )
+                # the models trained in the worker processes are the same
+                assert local_trial.result.loss_avg == remote_trial.result.loss_avg
+                assert np.allclose(
+                    local_trial.predict_batch(batch), remote_trial.predict_batch(batch)
+                )
+        for trial in remote_trials:
+            trial.clean_up_model()
+        assert sum(pool._num_models) == 0
+        pool.close()
+
+        search_space = {"interactions": AutoVW.AUTOMATIC, "quiet": ""}
+        autovw = AutoVW(
+            max_live_model_num=5,
+            search_space=search_space,
+            random_seed=1,
+            automl_runner_args={"num_workers": 2},
+        )
+        loss_list = []
+        for i in range(0, len(vw_examples), 50):
+            batch = vw_examples[i : i + 50]
+            y_pred = autovw.predict_batch(batch)
+            autovw.learn_batch(batch)
+            y = np.array([get_y_from_vw_example(vw_x) for vw_x in batch])
+            loss_list.extend((y_pred - y) ** 2)
+        autovw.close()
+        assert np.mean(loss_list[-500:]) < np.mean(loss_list[:500])
+
+    def test_save_load(self):
+        import shutil
+        import tempfile
+
+        vw_examples = get_synthetic_vw_examples()
+        search_space = {"interactions": AutoVW.AUTOMATIC, "quiet": ""}
+        autovw = AutoVW(max_live_model_num=5, search_space=search_space, random_seed=1)
+        online_learning_loop(500, vw_examples, autovw, loss_func="squared")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "autovw")
+            autovw.save(path)
+            # saving again replaces the snapshot
+            autovw.save(path)
+            # a crashed save left the previous snapshot aside, which is loaded
+            shutil.copytree(path, f"{path}.old")
+            shutil.rmtree(path)
+            assert len(AutoVW.load(path)._trial_runner.get_trials())
+            # or left a stale backup next to a complete snapshot
+            autovw.save(path)
+            shutil.copytree(path, f"{path}.old")
+            autovw.save(path)
+            assert not os.path.exists(f"{path}.old")
+            autovw_loaded = AutoVW.load(path)
+        assert len(autovw_loaded._trial_runner.get_trials()) == len(
+            autovw._trial_runner.get_trials()
+        )
+        # the loaded instance continues learning as the original one
+        loss_list = online_learning_loop(
+            500, vw_examples[500:], autovw, loss_func="squared"
+        )
+        loss_list_loaded = online_learning_loop(
+            500, vw_examples[500:], autovw_loaded, loss_func="squared"
+        )
+        assert np.allclose(loss_list, loss_list_loaded)
+
+    def test_online_result_store(self):
+        from flaml.onlineml.trial import OnlineResult, OnlineResultStore
+
+        store = OnlineResultStore(capacity=2)
+        results = [OnlineResult("mae_clipped", store=store) for _ in range(5)]
+        rng = np.random.RandomState(0)
+        for i, result in enumerate(results):
+            result.update_result_batch(rng.rand(10 * i + 1), 10 * i + 1, 4)
+        rows = [result.row for result in results]
+        assert len(set(rows)) == 5
+        for score_name in ["loss_lcb", "loss_ucb", "loss_avg"]:
+            assert np.allclose(
+                store.get_scores(rows, score_name),
+                [result.get_score(score_name) for result in results],
+            )
+        assert np.array_equal(
+            store.resource_used[rows], [result.resource_used for result in results]
+        )
+        # the row of a released result is reused
+        results[0].release()
+        assert OnlineResult("mae_clipped", store=store).row == rows[0]
+
+    def test_lazy_challengers(self):
+        import pickle
+        import string
+        from flaml.tune import polynomial_expansion_set
+        from flaml.tune.searcher import ChampionFrontierSearcher
+
+        namespaces = string.ascii_letters[:30]
+        namespace_feature_dim = {ns: i + 1 for i, ns in enumerate(namespaces)}
+        space = {
+            "interactions": polynomial_expansion_set(
+                init_monomials=set(namespaces),
+                highest_poly_order=len(namespaces),
+                allow_self_inter=False,
+            ),
+        }
+        searcher = ChampionFrontierSearcher(
+            init_config={"interactions": set()},
+            space=space,
+            metric="mae_clipped",
+            mode="min",
+            online_trial_args={"min_resource_lease": 1, "metric": "mae_clipped"},
+            challenger_priority="cost",
+            namespace_feature_dim=namespace_feature_dim,
+        )
+        # only the champion trial is created before the challengers are requested
+        assert len(searcher._searcher_trialid_to_trialid) == 1
+        assert len(searcher._challenger_list[0]) == 30 * 29 // 2
+        searcher = pickle.loads(pickle.dumps(searcher))
+        champion = searcher.next_trial()
+        assert champion.config["interactions"] == set()
+        challenger = searcher.next_trial()
+        assert len(searcher._searcher_trialid_to_trialid) == 2
+        # the interaction with the lowest feature dimension is tried first
+        assert challenger.config["interactions"] == {"ab"}
+        assert len(searcher._challenger_list[0]) == 30 * 29 // 2 - 1
+
+        # the interactions of the namespaces which made the previous champions are tried first
+        searcher = ChampionFrontierSearcher(
+            init_config={"interactions": set()},
+            space=space,
+            metric="mae_clipped",
+            mode="min",
+            online_trial_args={"min_resource_lease": 1, "metric": "mae_clipped"},
+            challenger_priority="success",
+        )
+        for interactions in ({"ab"}, {"ab", "ac"}):
+            champion = searcher._create_trial_from_config(
+                {"interactions": interactions}
+            )
+            searcher.set_search_properties(
+                setting={searcher.CHAMPION_TRIAL_NAME: champion}
+            )
+        assert searcher._namespace_success == {"a": 2, "b": 1, "c": 1}
+        n_challengers = len(searcher._challenger_list[-1])
+        challengers = list(searcher._challenger_list[-1])
+        assert len(challengers) == n_challengers
+        scores = [
+            sum(
+                searcher._namespace_success.get(ns, 0)
+                for interaction in c.config["interactions"] - {"ab", "ac"}
+                for ns in interaction
+            )
+            for c in challengers
+        ]
+        # "abc" adds the most successful namespaces
+        assert scores[0] == 4 and scores == sorted(scores, reverse=True)
+
     def test_bandit_vw_tune_namespace(self):
         pass
 
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import time
+
+
+def _run(code, **kwargs):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        **kwargs,
+    ).stdout
+
+
+def test_lazy_import():
+    # importing flaml does not import the heavy dependencies or the AutoML stack
+    loaded = _run(
+        "import sys, flaml; print(' '.join(m for m in "
+        "('pandas', 'sklearn', 'scipy', 'ray', 'flaml.automl.automl', 'flaml.tune.tune') "
+        "if m in sys.modules))"
+    )
+    assert loaded.strip() == ""
+    # the public API is still available from the packages
+    _run(
+        "import flaml; from flaml import AutoML, CFO, BlendSearch, tune; "
+        "from flaml.automl import AutoML, size; "
+        "from flaml.tune import run, report, uniform, choice, Trial, sample; "
+        "assert flaml.AutoML is AutoML and callable(tune.loguniform); "
+        "assert flaml.automl.model.LGBMEstimator"
+    )
+    # importing AutoML does not try to import ray, installed or not
+    attempted = _run(
+        "import sys\n"
+        "class Finder:\n"
+        "    def find_spec(self, name, path=None, target=None):\n"
+        "        if name.split('.')[0] == 'ray': print(name)\n"
+        "sys.meta_path.insert(0, Finder())\n"
+        "from flaml import AutoML"
+    )
+    assert attempted.strip() == ""
+    # the submodules import in a fresh interpreter without the packages preloaded
+    for module in ("flaml.tune.space", "flaml.tune.searcher.flow2"):
+        _run(f"import {module}")
+
+
+def test_sample_module(tmp_path):
+    # flaml.tune.sample is the sample module of ray when ray is installed,
+    # even after flaml's own sample module is loaded by the searchers
+    code = (
+        "import flaml.tune.searcher.suggestion, flaml.tune.sample; "
+        "from flaml import tune; from flaml.tune import Float; "
+        "print(tune.sample.__name__, tune.uniform.__module__)"
+    )
+    assert _run(code).split() == ["flaml.tune.sample", "flaml.tune.sample"]
+    for version, sample in (
+        ("1.13.0", "ray.tune.sample"),
+        ("2.0.0", "ray.tune.search.sample"),
+    ):
+        root = tmp_path / version
+        (root / "ray" / "tune" / "search").mkdir(parents=True)
+        (root / "ray" / "__init__.py").write_text(f"__version__ = {version!r}")
+        (root / "ray" / "tune" / "__init__.py").write_text(
+            "def uniform(lower, upper): pass"
+        )
+        (root / "ray" / "tune" / "sample.py").write_text("")
+        (root / "ray" / "tune" / "search" / "__init__.py").write_text("")
+        (root / "ray" / "tune" / "search" / "sample.py").write_text("")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(root), os.getcwd()]))
+        assert _run(code, env=env).split() == [sample, "ray.tune"]
+
+
+def test_import_time():
+    """Benchmark the time of `import flaml` and `from flaml import AutoML` in a fresh interpreter."""
+    for statement in ("import flaml", "from flaml import AutoML"):
+        start = time.perf_counter()
+        _run(statement)
+        print(f"{statement}: {time.perf_counter() - start:.3f}s")
+    import_time = float(
+        _run(
+            "import time; start = time.perf_counter(); import flaml; "
+            "print(time.perf_counter() - start)"
+        )
+    )
+    print(f"import flaml in process: {import_time:.4f}s")
+    assert import_time < 1
+
+
+if __name__ == "__main__":
+    test_lazy_import()
+    test_import_time()
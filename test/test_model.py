@@ -131,5 +131,48 @@ def test_prep():
     print(lgbm.feature_importances_)
 
 
+def _sleep(seconds):
+    import time
+
+    time.sleep(seconds)
+    return seconds
+
+
+def _allocate(nbytes):
+    return len(bytearray(nbytes))
+
+
+def _crash():
+    import os
+
+    os._exit(1)
+
+
+def test_run_in_subprocess():
+    from flaml.automl.model import run_in_subprocess, TrialWorkerError
+
+    assert run_in_subprocess(_sleep, (0.1,), time_limit=10) == 0.1
+    try:
+        run_in_subprocess(_sleep, (10,), time_limit=0.5)
+        assert False, "TimeoutError expected"
+    except TimeoutError:
+        pass
+    try:
+        run_in_subprocess(_allocate, (1 << 30,), memory_limit=1 << 27)
+        assert False, "MemoryError expected"
+    except MemoryError:
+        pass
+    try:
+        run_in_subprocess(_sleep, ("1",))
+        assert False, "TypeError expected"
+    except TypeError:
+        pass
+    try:
+        run_in_subprocess(_crash)
+        assert False, "TrialWorkerError expected"
+    except TrialWorkerError:
+        pass
+
+
 if __name__ == "__main__":
     test_prep()